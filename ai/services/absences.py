@@ -0,0 +1,101 @@
+"""
+Daily absence arrays shared by the AI services
+
+Request history is turned into a (departments x days) matrix of people
+absent per day with a difference array and a cumulative sum, so building
+years of history is a handful of vectorized NumPy calls regardless of how
+many requests there are.
+"""
+
+from datetime import date
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+ABSENT_STATUSES = ("approved",)
+
+
+def requests_to_arrays(
+    requests: Union[Iterable[Dict], Mapping[str, np.ndarray]],
+    department_of_user: Dict[int, Optional[str]],
+    departments: Sequence[str],
+    statuses: Sequence[str] = ABSENT_STATUSES,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(start_ordinal, end_ordinal, department_index) arrays for matching requests
+
+    ``requests`` is either an iterable of request dicts or typed columns:
+    ``user_id``, ``start``/``end`` day ordinals, ``status`` codes and the
+    ``status_names`` they index.
+    """
+    if isinstance(requests, Mapping):
+        return _columns_to_arrays(requests, department_of_user, departments, statuses)
+    dept_index = {name: i for i, name in enumerate(departments)}
+    starts: List[int] = []
+    ends: List[int] = []
+    depts: List[int] = []
+    for request in requests:
+        if request["status"] not in statuses:
+            continue
+        idx = dept_index.get(department_of_user.get(request["user_id"]))
+        if idx is None:
+            continue
+        starts.append(date.fromisoformat(request["start_date"]).toordinal())
+        ends.append(date.fromisoformat(request["end_date"]).toordinal())
+        depts.append(idx)
+    return (
+        np.asarray(starts, dtype=np.int32),
+        np.asarray(ends, dtype=np.int32),
+        np.asarray(depts, dtype=np.int32),
+    )
+
+
+def _columns_to_arrays(
+    columns: Mapping[str, np.ndarray],
+    department_of_user: Dict[int, Optional[str]],
+    departments: Sequence[str],
+    statuses: Sequence[str],
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    dept_index = {name: i for i, name in enumerate(departments)}
+    user_ids = columns["user_id"]
+    lookup = np.full(max(max(department_of_user, default=0), int(user_ids.max(initial=0))) + 1, -1, dtype=np.int32)
+    for user_id, department in department_of_user.items():
+        lookup[user_id] = dept_index.get(department, -1)
+    depts = lookup[user_ids]
+    codes = [code for code, name in enumerate(columns["status_names"]) if name in statuses]
+    keep = np.isin(columns["status"], codes) & (depts >= 0)
+    return (
+        columns["start"][keep].astype(np.int32),
+        columns["end"][keep].astype(np.int32),
+        depts[keep],
+    )
+
+
+def daily_absence_matrix(
+    starts: np.ndarray,
+    ends: np.ndarray,
+    dept_idx: np.ndarray,
+    n_departments: int,
+    origin: int,
+    n_days: int,
+) -> np.ndarray:
+    """People absent per department per day for days [origin, origin + n_days)"""
+    s = np.clip(starts.astype(np.int64) - origin, 0, n_days)
+    e = np.clip(ends.astype(np.int64) - origin + 1, 0, n_days)
+    keep = s < e
+    diff = np.zeros((n_departments, n_days + 1), dtype=np.int32)
+    np.add.at(diff, (dept_idx[keep], s[keep]), 1)
+    np.add.at(diff, (dept_idx[keep], e[keep]), -1)
+    return np.cumsum(diff[:, :-1], axis=1, dtype=np.int32)
+
+
+def day_features(origin: int, n_days: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(weekday 0=Mon, month 1-12, day_of_year 1-366) for each day of the range"""
+    ordinals = np.arange(origin, origin + n_days, dtype=np.int64)
+    # date.toordinal(): day 1 is Monday 0001-01-01
+    weekday = (ordinals - 1) % 7
+    as_datetime = (ordinals - date(1970, 1, 1).toordinal()).astype("datetime64[D]")
+    months = as_datetime.astype("datetime64[M]")
+    month = months.astype(np.int64) % 12 + 1
+    years = as_datetime.astype("datetime64[Y]")
+    day_of_year = (as_datetime - years).astype(np.int64) + 1
+    return weekday, month, day_of_year
@@ -0,0 +1,331 @@
+"""
+Absence-peak forecasting by department
+
+Model: a per-department seasonal baseline (mean absences by month and
+weekday) plus one gradient-boosting model over the residuals that takes
+the department as a categorical feature. Pooling the residual model means
+inference for every department and every day of the horizon is a single
+``predict`` call.
+
+``ForecastService`` keeps predictions cached in process. New or decided
+requests update the observed absence matrix incrementally (the known
+absences reported with each forecast); expected absences change when the
+model is refit, once enough new requests have accumulated or a new
+department appears.
+"""
+
+import os
+import pickle
+import threading
+from collections import deque
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .absences import (
+    ABSENT_STATUSES,
+    daily_absence_matrix,
+    day_features,
+    requests_to_arrays,
+)
+
+SEASON_BINS = 12 * 7
+PEAK_SIGMA = 1.5
+
+HistorySource = Callable[[], Tuple[Iterable[Dict], Dict[int, Optional[str]]]]
+
+
+def _season_keys(origin: int, n_days: int) -> np.ndarray:
+    weekday, month, _ = day_features(origin, n_days)
+    return (month - 1) * 7 + weekday
+
+
+def _feature_matrix(dept_indices: np.ndarray, origin: int, n_days: int) -> np.ndarray:
+    """Rows for every (department, day) pair, department-major"""
+    weekday, month, day_of_year = day_features(origin, n_days)
+    angle = 2 * np.pi * day_of_year / 365.25
+    day_block = np.column_stack([weekday, month, np.sin(angle), np.cos(angle)])
+    n_depts = len(dept_indices)
+    return np.column_stack([
+        np.repeat(dept_indices, n_days),
+        np.tile(day_block, (n_depts, 1)),
+    ]).astype(np.float64)
+
+
+class AbsenceForecaster:
+    """Seasonal baseline + gradient-boosted residuals, vectorized over departments"""
+
+    def __init__(self, min_history_days: int = 120, max_iter: int = 200,
+                 learning_rate: float = 0.05, max_depth: int = 4):
+        self.min_history_days = min_history_days
+        self.max_iter = max_iter
+        self.learning_rate = learning_rate
+        self.max_depth = max_depth
+        self.departments: List[str] = []
+        self.baseline = np.zeros((0, SEASON_BINS))
+        self.residual_model = None
+
+    def fit(self, matrix: np.ndarray, origin: int, departments: Sequence[str]) -> "AbsenceForecaster":
+        """Fit on a (departments x days) absence matrix starting at ``origin``"""
+        n_depts, n_days = matrix.shape
+        self.departments = list(departments)
+        keys = _season_keys(origin, n_days)
+
+        sums = np.zeros((n_depts, SEASON_BINS))
+        counts = np.bincount(keys, minlength=SEASON_BINS).astype(np.float64)
+        np.add.at(sums.T, keys, matrix.T)
+        overall = matrix.mean(axis=1, keepdims=True) if n_days else np.zeros((n_depts, 1))
+        self.baseline = np.where(counts > 0, sums / np.maximum(counts, 1), overall)
+
+        self.residual_model = None
+        if n_days >= self.min_history_days and n_depts:
+            from sklearn.ensemble import HistGradientBoostingRegressor
+
+            residual = matrix - self.baseline[:, keys]
+            X = _feature_matrix(np.arange(n_depts), origin, n_days)
+            model = HistGradientBoostingRegressor(
+                max_iter=self.max_iter,
+                learning_rate=self.learning_rate,
+                max_depth=self.max_depth,
+                categorical_features=[0],
+            )
+            model.fit(X, residual.ravel())
+            self.residual_model = model
+        return self
+
+    def predict(self, origin: int, n_days: int, dept_indices: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+        """Expected absences for the selected departments, one model call total"""
+        if dept_indices is None:
+            dept_indices = np.arange(len(self.departments))
+        keys = _season_keys(origin, n_days)
+        baseline = self.baseline[dept_indices][:, keys]
+        expected = baseline.copy()
+        if self.residual_model is not None and len(dept_indices):
+            residual = self.residual_model.predict(_feature_matrix(dept_indices, origin, n_days))
+            expected += residual.reshape(len(dept_indices), n_days)
+        return {"baseline": baseline, "expected": np.clip(expected, 0, None)}
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    @staticmethod
+    def load(path: str) -> Optional["AbsenceForecaster"]:
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+
+class ForecastService:
+    """In-process cache of forecasts, refreshed incrementally on new requests"""
+
+    def __init__(self, history_source: HistorySource, model_path: Optional[str] = None, horizon_days: int = 90,
+                 history_days: int = 3 * 365, retrain_after: int = 500,
+                 max_model_age: timedelta = timedelta(days=1)):
+        self.model_path = model_path
+        self.horizon_days = horizon_days
+        self.history_days = history_days
+        self.retrain_after = retrain_after
+        self.max_model_age = max_model_age
+        self.history_source = history_source
+
+        # _lock guards the matrices and is only held for quick updates and
+        # reads; fitting happens outside it under _fit_lock
+        self._lock = threading.RLock()
+        self._fit_lock = threading.Lock()
+        # Listener events, queued without locking (the listeners run on the
+        # event loop) and applied by the next query
+        self._events: Deque[Tuple[str, Any, Any]] = deque()
+        self.model: Optional[AbsenceForecaster] = None
+        self.departments: List[str] = []
+        self._dept_index: Dict[str, int] = {}
+        self._department_of_user: Dict[int, Optional[str]] = {}
+        self.origin = 0
+        self.today = 0
+        self.observed = np.zeros((0, 0), dtype=np.int32)
+        self.expected = np.zeros((0, 0))
+        self.baseline = np.zeros((0, 0))
+        self._new_since_fit = 0
+        self.trained_at: Optional[datetime] = None
+
+    # Loading and training
+    def load(self, today: Optional[date] = None) -> None:
+        """Build the observed matrix from the full history and fit (or load) the model"""
+        with self._fit_lock:
+            # Events up to the snapshot are part of the history read below
+            self._events.clear()
+            requests, department_of_user = self.history_source()
+            today = (today or date.today()).toordinal()
+            department_of_user = dict(department_of_user)
+            departments = sorted({d for d in department_of_user.values() if d})
+            origin = today - self.history_days
+
+            starts, ends, depts = requests_to_arrays(requests, department_of_user, departments)
+            # Observed covers history and the horizon, where approved future
+            # requests are already known absences
+            observed = daily_absence_matrix(
+                starts, ends, depts, len(departments), origin,
+                self.history_days + self.horizon_days,
+            )
+            model, trained_at = self._load_model(departments)
+            if model is None:
+                model, trained_at = self._fit(observed, origin, departments)
+            with self._lock:
+                self._department_of_user = department_of_user
+                self.departments = departments
+                self._dept_index = {name: i for i, name in enumerate(departments)}
+                self.today, self.origin, self.observed = today, origin, observed
+                self._install(model, trained_at)
+                self._new_since_fit = 0
+
+    def _load_model(self, departments: List[str]) -> Tuple[Optional[AbsenceForecaster], Optional[datetime]]:
+        model = AbsenceForecaster.load(self.model_path) if self.model_path else None
+        fresh = (
+            model is not None
+            and model.departments == departments
+            and os.path.getmtime(self.model_path) > (datetime.now() - self.max_model_age).timestamp()
+        )
+        if not fresh:
+            return None, None
+        return model, datetime.utcfromtimestamp(os.path.getmtime(self.model_path))
+
+    def _fit(self, observed: np.ndarray, origin: int,
+             departments: List[str]) -> Tuple[AbsenceForecaster, datetime]:
+        model = AbsenceForecaster().fit(observed[:, :self.history_days], origin, departments)
+        if self.model_path:
+            model.save(self.model_path)
+        return model, datetime.utcnow()
+
+    def _install(self, model: AbsenceForecaster, trained_at: datetime) -> None:
+        """Swap in a model and its predictions (caller holds _lock)
+
+        Departments added while it was fitting keep zero expectations until
+        the next refit.
+        """
+        result = model.predict(self.today, self.horizon_days)
+        missing = ((0, len(self.departments) - len(model.departments)), (0, 0))
+        self.model, self.trained_at = model, trained_at
+        self.expected = np.pad(result["expected"], missing)
+        self.baseline = np.pad(result["baseline"], missing)
+
+    def _refresh(self) -> None:
+        """Apply queued events and refit when the model is stale
+
+        Expected absences only change on refit: the model's features are
+        calendar and department, not recent observations. Events update the
+        known absences shown next to them and count towards the refit.
+        """
+        if date.today().toordinal() != self.today:
+            # Day rollover shifts every window: rebuild from the source
+            self.load()
+            return
+        with self._lock:
+            self._apply_events()
+            stale = self._new_since_fit >= self.retrain_after or self.model.departments != self.departments
+            if not stale:
+                return
+        # One refit at a time; other queries keep serving the current model
+        if not self._fit_lock.acquire(blocking=False):
+            return
+        try:
+            with self._lock:
+                observed, origin, departments = self.observed.copy(), self.origin, list(self.departments)
+                counted = self._new_since_fit
+            model, trained_at = self._fit(observed, origin, departments)
+            with self._lock:
+                if self.origin == origin and self.departments[:len(departments)] == departments:
+                    self._install(model, trained_at)
+                    self._new_since_fit -= counted
+        finally:
+            self._fit_lock.release()
+
+    # Incremental updates
+    def observe(self, request: Dict, previous_status: Optional[str] = None) -> None:
+        """Account for a created or decided request"""
+        was_absent = previous_status in ABSENT_STATUSES
+        is_absent = request["status"] in ABSENT_STATUSES
+        if was_absent != is_absent:
+            self._events.append(("request", request, is_absent))
+
+    def register_user(self, user_id: int, department: Optional[str]) -> None:
+        self._events.append(("user", user_id, department))
+
+    def _apply_events(self) -> None:
+        while self._events:
+            kind, subject, value = self._events.popleft()
+            if kind == "user":
+                self._department_of_user[subject] = value
+                if value and value not in self._dept_index:
+                    self._add_department(value)
+                continue
+            idx = self._dept_index.get(self._department_of_user.get(subject["user_id"]))
+            if idx is None:
+                continue
+            start = date.fromisoformat(subject["start_date"]).toordinal() - self.origin
+            end = date.fromisoformat(subject["end_date"]).toordinal() - self.origin + 1
+            start, end = max(start, 0), min(end, self.observed.shape[1])
+            if start < end:
+                self.observed[idx, start:end] += 1 if value else -1
+            self._new_since_fit += 1
+
+    def _add_department(self, department: str) -> None:
+        """New department: known absences right away, a forecast from the next refit"""
+        self._dept_index[department] = len(self.departments)
+        self.departments.append(department)
+        self.observed = np.vstack([self.observed, np.zeros((1, self.observed.shape[1]), dtype=self.observed.dtype)])
+        self.expected = np.vstack([self.expected, np.zeros((1, self.horizon_days))])
+        self.baseline = np.vstack([self.baseline, np.zeros((1, self.horizon_days))])
+
+    # Queries
+    def forecast(self, department: Optional[str] = None) -> Dict[str, Any]:
+        """Forecast for one department, or for all of them"""
+        self._refresh()
+        with self._lock:
+            self._apply_events()
+            if department is not None:
+                if department not in self._dept_index:
+                    raise KeyError(department)
+                return self._format(self._dept_index[department])
+            return {
+                "generated_at": self.trained_at.isoformat() if self.trained_at else None,
+                "horizon_days": self.horizon_days,
+                "departments": {name: self._format(i) for i, name in enumerate(self.departments)},
+            }
+
+    def expected_absences(self, department: str) -> Tuple[int, np.ndarray]:
+        """(first day ordinal, expected absences per day) over the horizon"""
+        self._refresh()
+        with self._lock:
+            self._apply_events()
+            if department not in self._dept_index:
+                raise KeyError(department)
+            return self.today, self.expected[self._dept_index[department]].copy()
+
+    def _format(self, idx: int) -> Dict[str, Any]:
+        expected = self.expected[idx]
+        known = self.observed[idx, self.history_days:self.history_days + self.horizon_days]
+        combined = np.maximum(expected, known)
+        threshold = combined.mean() + PEAK_SIGMA * combined.std()
+        peaks = combined > threshold if combined.std() > 0 else np.zeros_like(combined, dtype=bool)
+        days = [
+            {
+                "date": date.fromordinal(self.today + offset).isoformat(),
+                "expected_absences": round(float(combined[offset]), 2),
+                "baseline": round(float(self.baseline[idx, offset]), 2),
+                "known_absences": int(known[offset]),
+                "is_peak": bool(peaks[offset]),
+            }
+            for offset in range(self.horizon_days)
+        ]
+        return {
+            "department": self.departments[idx],
+            "model": "seasonal_baseline+gradient_boosting" if self.model.residual_model is not None
+                     else "seasonal_baseline",
+            "days": days,
+            "peaks": [day["date"] for day in days if day["is_peak"]],
+        }
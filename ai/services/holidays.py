@@ -0,0 +1,25 @@
+"""
+Working-day masks for the AI services
+
+The holiday calendar is passed in by the caller: the backend charges leave
+with ``app.services.holidays`` and hands the same dates to suggestions, so
+a window of N working days costs N days. This module stays free of any
+backend import.
+"""
+
+from datetime import date
+from typing import Iterable
+
+import numpy as np
+
+
+def workday_mask(origin: int, n_days: int, holidays: Iterable[date] = ()) -> np.ndarray:
+    """Boolean array, True for working days in [origin, origin + n_days)
+
+    Weekends are always off; ``holidays`` outside the range are ignored.
+    """
+    ordinals = np.arange(origin, origin + n_days, dtype=np.int64)
+    mask = (ordinals - 1) % 7 < 5
+    off = [d.toordinal() - origin for d in holidays if 0 <= d.toordinal() - origin < n_days]
+    mask[np.asarray(off, dtype=np.int64)] = False
+    return mask
@@ -0,0 +1,158 @@
+"""
+Vacation date recommendations
+
+Every candidate window of N working days in the search range is scored
+at once. Working days are re-indexed so a window is a contiguous run of
+N entries; team load per window is then a box convolution and the peak a
+sliding maximum, and the days off gained from adjacent weekends and
+holidays ("puentes") come from the neighbouring working days. Ranking a
+year of candidates is a few NumPy calls.
+"""
+
+from datetime import date
+from typing import Any, Dict, Iterable, List
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .holidays import workday_mask
+
+COVERAGE_WEIGHT = 0.6
+EFFICIENCY_WEIGHT = 0.4
+
+SCORED_FIELDS = ("start", "end", "off_start", "off_end", "peak", "mean", "coverage", "score")
+
+
+def score_windows(
+    workdays: np.ndarray,
+    team_absences: np.ndarray,
+    own_busy: np.ndarray,
+    team_size: int,
+    days: int,
+    earliest: int,
+    latest: int,
+    coverage_weight: float = COVERAGE_WEIGHT,
+    efficiency_weight: float = EFFICIENCY_WEIGHT,
+) -> Dict[str, np.ndarray]:
+    """Score windows of ``days`` working days starting in [earliest, latest]
+
+    All arrays are indexed by day offset from a common origin. ``team_absences``
+    counts (or forecasts) absent colleagues, ``own_busy`` marks days already
+    covered by the user's own requests. Returns parallel arrays for the valid
+    candidates only.
+    """
+    wd = np.flatnonzero(workdays)
+    n = len(wd) - days
+    if days <= 0 or n < 1:
+        return {key: np.zeros(0) for key in SCORED_FIELDS}
+
+    # Window i covers working days wd[i .. i + days - 1]; it needs a following
+    # working day to know where the time off ends
+    load = team_absences[wd].astype(np.float64)
+    total = np.convolve(load, np.ones(days), mode="valid")[:n]
+    peak = sliding_window_view(load, days).max(axis=1)[:n]
+
+    idx = np.arange(n)
+    start = wd[idx]
+    end = wd[idx + days - 1]
+    off_start = np.where(idx > 0, wd[np.maximum(idx - 1, 0)] + 1, start)
+    off_end = wd[idx + days] - 1
+
+    busy_prefix = np.concatenate(([0], np.cumsum(own_busy, dtype=np.int64)))
+    busy = busy_prefix[end + 1] - busy_prefix[start] > 0
+    keep = (start >= earliest) & (start <= latest) & ~busy
+
+    # Share of the rest of the team still working, blending worst and average day
+    mean = total / days
+    others = max(team_size - 1, 0)
+    coverage = 1 - np.clip((0.5 * peak + 0.5 * mean) / others, 0, 1) if others else np.ones(n)
+    efficiency = (off_end - off_start + 1) / days
+    best = efficiency[keep].max() if keep.any() else 1.0
+    efficiency_score = (efficiency - 1) / (best - 1) if best > 1 else np.zeros(n)
+
+    score = coverage_weight * coverage + efficiency_weight * efficiency_score
+    return {
+        "start": start[keep],
+        "end": end[keep],
+        "off_start": off_start[keep],
+        "off_end": off_end[keep],
+        "peak": peak[keep],
+        "mean": mean[keep],
+        "coverage": coverage[keep],
+        "score": score[keep],
+    }
+
+
+def rank_windows(scored: Dict[str, np.ndarray], limit: int) -> List[int]:
+    """Indexes of the best windows whose time off does not overlap"""
+    chosen: List[int] = []
+    taken: List[tuple] = []
+    for i in np.argsort(-scored["score"], kind="stable"):
+        lo, hi = scored["off_start"][i], scored["off_end"][i]
+        if any(lo <= t_hi and t_lo <= hi for t_lo, t_hi in taken):
+            continue
+        chosen.append(int(i))
+        taken.append((lo, hi))
+        if len(chosen) >= limit:
+            break
+    return chosen
+
+
+def search_days(today: date, latest: date, days: int) -> int:
+    """Days from ``today`` that windows starting by ``latest`` may span
+
+    Leaves room for the longest possible window (a few weeks of holidays
+    and weekends).
+    """
+    return latest.toordinal() - today.toordinal() + 2 * days + 31
+
+
+def suggest_dates(
+    today: date,
+    days: int,
+    earliest: date,
+    latest: date,
+    team_absences: np.ndarray,
+    own_busy: np.ndarray,
+    team_size: int,
+    limit: int = 5,
+    holidays: Iterable[date] = (),
+) -> List[Dict[str, Any]]:
+    """Best vacation windows of ``days`` working days, starting between earliest and latest
+
+    ``team_absences`` and ``own_busy`` are indexed from ``today`` and must
+    cover at least up to ``latest`` plus the window; shorter arrays are
+    zero-padded. ``holidays`` are the public holidays of that span (see
+    ``search_days`` for its length).
+    """
+    origin = today.toordinal()
+    n_days = search_days(today, latest, days)
+    holidays = sorted(set(holidays))
+    workdays = workday_mask(origin, n_days, holidays)
+    team = np.zeros(n_days)
+    team[:min(len(team_absences), n_days)] = team_absences[:n_days]
+    busy = np.zeros(n_days, dtype=bool)
+    busy[:min(len(own_busy), n_days)] = own_busy[:n_days]
+
+    scored = score_windows(
+        workdays, team, busy, team_size, days,
+        earliest.toordinal() - origin, latest.toordinal() - origin,
+    )
+    suggestions = []
+    for i in rank_windows(scored, limit):
+        off_start = date.fromordinal(origin + int(scored["off_start"][i]))
+        off_end = date.fromordinal(origin + int(scored["off_end"][i]))
+        suggestions.append({
+            "start_date": date.fromordinal(origin + int(scored["start"][i])).isoformat(),
+            "end_date": date.fromordinal(origin + int(scored["end"][i])).isoformat(),
+            "working_days": days,
+            "time_off_start": off_start.isoformat(),
+            "time_off_end": off_end.isoformat(),
+            "calendar_days_off": (off_end - off_start).days + 1,
+            "holidays": [d.isoformat() for d in holidays if off_start <= d <= off_end],
+            "team_absences_peak": round(float(scored["peak"][i]), 2),
+            "team_absences_mean": round(float(scored["mean"][i]), 2),
+            "coverage_score": round(float(scored["coverage"][i]), 3),
+            "score": round(float(scored["score"][i]), 3),
+        })
+    return suggestions
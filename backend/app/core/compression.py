@@ -0,0 +1,260 @@
+"""
+Response compression (Brotli or gzip, negotiated per request)
+
+Text-like responses of at least ``minimum_size`` bytes are compressed with
+the encoding the client weights highest in Accept-Encoding (q-values,
+``*`` and ``identity;q=0`` included) among Brotli, when the optional
+``brotli`` package is installed, and gzip; ties go to Brotli. Every
+text-like response carries ``Vary: Accept-Encoding``, compressed or not,
+so caches never hand a compressed body to a client that can't read it.
+Complete bodies are compressed in one
+go and the result is cached by body digest, so a hot payload served many
+times (coalesced calendar queries, idempotent replays) is compressed once.
+Streaming responses are compressed chunk by chunk with a sync flush, so
+each chunk still reaches the client as soon as it is produced.
+"""
+
+import hashlib
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Optional, Dict, List, Tuple
+
+from app.core.config import get_settings
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    b"text/",
+    b"application/json",
+    b"application/x-ndjson",
+    b"application/javascript",
+    b"application/xml",
+    b"image/svg+xml",
+)
+
+
+def _accepted_encodings(header: bytes) -> Dict[str, float]:
+    accepted = {}
+    for item in header.decode("latin-1").split(","):
+        name, *params = item.split(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params:
+            key, _, value = param.strip().partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = min(max(float(value), 0.0), 1.0)
+                except ValueError:
+                    quality = 0.0
+        accepted["gzip" if name == "x-gzip" else name] = quality
+    return accepted
+
+
+def negotiate(accepted: Dict[str, float], supported: Tuple[str, ...]) -> Tuple[Optional[str], bool]:
+    """(coding to use or None, whether an uncompressed response is acceptable)
+
+    ``supported`` is in order of preference for equal weights. A coding
+    the client doesn't name takes the ``*`` weight (0 without ``*``);
+    identity is acceptable unless excluded by name or by ``*;q=0``, and
+    only competes with the codings when it is weighted explicitly.
+    """
+    wildcard = accepted.get("*")
+    best, best_quality = None, 0.0
+    for coding in supported:
+        quality = accepted.get(coding, wildcard or 0.0)
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    identity = accepted.get("identity", wildcard)
+    if identity is not None and identity > best_quality:
+        best = None
+    return best, identity is None or identity > 0
+
+
+def _with_vary(headers: List[Tuple[bytes, bytes]]) -> List[Tuple[bytes, bytes]]:
+    """Add Accept-Encoding to the response's Vary header"""
+    for i, (name, value) in enumerate(headers):
+        if name == b"vary":
+            fields = {field.strip().lower() for field in value.split(b",")}
+            if b"*" in fields or b"accept-encoding" in fields:
+                return headers
+            return headers[:i] + [(b"vary", value + b", Accept-Encoding")] + headers[i + 1:]
+    return headers + [(b"vary", b"Accept-Encoding")]
+
+
+class CompressionCache:
+    """LRU of compressed bodies keyed by (body digest, encoding)"""
+
+    def __init__(self, max_entries: int = 256, max_entry_bytes: int = 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_entry_bytes = max_entry_bytes
+        self._entries: "OrderedDict[Tuple[bytes, str], bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple[bytes, str]) -> Optional[bytes]:
+        with self._lock:
+            compressed = self._entries.get(key)
+            if compressed is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return compressed
+
+    def put(self, key: Tuple[bytes, str], compressed: bytes) -> None:
+        if not self.max_entries or len(compressed) > self.max_entry_bytes:
+            return
+        with self._lock:
+            self._entries[key] = compressed
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+COMPRESSION_CACHE = CompressionCache(get_settings().COMPRESSION_CACHE_ENTRIES)
+
+
+class _StreamCompressor:
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+            self._zlib = None
+        else:
+            self._brotli = None
+            # wbits=31: gzip container
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        if self._brotli is not None:
+            return self._brotli.process(data) + self._brotli.flush()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self._brotli is not None:
+            return self._brotli.finish()
+        return self._zlib.flush(zlib.Z_FINISH)
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing text responses above a size threshold"""
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 5,
+                 cache: Optional[CompressionCache] = COMPRESSION_CACHE):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.cache = cache
+
+    def _choose(self, scope) -> Tuple[Optional[str], bool]:
+        supported = ("br", "gzip") if brotli is not None else ("gzip",)
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                return negotiate(_accepted_encodings(value), supported)
+        return None, True
+
+    def _compress(self, body: bytes, encoding: str) -> bytes:
+        key = (hashlib.blake2b(body, digest_size=16).digest(), encoding)
+        if self.cache is not None:
+            compressed = self.cache.get(key)
+            if compressed is not None:
+                return compressed
+        if encoding == "br":
+            compressed = brotli.compress(body, quality=self.brotli_quality)
+        else:
+            compressor = zlib.compressobj(self.gzip_level, zlib.DEFLATED, 31)
+            compressed = compressor.compress(body) + compressor.flush()
+        if self.cache is not None:
+            self.cache.put(key, compressed)
+        return compressed
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        encoding, identity_ok = self._choose(scope)
+        # A client refusing identity gets even small bodies compressed
+        minimum_size = self.minimum_size if identity_ok else 0
+
+        start = None
+        headers: List[Tuple[bytes, bytes]] = []
+        pending: List[bytes] = []
+        pending_size = 0
+        compressor: Optional[_StreamCompressor] = None
+        passthrough = False
+
+        def compressed_headers(length: Optional[int]) -> List[Tuple[bytes, bytes]]:
+            result = [(k, v) for k, v in headers if k != b"content-length"]
+            result.append((b"content-encoding", encoding.encode()))
+            if length is not None:
+                result.append((b"content-length", str(length).encode()))
+            return result
+
+        async def compressing_send(message):
+            nonlocal start, headers, pending_size, compressor, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                headers = list(message.get("headers", []))
+                content_type = b""
+                for name, value in headers:
+                    if name == b"content-encoding":
+                        passthrough = True
+                    elif name == b"content-type":
+                        content_type = value
+                if not content_type.startswith(COMPRESSIBLE_TYPES):
+                    passthrough = True
+                if passthrough:
+                    await send(message)
+                    return
+                # Compressible: the representation depends on Accept-Encoding
+                headers = _with_vary(headers)
+                start = dict(message, headers=headers)
+                if encoding is None:
+                    passthrough = True
+                    await send(start)
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is not None:
+                data = compressor.chunk(body) if body else b""
+                if not more_body:
+                    data += compressor.finish()
+                await send({"type": "http.response.body", "body": data, "more_body": more_body})
+                return
+
+            pending.append(body)
+            pending_size += len(body)
+            if not more_body:
+                # Complete body: compress (or reuse the cached result) in one go
+                full = b"".join(pending)
+                if pending_size < minimum_size:
+                    await send(start)
+                    await send({"type": "http.response.body", "body": full})
+                    return
+                compressed = self._compress(full, encoding)
+                await send(dict(start, headers=compressed_headers(len(compressed))))
+                await send({"type": "http.response.body", "body": compressed})
+                return
+            if pending_size >= minimum_size:
+                # Streaming and big enough: switch to chunked compression
+                compressor = _StreamCompressor(encoding, self.gzip_level, self.brotli_quality)
+                await send(dict(start, headers=compressed_headers(None)))
+                data = compressor.chunk(b"".join(pending))
+                pending.clear()
+                await send({"type": "http.response.body", "body": data, "more_body": True})
+
+        await self.app(scope, receive, compressing_send)
@@ -0,0 +1,272 @@
+"""
+Idempotency-Key support for unsafe requests
+
+A POST/PUT/PATCH/DELETE carrying an ``Idempotency-Key`` header is executed
+at most once per key: the response is kept in a bounded LRU with a TTL and
+retries get the stored status, headers and body back (plus
+``Idempotent-Replayed: true``) without running the endpoint again. A
+duplicate that arrives while the first attempt is still running waits for
+it instead of executing in parallel.
+
+Keys are scoped by caller (Authorization header), method and path, and
+bound to a SHA-256 fingerprint of the query string and request body:
+reusing a key for a different request is rejected with 422. Keyed request
+bodies are buffered to fingerprint them, up to a size cap (413 above it).
+Server errors (5xx) and failed
+attempts are not stored, so the client can retry them. In shared mode the
+completed responses are also written to RUN_DIR so a retry that lands on
+another worker is replayed too.
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import random
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, List, Tuple
+
+from app.core.config import get_settings
+
+IDEMPOTENCY_HEADER = b"idempotency-key"
+UNSAFE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+MAX_KEY_LENGTH = 255
+
+
+class StoredResponse:
+    """A completed response kept for replay"""
+
+    __slots__ = ("fingerprint", "status", "headers", "body", "expires_at")
+
+    def __init__(self, fingerprint: str, status: int, headers: List[Tuple[bytes, bytes]], body: bytes,
+                 expires_at: float):
+        self.fingerprint = fingerprint
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.expires_at = expires_at
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "fingerprint": self.fingerprint,
+            "status": self.status,
+            "headers": [[k.decode("latin-1"), v.decode("latin-1")] for k, v in self.headers],
+            "body": base64.b64encode(self.body).decode(),
+            "expires_at": self.expires_at,
+        })
+
+    @classmethod
+    def from_json(cls, data: str) -> "StoredResponse":
+        raw = json.loads(data)
+        return cls(
+            raw["fingerprint"],
+            raw["status"],
+            [(k.encode("latin-1"), v.encode("latin-1")) for k, v in raw["headers"]],
+            base64.b64decode(raw["body"]),
+            raw["expires_at"],
+        )
+
+
+class IdempotencyStore:
+    """TTL-expiring LRU of completed responses plus in-flight executions"""
+
+    def __init__(self, ttl: float = 86400, max_keys: int = 10000, shared_dir: Optional[str] = None):
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self.shared_dir = shared_dir
+        self._responses: "OrderedDict[str, StoredResponse]" = OrderedDict()
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self.replayed = 0
+        self.coalesced = 0
+        if shared_dir:
+            self.share(shared_dir)
+
+    def share(self, directory: str) -> None:
+        """Also keep completed responses in ``directory`` for the other workers"""
+        os.makedirs(directory, exist_ok=True)
+        self.shared_dir = directory
+
+    def _shared_path(self, key: str) -> str:
+        return os.path.join(self.shared_dir, hashlib.sha256(key.encode()).hexdigest() + ".json")
+
+    def get(self, key: str) -> Optional[StoredResponse]:
+        stored = self._responses.get(key)
+        if stored is None and self.shared_dir:
+            try:
+                with open(self._shared_path(key), encoding="utf-8") as f:
+                    stored = StoredResponse.from_json(f.read())
+            except (OSError, ValueError):
+                stored = None
+            if stored is not None:
+                self._remember(key, stored)
+        if stored is None:
+            return None
+        if stored.expires_at < time.time():
+            self._responses.pop(key, None)
+            return None
+        self._responses.move_to_end(key)
+        return stored
+
+    def _remember(self, key: str, stored: StoredResponse) -> None:
+        self._responses[key] = stored
+        self._responses.move_to_end(key)
+        while len(self._responses) > self.max_keys:
+            self._responses.popitem(last=False)
+
+    def put(self, key: str, fingerprint: str, status: int, headers: List[Tuple[bytes, bytes]],
+            body: bytes) -> None:
+        stored = StoredResponse(fingerprint, status, headers, body, time.time() + self.ttl)
+        self._remember(key, stored)
+        if self.shared_dir:
+            path = self._shared_path(key)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(stored.to_json())
+            os.replace(tmp, path)
+            if random.random() < 0.01:
+                self._sweep_shared()
+
+    def _sweep_shared(self) -> None:
+        # Expired entries of every worker; mtime + ttl is the expiry
+        cutoff = time.time() - self.ttl
+        for name in os.listdir(self.shared_dir):
+            path = os.path.join(self.shared_dir, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.unlink(path)
+            except OSError:
+                continue
+
+    def begin(self, key: str) -> Optional[asyncio.Future]:
+        """Claim ``key``; returns the running attempt's future if already claimed"""
+        running = self._in_flight.get(key)
+        if running is not None:
+            return running
+        self._in_flight[key] = asyncio.get_running_loop().create_future()
+        return None
+
+    def end(self, key: str) -> None:
+        future = self._in_flight.pop(key, None)
+        if future is not None and not future.done():
+            future.set_result(None)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "keys": len(self._responses),
+            "in_flight": len(self._in_flight),
+            "replayed": self.replayed,
+            "coalesced": self.coalesced,
+        }
+
+
+IDEMPOTENCY = IdempotencyStore(get_settings().IDEMPOTENCY_TTL_SECONDS, get_settings().IDEMPOTENCY_MAX_KEYS)
+
+
+async def _send_json(send, status: int, detail: str) -> None:
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class IdempotencyMiddleware:
+    """ASGI middleware replaying responses of requests with a known Idempotency-Key"""
+
+    def __init__(self, app, store: IdempotencyStore = IDEMPOTENCY, max_body_bytes: int = 1024 * 1024,
+                 max_request_bytes: int = 1024 * 1024):
+        self.app = app
+        self.store = store
+        # Largest response stored for replay / request body buffered
+        self.max_body_bytes = max_body_bytes
+        self.max_request_bytes = max_request_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in UNSAFE_METHODS:
+            return await self.app(scope, receive, send)
+        idempotency_key = authorization = None
+        for name, value in scope["headers"]:
+            if name == IDEMPOTENCY_HEADER:
+                idempotency_key = value
+            elif name == b"authorization":
+                authorization = value
+        if idempotency_key is None:
+            return await self.app(scope, receive, send)
+        if not idempotency_key or len(idempotency_key) > MAX_KEY_LENGTH:
+            return await _send_json(send, 400, "Invalid Idempotency-Key header")
+
+        caller = hashlib.sha256(authorization).hexdigest() if authorization else "anonymous"
+        key = f"{caller} {scope['method']} {scope['path']} {idempotency_key.decode('latin-1')}"
+
+        # The body is needed up front to tell a retry from a reused key
+        chunks = []
+        received = 0
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            chunks.append(message.get("body", b""))
+            received += len(chunks[-1])
+            if received > self.max_request_bytes:
+                return await _send_json(send, 413, "Request body too large for an Idempotency-Key request")
+            more_body = message.get("more_body", False)
+        body = b"".join(chunks)
+        # The query string is part of the request: it can't vary under one key
+        # (it never contains a raw NUL, so the separator is unambiguous)
+        fingerprint = hashlib.sha256(scope.get("query_string", b"") + b"\0" + body).hexdigest()
+
+        while True:
+            stored = self.store.get(key)
+            if stored is not None:
+                if stored.fingerprint != fingerprint:
+                    return await _send_json(send, 422, "Idempotency-Key was already used with a different request")
+                self.store.replayed += 1
+                await send({
+                    "type": "http.response.start",
+                    "status": stored.status,
+                    "headers": stored.headers + [(b"idempotent-replayed", b"true")],
+                })
+                await send({"type": "http.response.body", "body": stored.body})
+                return
+            running = self.store.begin(key)
+            if running is None:
+                break
+            # Same key already executing: wait for it, then replay its result
+            # (or execute ourselves if it did not produce a storable one)
+            self.store.coalesced += 1
+            await asyncio.shield(running)
+
+        body_sent = False
+
+        async def replay_receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        start = None
+        response_chunks: List[bytes] = []
+        size = 0
+
+        async def capture_send(message):
+            nonlocal start, size
+            if message["type"] == "http.response.start":
+                start = message
+            elif message["type"] == "http.response.body" and size <= self.max_body_bytes:
+                response_chunks.append(message.get("body", b""))
+                size += len(response_chunks[-1])
+            await send(message)
+
+        try:
+            await self.app(scope, replay_receive, capture_send)
+            if start is not None and start["status"] < 500 and size <= self.max_body_bytes:
+                self.store.put(key, fingerprint, start["status"], list(start.get("headers", [])),
+                               b"".join(response_chunks))
+        finally:
+            self.store.end(key)
@@ -0,0 +1,238 @@
+"""
+Opt-in per-request sampling profiler
+
+A profiled request gets a sampler thread that snapshots the stacks of the
+event loop thread and of any busy worker thread (``run_in_threadpool``
+work) every millisecond by default. Samples are folded into collapsed
+stacks ("frame;frame;frame count"), the input format of flamegraph.pl and
+speedscope, and the last N profiles are kept in a ring buffer.
+
+The middleware is only installed when PROFILING_ENABLED is set. A request
+is profiled when it carries a valid ``X-Profile`` header or falls within
+PROFILING_SAMPLE_RATE; the response then carries ``X-Profile-Id``.
+Concurrent requests on the same event loop show up in each other's
+profiles, so profile under light load.
+"""
+
+import html
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from datetime import datetime
+from typing import Optional, List, Dict, Any
+
+from app.core.config import get_settings
+
+PROFILE_HEADER = b"x-profile"
+
+# Leaf functions of threads that are parked rather than working
+IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+}
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _is_idle(frame) -> bool:
+    return (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in IDLE_LEAVES
+
+
+class Profile:
+    """Folded stack samples of one request
+
+    ``stacks`` and ``samples`` are filled in when its sampler stops, so a
+    profile is only complete (and only readable) once it is in the store.
+    """
+
+    def __init__(self, method: str, path: str, interval: float):
+        self.id = uuid.uuid4().hex[:12]
+        self.method = method
+        self.path = path
+        self.interval = interval
+        self.started_at = datetime.utcnow()
+        self.status: Optional[int] = None
+        self.duration_ms = 0.0
+        self.samples = 0
+        self.stacks: Counter = Counter()
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round(self.duration_ms, 3),
+            "samples": self.samples,
+            "interval_ms": self.interval * 1000
+        }
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's folded format, one stack per line"""
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common()) + "\n"
+
+    def to_html(self) -> str:
+        """Self-contained call tree (inclusive sample counts), heaviest first"""
+        tree: Dict[str, Any] = {}
+        for stack, count in self.stacks.items():
+            node = tree
+            for frame in stack.split(";"):
+                child = node.setdefault(frame, {"count": 0, "children": {}})
+                child["count"] += count
+                node = child["children"]
+
+        total = max(self.samples, 1)
+
+        def render(children: Dict[str, Any]) -> str:
+            items = []
+            for name, child in sorted(children.items(), key=lambda item: -item[1]["count"]):
+                share = 100.0 * child["count"] / total
+                label = f"{share:5.1f}% ({child['count']}) {html.escape(name)}"
+                if child["children"]:
+                    open_attr = " open" if share >= 5 else ""
+                    items.append(f"<li><details{open_attr}><summary>{label}</summary>"
+                                 f"<ul>{render(child['children'])}</ul></details></li>")
+                else:
+                    items.append(f"<li>{label}</li>")
+            return "".join(items)
+
+        title = html.escape(f"{self.method} {self.path}")
+        return (
+            "<!doctype html><html><head><meta charset='utf-8'>"
+            f"<title>Profile {self.id}</title>"
+            "<style>body{font-family:monospace}ul{list-style:none;padding-left:1.2em}</style>"
+            f"</head><body><h3>{title} &mdash; {self.duration_ms:.1f} ms, {self.samples} samples "
+            f"every {self.interval * 1000:g} ms</h3><ul>{render(tree)}</ul></body></html>"
+        )
+
+
+class ProfileStore:
+    """Ring buffer of the most recent profiles"""
+
+    def __init__(self, max_profiles: int = 50):
+        self._profiles: deque = deque(maxlen=max_profiles)
+        self._lock = threading.Lock()
+
+    def add(self, profile: Profile) -> None:
+        with self._lock:
+            self._profiles.append(profile)
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [profile.summary() for profile in reversed(self._profiles)]
+
+    def get(self, profile_id: str) -> Optional[Profile]:
+        with self._lock:
+            return next((p for p in self._profiles if p.id == profile_id), None)
+
+
+PROFILES = ProfileStore(get_settings().PROFILING_MAX_PROFILES)
+
+_switch_lock = threading.Lock()
+_active_samplers = 0
+_default_switch_interval = sys.getswitchinterval()
+
+
+class _Sampler(threading.Thread):
+    def __init__(self, profile: Profile, loop_thread: int):
+        super().__init__(name="request-profiler", daemon=True)
+        self.profile = profile
+        self.loop_thread = loop_thread
+        self.stopped = threading.Event()
+        # Written by this thread only; handed to the profile in stop()
+        self.stacks: Counter = Counter()
+        self.samples = 0
+
+    def start(self) -> None:
+        global _active_samplers
+        # The sampler can only run when it gets the GIL: hand it over at
+        # least as often as we sample while any profile is being captured
+        with _switch_lock:
+            _active_samplers += 1
+            sys.setswitchinterval(min(_default_switch_interval, self.profile.interval / 2))
+        super().start()
+
+    def stop(self) -> None:
+        global _active_samplers
+        self.stopped.set()
+        self.join()
+        self.profile.stacks, self.profile.samples = self.stacks, self.samples
+        with _switch_lock:
+            _active_samplers -= 1
+            if not _active_samplers:
+                sys.setswitchinterval(_default_switch_interval)
+
+    def run(self) -> None:
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        while not self.stopped.wait(self.profile.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own or (thread_id != self.loop_thread and _is_idle(frame)):
+                    continue
+                if thread_id not in names:
+                    # A worker thread started after the previous sample
+                    names = {thread.ident: thread.name for thread in threading.enumerate()}
+                    names.setdefault(thread_id, str(thread_id))
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names[thread_id])
+                self.stacks[";".join(reversed(stack))] += 1
+                self.samples += 1
+
+
+class ProfilingMiddleware:
+    """ASGI middleware capturing a sampled profile of selected requests"""
+
+    def __init__(self, app, store: ProfileStore = PROFILES, sample_rate: float = 0.0,
+                 token: Optional[str] = None, allow_any_token: bool = False,
+                 interval: float = 0.001):
+        self.app = app
+        self.store = store
+        self.sample_rate = sample_rate
+        self.token = token.encode() if token else None
+        self.allow_any_token = allow_any_token
+        self.interval = interval
+
+    def _requested(self, scope) -> bool:
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER:
+                return self.allow_any_token or (self.token is not None and value == self.token)
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not (
+            (self.sample_rate and random.random() < self.sample_rate) or self._requested(scope)
+        ):
+            return await self.app(scope, receive, send)
+
+        profile = Profile(scope["method"], scope["path"], self.interval)
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                message = dict(message, headers=list(message.get("headers", [])) + [
+                    (b"x-profile-id", profile.id.encode())
+                ])
+            await send(message)
+
+        sampler = _Sampler(profile, threading.get_ident())
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            sampler.stop()
+            profile.duration_ms = (time.perf_counter() - started) * 1000
+            self.store.add(profile)
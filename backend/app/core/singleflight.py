@@ -0,0 +1,46 @@
+"""
+Single-flight execution of identical read queries
+
+When several requests ask for the same thing at the same time (every
+manager opening the dashboard at 8 a.m.), only the first one computes it:
+the others await the same task and get the same result object. The work
+runs in the threadpool as its own task, so a client disconnecting does not
+cancel it for the requests still waiting. Nothing is cached once the task
+finishes; this only removes duplicated concurrent work.
+"""
+
+import asyncio
+from typing import Dict, Hashable, Callable, Any
+
+from fastapi.concurrency import run_in_threadpool
+
+
+class SingleFlight:
+    """Shares one in-flight computation between callers with the same key"""
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    async def run(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Result of ``fn(*args, **kwargs)``, computed once for concurrent callers of ``key``"""
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(run_in_threadpool(fn, *args, **kwargs))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+            self.executed += 1
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._in_flight),
+        }
+
+
+QUERIES = SingleFlight()
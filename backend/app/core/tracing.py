@@ -0,0 +1,424 @@
+"""
+Lightweight request tracing
+
+Spans follow the OpenTelemetry data model (128-bit trace ids, 64-bit span
+ids, unix-nano timestamps, W3C ``traceparent`` propagation) and are
+exported as OTLP/JSON, one ``ExportTraceServiceRequest`` per line, to a
+local file or stdout, so the OpenTelemetry Collector's otlpjsonfile
+receiver (or ``jq``) can read them without a live backend.
+
+The current span lives in a ContextVar, so it follows the request across
+``await`` and into ``run_in_threadpool``. Sampling is decided once per
+request; code that calls ``span()`` outside a sampled request only pays
+for one ContextVar lookup. The slowest N traces of each route are kept in
+memory for ``/api/v1/admin/traces``.
+"""
+
+import functools
+import heapq
+import itertools
+import json
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional, List, Dict, Any, Iterator, Callable
+
+from fastapi.responses import JSONResponse
+
+from app.core.config import get_settings
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+STATUS_UNSET = 0
+STATUS_ERROR = 2
+
+# Per-request cap: a lookup inside a loop over every request must not turn
+# one trace into an unbounded list
+MAX_SPANS_PER_TRACE = 1000
+
+
+class Span:
+    """One timed operation of a trace"""
+
+    __slots__ = ("trace", "span_id", "parent_id", "name", "kind", "start_ns", "end_ns",
+                 "attributes", "status", "_start_perf")
+
+    def __init__(self, trace: "Trace", name: str, parent_id: Optional[str], kind: int = SPAN_KIND_INTERNAL,
+                 attributes: Optional[Dict[str, Any]] = None):
+        self.trace = trace
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes or {}
+        self.status = STATUS_UNSET
+        self.start_ns = time.time_ns()
+        self._start_perf = time.perf_counter_ns()
+        self.end_ns = 0
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def end(self) -> None:
+        # Monotonic duration, anchored on the wall-clock start
+        self.end_ns = self.start_ns + (time.perf_counter_ns() - self._start_perf)
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def to_otlp(self) -> Dict[str, Any]:
+        return {
+            "traceId": self.trace.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id or "",
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_otlp_attribute(k, v) for k, v in self.attributes.items()],
+            "status": {"code": self.status},
+        }
+
+
+class Trace:
+    """Spans of one sampled request"""
+
+    def __init__(self, trace_id: Optional[str] = None):
+        self.trace_id = trace_id or os.urandom(16).hex()
+        self.spans: List[Span] = []
+        self.root: Optional[Span] = None
+        self.dropped_spans = 0
+        self._lock = threading.Lock()
+
+    def start_span(self, name: str, parent_id: Optional[str], **kwargs) -> Optional[Span]:
+        # Threadpool work may add spans concurrently with the event loop
+        with self._lock:
+            if len(self.spans) >= MAX_SPANS_PER_TRACE:
+                self.dropped_spans += 1
+                return None
+            span = Span(self, name, parent_id, **kwargs)
+            self.spans.append(span)
+        return span
+
+    def summary(self) -> Dict[str, Any]:
+        root = self.root
+        return {
+            "trace_id": self.trace_id,
+            "name": root.name,
+            "route": root.attributes.get("http.route"),
+            "status_code": root.attributes.get("http.status_code"),
+            "duration_ms": round(root.duration_ms, 3),
+            "start_time": root.start_ns,
+            "spans": len(self.spans),
+            "dropped_spans": self.dropped_spans,
+        }
+
+    def breakdown(self) -> List[Dict[str, Any]]:
+        """Spans in start order with their depth, for quick reading"""
+        depth = {self.root.span_id: 0}
+        rows = []
+        for span in sorted(self.spans, key=lambda s: s.start_ns):
+            level = depth.get(span.parent_id, -1) + 1 if span is not self.root else 0
+            depth[span.span_id] = level
+            rows.append({
+                "name": span.name,
+                "depth": level,
+                "span_id": span.span_id,
+                "parent_span_id": span.parent_id,
+                "offset_ms": round((span.start_ns - self.root.start_ns) / 1e6, 3),
+                "duration_ms": round(span.duration_ms, 3),
+                "attributes": span.attributes,
+            })
+        return rows
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Optional[Span]]:
+    """Child span of the current one; a no-op outside a sampled request"""
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+    child = parent.trace.start_span(name, parent.span_id, attributes=attributes)
+    if child is None:
+        yield None
+        return
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException:
+        child.status = STATUS_ERROR
+        raise
+    finally:
+        child.end()
+        _current_span.reset(token)
+
+
+def traced(name: str) -> Callable:
+    """Decorator form of ``span`` for plain functions"""
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _current_span.get() is None:
+                return fn(*args, **kwargs)
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class TracedJSONResponse(JSONResponse):
+    """JSONResponse that times its own encoding"""
+
+    def render(self, content: Any) -> bytes:
+        if _current_span.get() is None:
+            return super().render(content)
+        with span("json.render") as current:
+            body = super().render(content)
+            if current is not None:
+                current.set_attribute("http.response_content_length", len(body))
+            return body
+
+
+def instrument_fastapi() -> None:
+    """Time FastAPI's own request stages for sampled requests
+
+    ``solve_dependencies`` covers body parsing into the request models and
+    dependency resolution; ``serialize_response`` covers response model
+    validation and ``jsonable_encoder``. Both are looked up as module
+    globals by the route handler, so wrapping them here is enough.
+    """
+    import fastapi.routing as routing
+
+    if getattr(routing.serialize_response, "__traced__", False):
+        return
+    original_solve = routing.solve_dependencies
+    original_serialize = routing.serialize_response
+
+    async def solve_dependencies(*args, **kwargs):
+        if _current_span.get() is None:
+            return await original_solve(*args, **kwargs)
+        with span("fastapi.dependencies"):
+            return await original_solve(*args, **kwargs)
+
+    async def serialize_response(*args, **kwargs):
+        if _current_span.get() is None:
+            return await original_serialize(*args, **kwargs)
+        field = kwargs.get("field")
+        with span("pydantic.serialize_response", model=str(getattr(field, "type_", None) or "none")):
+            return await original_serialize(*args, **kwargs)
+
+    serialize_response.__traced__ = True
+    routing.solve_dependencies = solve_dependencies
+    routing.serialize_response = serialize_response
+
+
+# Export
+class TraceExporter:
+    """Writes finished traces as OTLP/JSON lines from a background thread"""
+
+    def __init__(self, target: str, service_name: str):
+        self.target = target
+        self.resource = {"attributes": [_otlp_attribute("service.name", service_name)]}
+        self._queue: "queue.Queue[Optional[Trace]]" = queue.Queue(maxsize=10000)
+        self._thread: Optional[threading.Thread] = None
+        self.dropped = 0
+
+    def export(self, trace: Trace) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+            self._thread.start()
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+
+    def _line(self, trace: Trace) -> str:
+        return json.dumps({
+            "resourceSpans": [{
+                "resource": self.resource,
+                "scopeSpans": [{
+                    "scope": {"name": "andesmind.tracing"},
+                    "spans": [s.to_otlp() for s in trace.spans],
+                }],
+            }]
+        }, separators=(",", ":"), default=str)
+
+    def _run(self) -> None:
+        if self.target == "stdout":
+            write = lambda data: (sys.stdout.write(data.decode()), sys.stdout.flush())
+        else:
+            os.makedirs(os.path.dirname(self.target) or ".", exist_ok=True)
+            # One O_APPEND write per batch keeps lines whole when several
+            # workers export to the same file
+            fd = os.open(self.target, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            write = lambda data: os.write(fd, data)
+        stopping = False
+        while not stopping:
+            batch = [self._queue.get()]
+            # Batch whatever else is already waiting
+            while not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            if None in batch:
+                stopping = True
+            lines = [self._line(trace) for trace in batch if trace is not None]
+            if lines:
+                write(("\n".join(lines) + "\n").encode())
+        if self.target != "stdout":
+            os.close(fd)
+
+    def close(self) -> None:
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+class SlowestTraces:
+    """The N slowest traces of each route (min-heaps keyed by duration)"""
+
+    def __init__(self, per_route: int = 20):
+        self.per_route = per_route
+        self._heaps: Dict[str, List] = {}
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def add(self, route: str, trace: Trace) -> None:
+        entry = (trace.root.end_ns - trace.root.start_ns, next(self._counter), trace)
+        with self._lock:
+            heap = self._heaps.setdefault(route, [])
+            if len(heap) < self.per_route:
+                heapq.heappush(heap, entry)
+            elif entry[0] > heap[0][0]:
+                heapq.heapreplace(heap, entry)
+
+    def routes(self, route: Optional[str] = None) -> Dict[str, List[Dict[str, Any]]]:
+        with self._lock:
+            items = {r: list(h) for r, h in self._heaps.items() if route is None or r == route}
+        return {
+            r: [trace.summary() for _, _, trace in sorted(entries, key=lambda e: -e[0])]
+            for r, entries in sorted(items.items())
+        }
+
+    def get(self, trace_id: str) -> Optional[Trace]:
+        with self._lock:
+            for heap in self._heaps.values():
+                for _, _, trace in heap:
+                    if trace.trace_id == trace_id:
+                        return trace
+        return None
+
+
+TRACES = SlowestTraces(get_settings().TRACING_SLOWEST_PER_ROUTE)
+
+
+# version 00: trace id, parent span id and flags in lowercase hex
+TRACEPARENT = re.compile(r"00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})")
+INVALID_TRACE_ID = "0" * 32
+INVALID_SPAN_ID = "0" * 16
+
+# Requests that matched no route share one bucket of slowest traces, so
+# scanners probing random paths can't grow it without bound
+UNMATCHED_ROUTE = "(unmatched)"
+
+
+def _parse_traceparent(value: bytes) -> Optional[tuple]:
+    """(trace_id, parent_span_id, sampled) from a W3C traceparent header
+
+    None for anything but a well-formed version 00 header; the request then
+    starts a new trace.
+    """
+    match = TRACEPARENT.fullmatch(value.decode("latin-1").strip())
+    if not match:
+        return None
+    trace_id, span_id, flags = match.groups()
+    if trace_id == INVALID_TRACE_ID or span_id == INVALID_SPAN_ID:
+        return None
+    return trace_id, span_id, int(flags, 16) & 1 == 1
+
+
+class TracingMiddleware:
+    """ASGI middleware opening the root SERVER span of sampled requests"""
+
+    def __init__(self, app, sample_rate: float = 0.01, exporter: Optional[TraceExporter] = None,
+                 slowest: Optional[SlowestTraces] = TRACES):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.exporter = exporter
+        self.slowest = slowest
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        # An upstream sampling decision wins over the local rate
+        parent = None
+        for name, value in scope["headers"]:
+            if name == b"traceparent":
+                parent = _parse_traceparent(value)
+                break
+        sampled = parent[2] if parent else random.random() < self.sample_rate
+        if not sampled:
+            return await self.app(scope, receive, send)
+
+        trace = Trace(parent[0] if parent else None)
+        root = trace.start_span(
+            f"{scope['method']} {scope['path']}",
+            parent[1] if parent else None,
+            kind=SPAN_KIND_SERVER,
+            attributes={"http.method": scope["method"], "http.target": scope["path"]},
+        )
+        trace.root = root
+        token = _current_span.set(root)
+
+        async def send_with_context(message):
+            if message["type"] == "http.response.start":
+                root.set_attribute("http.status_code", message["status"])
+                message = dict(message, headers=list(message.get("headers", [])) + [
+                    (b"traceparent", f"00-{trace.trace_id}-{root.span_id}-01".encode())
+                ])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_context)
+        except BaseException:
+            root.status = STATUS_ERROR
+            raise
+        finally:
+            root.end()
+            _current_span.reset(token)
+            # Route template is known once routing has happened
+            route = getattr(scope.get("route"), "path", None)
+            if route is not None:
+                root.name = f"{scope['method']} {route}"
+                root.set_attribute("http.route", route)
+            if root.attributes.get("http.status_code", 500) >= 500:
+                root.status = STATUS_ERROR
+            if self.slowest is not None:
+                self.slowest.add(root.name if route is not None else UNMATCHED_ROUTE, trace)
+            if self.exporter is not None:
+                self.exporter.export(trace)
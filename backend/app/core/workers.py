@@ -0,0 +1,46 @@
+"""
+Shared process pool for CPU-bound work (password hashing, conflict sweeps)
+
+One pool per process, created on first use and reused by every request
+instead of a new pool per call. Workers are started through a fork server
+(spawn where that is unavailable): forking straight from the API process,
+which runs the audit writer, threadpool and sampler threads, can leave a
+child blocked forever on a lock another thread held at fork time. Tasks
+must be module-level functions of light modules, since workers import
+them fresh instead of inheriting the API's state.
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_size = 0
+_lock = threading.Lock()
+
+
+def process_pool(max_workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """The process's worker pool (``max_workers`` only applies on creation)"""
+    global _pool, _pool_size
+    with _lock:
+        if _pool is None:
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            _pool_size = max_workers or os.cpu_count() or 1
+            _pool = ProcessPoolExecutor(max_workers=_pool_size, mp_context=context)
+        return _pool
+
+
+def pool_size() -> int:
+    """Workers in the pool, or the number it would be created with"""
+    return _pool_size or os.cpu_count() or 1
+
+
+def shutdown_process_pool() -> None:
+    global _pool, _pool_size
+    with _lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool, _pool_size = None, 0
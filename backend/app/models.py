@@ -0,0 +1,123 @@
+"""
+Pydantic models and enums for AndesMindHack Backend
+"""
+
+from pydantic import BaseModel, EmailStr, validator
+from datetime import datetime, date
+from typing import Optional, Dict, Any
+from enum import Enum
+
+# Enums
+class UserRole(str, Enum):
+    EMPLOYEE = "employee"
+    MANAGER = "manager"
+    HR_ADMIN = "hr_admin"
+
+class RequestStatus(str, Enum):
+    PENDING = "pending"
+    APPROVED = "approved"
+    REJECTED = "rejected"
+    CANCELLED = "cancelled"
+
+class PolicyType(str, Enum):
+    VACATION = "vacation"
+    SICK_LEAVE = "sick_leave"
+    PERSONAL_LEAVE = "personal_leave"
+
+# Pydantic Models
+class UserBase(BaseModel):
+    email: EmailStr
+    name: str
+    employee_id: str
+    department: Optional[str] = None
+    position: Optional[str] = None
+
+class UserRegister(UserBase):
+    password: str
+    
+    @validator('password')
+    def validate_password(cls, v):
+        if len(v) < 8:
+            raise ValueError('Password must be at least 8 characters')
+        if not any(c.isupper() for c in v):
+            raise ValueError('Password must contain uppercase letter')
+        if not any(c.isdigit() for c in v):
+            raise ValueError('Password must contain digit')
+        return v
+
+class UserLogin(BaseModel):
+    email: EmailStr
+    password: str
+
+class UserResponse(UserBase):
+    id: int
+    role: UserRole
+    is_active: bool
+    created_at: datetime
+    vacation_balance: Optional[Dict[str, Any]] = None
+    manager: Optional[Dict[str, Any]] = None
+
+class TokenResponse(BaseModel):
+    access_token: str
+    refresh_token: str
+    token_type: str = "bearer"
+    expires_in: int = 900
+    user: UserResponse
+
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
+
+class PolicyResponse(BaseModel):
+    id: int
+    name: str
+    type: PolicyType
+    days_allocated: int
+    requires_approval: bool
+    advance_notice_days: int
+    max_consecutive_days: Optional[int]
+    is_active: bool
+
+class RequestCreate(BaseModel):
+    policy_id: int
+    start_date: date
+    end_date: date
+    reason: str
+    notes: Optional[str] = None
+    half_day: bool = False
+    
+    @validator('end_date')
+    def validate_dates(cls, v, values):
+        if 'start_date' in values and v < values['start_date']:
+            raise ValueError('end_date must be >= start_date')
+        return v
+
+class RequestResponse(BaseModel):
+    id: int
+    user_id: int
+    policy: PolicyResponse
+    start_date: date
+    end_date: date
+    business_days: float
+    duration_units: int
+    calendar_days: int
+    reason: str
+    notes: Optional[str]
+    status: RequestStatus
+    half_day: bool
+    created_at: datetime
+    updated_at: datetime
+    approver: Optional[Dict[str, Any]] = None
+    user: Optional[Dict[str, Any]] = None
+
+class ApprovalAction(BaseModel):
+    notes: Optional[str] = None
+
+class RejectionAction(BaseModel):
+    reason: str
+    notes: Optional[str] = None
+
+class HealthResponse(BaseModel):
+    status: str
+    timestamp: datetime
+    version: str
+    environment: str
@@ -0,0 +1,212 @@
+"""
+Administrative endpoints (HR)
+"""
+
+import asyncio
+
+from fastapi import APIRouter, HTTPException, UploadFile, File, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import HTMLResponse, PlainTextResponse
+from datetime import datetime, date
+from typing import Optional, List, Dict, Any
+
+from app.core.lazy import lazy_import
+from app.core.singleflight import QUERIES
+from app.core.tracing import TRACES
+from app.store import FAKE_DB, ORG, request_columns, query_audit, get_current_user_mock
+
+# Heavy optional subsystems are only imported on first use
+bulk_import = lazy_import("app.services.bulk_import")
+profiling = lazy_import("app.core.profiling")
+reports = lazy_import("app.services.reports")
+
+router = APIRouter(tags=["admin"])
+
+# Admin Import Endpoints
+@router.post("/api/v1/admin/import/{kind}")
+async def import_file(
+    kind: str,
+    file: UploadFile = File(...),
+    dry_run: bool = False,
+    chunk_size: int = Query(1000, ge=1, description="Rows validated and written per batch")
+):
+    """Bulk import users or historical requests from a CSV/Excel file (HR only)"""
+    current_user = get_current_user_mock()
+    
+    if current_user["role"] != "hr_admin":
+        raise HTTPException(
+            status_code=403,
+            detail="Access denied. HR role required."
+        )
+    
+    if kind not in ("users", "requests"):
+        raise HTTPException(
+            status_code=404,
+            detail="Unknown import kind. Use 'users' or 'requests'."
+        )
+    
+    try:
+        report = await run_in_threadpool(
+            bulk_import.run_import,
+            kind,
+            file.file,
+            file.filename or "",
+            bulk_import.MemorySink(asyncio.get_running_loop()),
+            chunk_size=chunk_size,
+            dry_run=dry_run
+        )
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=400,
+            detail=str(exc)
+        )
+    
+    return report.to_dict()
+
+# Audit Endpoints
+@router.get("/api/v1/admin/audit", response_model=List[Dict[str, Any]])
+async def get_audit_trail(
+    actor_id: Optional[int] = None,
+    request_id: Optional[int] = None,
+    action: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    limit: int = 1000
+):
+    """Query the audit trail by actor, request, action and time range (HR only)"""
+    current_user = get_current_user_mock()
+    
+    if current_user["role"] != "hr_admin":
+        raise HTTPException(
+            status_code=403,
+            detail="Access denied. HR role required."
+        )
+    
+    try:
+        start = datetime.fromisoformat(date_from) if date_from else None
+        end = datetime.fromisoformat(date_to) if date_to else None
+        return await run_in_threadpool(
+            query_audit,
+            start,
+            end,
+            actor_id=actor_id,
+            entity_id=request_id,
+            entity="request" if request_id is not None else None,
+            action=action,
+            limit=limit
+        )
+    except (ValueError, KeyError) as exc:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid audit filter: {exc}"
+        )
+
+# Report Endpoints
+@router.get("/api/v1/admin/reports/summary", response_model=Dict[str, Any])
+async def get_leave_summary(year: Optional[int] = None, department: Optional[str] = None):
+    """Requests and days taken per department, policy and status for a year (HR only)"""
+    current_user = get_current_user_mock()
+    
+    if current_user["role"] != "hr_admin":
+        raise HTTPException(
+            status_code=403,
+            detail="Access denied. HR role required."
+        )
+    
+    year = year or date.today().year
+    # Snapshot the users here: the graph is mutated on the event loop while
+    # the report runs in the threadpool
+    user_departments = [(user_id, user["department"]) for user_id, user in ORG.users_by_id.items()]
+    return await QUERIES.run(
+        ("reports.summary", year, department),
+        reports.leave_summary,
+        request_columns().view(),
+        user_departments,
+        list(FAKE_DB["policies"]),
+        year,
+        department=department
+    )
+
+# Profiling Endpoints
+@router.get("/api/v1/admin/profiles", response_model=List[Dict[str, Any]])
+async def list_profiles():
+    """Most recent request profiles, newest first (HR only)"""
+    current_user = get_current_user_mock()
+    
+    if current_user["role"] != "hr_admin":
+        raise HTTPException(
+            status_code=403,
+            detail="Access denied. HR role required."
+        )
+    
+    return profiling.PROFILES.list()
+
+@router.get("/api/v1/admin/profiles/{profile_id}")
+async def get_profile(profile_id: str, format: str = "collapsed"):
+    """One profile as collapsed stacks (flamegraph.pl/speedscope), HTML or JSON (HR only)"""
+    current_user = get_current_user_mock()
+    
+    if current_user["role"] != "hr_admin":
+        raise HTTPException(
+            status_code=403,
+            detail="Access denied. HR role required."
+        )
+    
+    profile = profiling.PROFILES.get(profile_id)
+    if not profile:
+        raise HTTPException(
+            status_code=404,
+            detail="Profile not found"
+        )
+    
+    if format == "collapsed":
+        return PlainTextResponse(profile.collapsed())
+    if format == "html":
+        return HTMLResponse(profile.to_html())
+    if format == "json":
+        return {**profile.summary(), "stacks": dict(profile.stacks.most_common())}
+    raise HTTPException(
+        status_code=400,
+        detail="Unknown format. Use 'collapsed', 'html' or 'json'."
+    )
+
+# Tracing Endpoints
+@router.get("/api/v1/admin/traces", response_model=Dict[str, List[Dict[str, Any]]])
+async def list_traces(route: Optional[str] = None):
+    """Slowest sampled traces of each route, slowest first (HR only)"""
+    current_user = get_current_user_mock()
+    
+    if current_user["role"] != "hr_admin":
+        raise HTTPException(
+            status_code=403,
+            detail="Access denied. HR role required."
+        )
+    
+    return TRACES.routes(route)
+
+@router.get("/api/v1/admin/traces/{trace_id}")
+async def get_trace(trace_id: str, format: str = "json"):
+    """One trace as a span breakdown or as OTLP/JSON spans (HR only)"""
+    current_user = get_current_user_mock()
+    
+    if current_user["role"] != "hr_admin":
+        raise HTTPException(
+            status_code=403,
+            detail="Access denied. HR role required."
+        )
+    
+    trace = TRACES.get(trace_id)
+    if not trace:
+        raise HTTPException(
+            status_code=404,
+            detail="Trace not found"
+        )
+    
+    if format == "json":
+        return {**trace.summary(), "spans": trace.breakdown()}
+    if format == "otlp":
+        return {"spans": [span.to_otlp() for span in trace.spans]}
+    raise HTTPException(
+        status_code=400,
+        detail="Unknown format. Use 'json' or 'otlp'."
+    )
@@ -0,0 +1,233 @@
+"""
+AI endpoints (forecasting and suggestions)
+
+The ML stack lives in the repository's ai/ module and is imported lazily:
+the core API never loads scikit-learn unless one of these endpoints is
+called.
+"""
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from datetime import date, timedelta
+from typing import Optional, List, Dict, Any
+import os
+import sys
+import threading
+
+from app import store
+from app.core.config import get_settings
+from app.core.lazy import lazy_import
+from app.services.holidays import holidays_between
+from app.services.validation import ACTIVE_STATUSES, units_to_days
+from app.store import (
+    FAKE_DB,
+    ORG,
+    VALIDATOR,
+    get_policy_by_id,
+    calculate_leave_units,
+    get_current_user_mock,
+)
+
+router = APIRouter(tags=["ai"])
+
+forecasting = lazy_import("ai.services.forecasting")
+absences = lazy_import("ai.services.absences")
+suggestions = lazy_import("ai.services.suggestions")
+
+_service_lock = threading.Lock()
+_forecast_service = None
+
+
+def ai_module_path() -> str:
+    """Directory containing the ai/ package (the repository root by default)"""
+    configured = get_settings().AI_MODULE_PATH
+    if configured:
+        return configured
+    backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    return os.path.dirname(backend_dir)
+
+
+def ensure_ai_importable() -> None:
+    path = ai_module_path()
+    if path not in sys.path:
+        sys.path.append(path)
+
+
+def _history():
+    from app.services.columnar import STATUS_NAMES
+
+    columns = {**store.request_columns().view(), "status_names": STATUS_NAMES}
+    return columns, {u["id"]: u["department"] for u in FAKE_DB["users"]}
+
+
+def get_forecast_service():
+    """Build the forecast service on first use and subscribe it to request changes"""
+    global _forecast_service
+    with _service_lock:
+        if _forecast_service is None:
+            ensure_ai_importable()
+            settings = get_settings()
+            models_dir = settings.AI_MODELS_DIR or os.path.join(ai_module_path(), "ai", "models")
+            service = forecasting.ForecastService(
+                _history,
+                model_path=os.path.join(models_dir, "absence_forecaster.pkl"),
+                horizon_days=settings.AI_FORECAST_HORIZON_DAYS,
+                retrain_after=settings.AI_RETRAIN_AFTER_REQUESTS
+            )
+            service.load()
+            store.REQUEST_LISTENERS.append(service.observe)
+            store.USER_LISTENERS.append(lambda user: service.register_user(user["id"], user.get("department")))
+            _forecast_service = service
+        return _forecast_service
+
+
+@router.get("/api/v1/ai/forecast", response_model=Dict[str, Any])
+async def get_absence_forecast(department: Optional[str] = None):
+    """Forecast absence peaks per department (managers/HR only)"""
+    current_user = get_current_user_mock()
+    
+    if current_user["role"] not in ["manager", "hr_admin"]:
+        raise HTTPException(
+            status_code=403,
+            detail="Access denied. Manager or HR role required."
+        )
+    
+    # Managers only see their own department
+    if current_user["role"] == "manager":
+        if department and department != current_user["department"]:
+            raise HTTPException(
+                status_code=403,
+                detail="Access denied. Managers can only forecast their department."
+            )
+        department = current_user["department"]
+    
+    try:
+        store.request_columns()  # built here, on the loop, before the history is read
+        service = await run_in_threadpool(get_forecast_service)
+        return await run_in_threadpool(service.forecast, department)
+    except ImportError as exc:
+        raise HTTPException(
+            status_code=503,
+            detail=f"AI module not available: {exc}"
+        )
+    except KeyError:
+        raise HTTPException(
+            status_code=404,
+            detail="Department not found"
+        )
+
+
+def _rank_dates(user: Dict, members: List[int], days: int, today: date, earliest: date, latest: date,
+                limit: int, use_forecast: bool, columns) -> List[Dict[str, Any]]:
+    """Rank candidate windows by team coverage (runs in a worker thread)
+
+    Only reads ``members`` and ``columns``, both snapshotted on the loop.
+    """
+    import numpy as np
+
+    ensure_ai_importable()
+    n_days = suggestions.search_days(today, latest, days)
+    origin = today.toordinal()
+    department = user["department"]
+    
+    # Colleagues' known absences (pending ones count: they may be approved)
+    cols = columns.view()
+    active = columns.status_mask(cols, ACTIVE_STATUSES)
+    team_rows = active & np.isin(cols["user_id"], [uid for uid in members if uid != user["id"]])
+    starts, ends = cols["start"][team_rows], cols["end"][team_rows]
+    team = absences.daily_absence_matrix(
+        starts, ends, np.zeros(len(starts), dtype=np.int32), 1, origin, n_days
+    )[0].astype(float)
+    if use_forecast:
+        try:
+            first_day, expected = get_forecast_service().expected_absences(department)
+            expected = expected[origin - first_day:n_days]
+            team[:len(expected)] = np.maximum(team[:len(expected)], expected)
+        except (ImportError, KeyError):
+            pass
+    
+    own_rows = active & (cols["user_id"] == user["id"])
+    starts, ends = cols["start"][own_rows], cols["end"][own_rows]
+    depts = np.zeros(len(starts), dtype=np.int32)
+    own_busy = absences.daily_absence_matrix(starts, ends, depts, 1, origin, n_days)[0] > 0
+    
+    holidays = holidays_between(today, date.fromordinal(origin + n_days - 1))
+    return suggestions.suggest_dates(
+        today, days, earliest, latest, team, own_busy, len(members), limit=limit, holidays=holidays
+    )
+
+
+@router.get("/api/v1/ai/suggest-dates", response_model=Dict[str, Any])
+async def suggest_vacation_dates(
+    policy_id: int,
+    days: int = Query(..., ge=1, le=60, description="Desired length in working days"),
+    months: int = Query(6, ge=1, le=12, description="How far ahead to search"),
+    limit: int = Query(5, ge=1, le=20),
+    use_forecast: bool = True
+):
+    """Suggest vacation windows balancing team coverage, holidays and bridge weekends"""
+    current_user = get_current_user_mock()
+    policy = get_policy_by_id(policy_id)
+    
+    if not policy:
+        raise HTTPException(
+            status_code=404,
+            detail="Policy not found"
+        )
+    
+    if not policy["is_active"]:
+        raise HTTPException(
+            status_code=400,
+            detail="Policy is not active"
+        )
+    
+    max_days = policy.get("max_consecutive_days")
+    if max_days and days > max_days:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Requests for this policy cannot exceed {max_days} consecutive business days"
+        )
+    
+    today = date.today()
+    earliest = today + timedelta(days=max(policy.get("advance_notice_days") or 0, 0))
+    latest = today + timedelta(days=30 * months)
+    department = current_user["department"]
+    members = list(ORG.department_member_ids(department))
+    
+    # Over-fetch: the validator may still drop candidates (balance, max days)
+    try:
+        ranked = await run_in_threadpool(
+            _rank_dates, current_user, members, days, today, earliest, latest, limit * 3,
+            use_forecast, store.request_columns()
+        )
+    except ImportError as exc:
+        raise HTTPException(
+            status_code=503,
+            detail=f"AI module not available: {exc}"
+        )
+    
+    # The validator reads live balances and intervals: check on the loop
+    accepted = []
+    rejected = []
+    for suggestion in ranked:
+        start = date.fromisoformat(suggestion["start_date"])
+        end = date.fromisoformat(suggestion["end_date"])
+        units = calculate_leave_units(start, end)
+        violations = VALIDATOR.validate(current_user, policy["id"], start, end, units, today=today)
+        if violations:
+            rejected.append(violations)
+            continue
+        suggestion["business_days"] = units_to_days(units)
+        accepted.append(suggestion)
+        if len(accepted) >= limit:
+            break
+    
+    return {
+        "policy_id": policy["id"],
+        "department": department,
+        "days": days,
+        "search_from": earliest.isoformat(),
+        "search_to": latest.isoformat(),
+        "suggestions": accepted,
+        "violations": rejected[0] if not accepted and rejected else []
+    }
@@ -0,0 +1,152 @@
+"""
+Organization-wide analysis endpoints (staffing conflicts)
+"""
+
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Query
+from fastapi.concurrency import run_in_threadpool
+from datetime import date, timedelta
+from typing import Optional, Dict, Any
+
+from app.core.config import get_settings
+from app.core.lazy import lazy_import
+from app.services.validation import ACTIVE_STATUSES
+from app.store import ORG, request_columns, get_current_user_mock
+
+conflicts = lazy_import("app.services.conflicts")
+
+router = APIRouter(tags=["analysis"])
+
+_jobs = None
+
+
+def get_conflict_jobs():
+    global _jobs
+    if _jobs is None:
+        _jobs = conflicts.ConflictJobs()
+    return _jobs
+
+
+def _conflict_params(start_date: Optional[date], end_date: Optional[date], department: Optional[str],
+                     threshold: Optional[float], include_pending: bool) -> Dict[str, Any]:
+    """Resolve defaults and enforce who may analyze what"""
+    current_user = get_current_user_mock()
+    
+    if current_user["role"] not in ["manager", "hr_admin"]:
+        raise HTTPException(
+            status_code=403,
+            detail="Access denied. Manager or HR role required."
+        )
+    
+    # Managers can only analyze their own department
+    if current_user["role"] == "manager":
+        if department and department != current_user["department"]:
+            raise HTTPException(
+                status_code=403,
+                detail="Access denied. Managers can only analyze their department."
+            )
+        department = current_user["department"]
+    
+    start_date = start_date or date.today()
+    end_date = end_date or start_date + timedelta(days=90)
+    if end_date < start_date:
+        raise HTTPException(
+            status_code=400,
+            detail="End date must be after start date"
+        )
+    
+    return {
+        "start_date": start_date,
+        "end_date": end_date,
+        "department": department,
+        "threshold": get_settings().STAFFING_THRESHOLD if threshold is None else threshold,
+        "statuses": ACTIVE_STATUSES if include_pending else ("approved",)
+    }
+
+
+def _snapshot(params: Dict[str, Any]):
+    # Runs on the event loop so the org graph is not mutated while it is
+    # read; proportional to users, the request history is filtered later
+    headcounts = conflicts.department_headcounts(
+        ORG,
+        departments=[params["department"]] if params["department"] else None
+    )
+    return request_columns().view(), headcounts
+
+
+def _analyze(snapshot, params: Dict[str, Any]) -> Dict[str, Any]:
+    cols, headcounts = snapshot
+    by_department = conflicts.collect_intervals(
+        cols, headcounts, params["start_date"], params["end_date"], params["statuses"]
+    )
+    result = conflicts.detect_conflicts(
+        by_department,
+        params["start_date"],
+        params["end_date"],
+        params["threshold"],
+        pool_min_requests=get_settings().CONFLICT_POOL_MIN_REQUESTS
+    )
+    result["statuses"] = list(params["statuses"])
+    return result
+
+
+@router.get("/api/v1/analysis/conflicts", response_model=Dict[str, Any])
+async def get_staffing_conflicts(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    department: Optional[str] = None,
+    threshold: Optional[float] = Query(None, ge=0, le=1, description="Minimum share of the department working"),
+    include_pending: bool = True
+):
+    """Days where a department falls below the staffing threshold, with the requests causing it"""
+    params = _conflict_params(start_date, end_date, department, threshold, include_pending)
+    return await run_in_threadpool(_analyze, _snapshot(params), params)
+
+
+@router.post("/api/v1/analysis/conflicts/jobs", status_code=202, response_model=Dict[str, Any])
+async def start_conflict_analysis(
+    background_tasks: BackgroundTasks,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    department: Optional[str] = None,
+    threshold: Optional[float] = Query(None, ge=0, le=1),
+    include_pending: bool = True
+):
+    """Run a conflict analysis in the background (long planning periods)"""
+    params = _conflict_params(start_date, end_date, department, threshold, include_pending)
+    jobs = get_conflict_jobs()
+    job = jobs.submit({
+        "start_date": params["start_date"].isoformat(),
+        "end_date": params["end_date"].isoformat(),
+        "department": params["department"],
+        "threshold": params["threshold"],
+        "include_pending": include_pending
+    }, owner_id=get_current_user_mock()["id"])
+    background_tasks.add_task(jobs.run, job["id"], _analyze, _snapshot(params), params)
+    return {"id": job["id"], "status": job["status"], "params": job["params"]}
+
+
+@router.get("/api/v1/analysis/conflicts/jobs/{job_id}", response_model=Dict[str, Any])
+async def get_conflict_analysis(job_id: str):
+    """Status and, once completed, the result of a conflict analysis job"""
+    current_user = get_current_user_mock()
+    
+    if current_user["role"] not in ["manager", "hr_admin"]:
+        raise HTTPException(
+            status_code=403,
+            detail="Access denied. Manager or HR role required."
+        )
+    
+    job = get_conflict_jobs().get(job_id)
+    # Other users' jobs are reported as missing; HR sees every job, managers
+    # only their own and only while they still manage the analyzed department
+    if job and current_user["role"] != "hr_admin" and (
+            job["owner_id"] != current_user["id"]
+            or job["params"]["department"] != current_user["department"]):
+        job = None
+    if not job:
+        raise HTTPException(
+            status_code=404,
+            detail="Job not found"
+        )
+    
+    return job
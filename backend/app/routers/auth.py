@@ -0,0 +1,127 @@
+"""
+Authentication endpoints
+"""
+
+from fastapi import APIRouter, HTTPException
+from datetime import datetime, date
+from typing import Dict, Any
+
+from app.models import UserRegister, UserLogin, UserResponse, UserRole, TokenResponse, RefreshTokenRequest
+from app.store import FAKE_DB, ORG, VACATION_POLICY_ID, get_user_by_email, insert_user, leave_balance, write_transaction
+
+router = APIRouter(tags=["auth"])
+
+# Authentication Endpoints
+@router.post("/api/v1/auth/register", status_code=201, response_model=UserResponse)
+async def register(user_data: UserRegister):
+    """Register a new user"""
+    # Uniqueness checks and the insert must see the same state across workers
+    with write_transaction():
+        # Check if user already exists
+        if get_user_by_email(user_data.email):
+            raise HTTPException(
+                status_code=400,
+                detail="Email already registered"
+            )
+    
+        # Check if employee_id already exists
+        if user_data.employee_id in ORG.users_by_employee_id:
+            raise HTTPException(
+                status_code=400,
+                detail="Employee ID already exists"
+            )
+    
+        # Create new user
+        new_user = {
+            "id": len(FAKE_DB["users"]) + 1,
+            "email": user_data.email,
+            "name": user_data.name,
+            "employee_id": user_data.employee_id,
+            "department": user_data.department,
+            "position": user_data.position,
+            "role": "employee",
+            "is_active": True,
+            "created_at": datetime.utcnow().isoformat(),
+            "hashed_password": f"$2b$12$hashed_{user_data.password}"  # Mock hash
+        }
+    
+        insert_user(new_user)
+    
+    # Return user without password
+    return UserResponse(
+        id=new_user["id"],
+        email=new_user["email"],
+        name=new_user["name"],
+        employee_id=new_user["employee_id"],
+        department=new_user["department"],
+        position=new_user["position"],
+        role=UserRole(new_user["role"]),
+        is_active=new_user["is_active"],
+        created_at=datetime.fromisoformat(new_user["created_at"])
+    )
+
+@router.post("/api/v1/auth/login", response_model=TokenResponse)
+async def login(credentials: UserLogin):
+    """Authenticate user and return tokens"""
+    user = get_user_by_email(credentials.email)
+    
+    if not user or not user["is_active"]:
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid credentials or inactive user"
+        )
+    
+    # Mock password verification (replace with actual password hashing)
+    # In production: verify_password(credentials.password, user["hashed_password"])
+    
+    # Mock JWT tokens (replace with actual JWT generation)
+    access_token = f"mock_access_token_for_{user['id']}"
+    refresh_token = f"mock_refresh_token_for_{user['id']}"
+    
+    user_response = UserResponse(
+        id=user["id"],
+        email=user["email"],
+        name=user["name"],
+        employee_id=user["employee_id"],
+        department=user["department"],
+        position=user["position"],
+        role=UserRole(user["role"]),
+        is_active=user["is_active"],
+        created_at=datetime.fromisoformat(user["created_at"]),
+        vacation_balance={
+            **leave_balance(user["id"], VACATION_POLICY_ID, date.today().year),
+            "accrual_rate": 1.25
+        }
+    )
+    
+    return TokenResponse(
+        access_token=access_token,
+        refresh_token=refresh_token,
+        user=user_response
+    )
+
+@router.post("/api/v1/auth/refresh", response_model=Dict[str, Any])
+async def refresh_token(token_data: RefreshTokenRequest):
+    """Refresh access token using refresh token"""
+    # Mock token refresh (replace with actual JWT validation and generation)
+    if not token_data.refresh_token.startswith("mock_refresh_token"):
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid refresh token"
+        )
+    
+    # Extract user ID from mock token
+    user_id = token_data.refresh_token.split("_")[-1]
+    new_access_token = f"mock_access_token_for_{user_id}"
+    
+    return {
+        "access_token": new_access_token,
+        "token_type": "bearer",
+        "expires_in": 900
+    }
+
+@router.post("/api/v1/auth/logout")
+async def logout():
+    """Logout user (invalidate tokens)"""
+    # In production: add tokens to blacklist
+    return {"message": "Logout exitoso"}
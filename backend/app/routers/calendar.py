@@ -0,0 +1,122 @@
+"""
+Team calendar endpoints
+"""
+
+from fastapi import APIRouter
+from datetime import date, timedelta
+from typing import Optional, Dict, Any, Tuple
+
+from app.core.singleflight import QUERIES
+from app.store import ORG, request_columns, get_user_by_id, get_policy_by_id, get_current_user_mock
+from app.services.validation import request_units, units_to_days
+
+router = APIRouter(tags=["calendar"])
+
+# Calendar Endpoint
+@router.get("/api/v1/calendar")
+async def get_team_calendar(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    department: Optional[str] = None,
+    include_pending: bool = False
+):
+    """Get team calendar with approved absences"""
+    current_user = get_current_user_mock()
+    
+    # Default to current month if no dates provided
+    if not start_date:
+        today = date.today()
+        start_date = today.replace(day=1).isoformat()
+    
+    if not end_date:
+        today = date.today()
+        if today.month == 12:
+            end_date = today.replace(year=today.year + 1, month=1, day=1) - timedelta(days=1)
+        else:
+            end_date = today.replace(month=today.month + 1, day=1) - timedelta(days=1)
+        end_date = end_date.isoformat()
+    
+    # Identical concurrent queries (same normalized period and filters)
+    # share one computation; the payload doesn't depend on who asks
+    start_date = date.fromisoformat(start_date).isoformat()
+    end_date = date.fromisoformat(end_date).isoformat()
+    member_ids = tuple(ORG.department_member_ids(department)) if department else None
+    return await QUERIES.run(
+        ("calendar", start_date, end_date, department, include_pending),
+        _build_calendar,
+        start_date,
+        end_date,
+        department,
+        include_pending,
+        member_ids,
+        request_columns()
+    )
+
+def _build_calendar(start_date: str, end_date: str, department: Optional[str], include_pending: bool,
+                    member_ids: Optional[Tuple[int, ...]], columns) -> Dict[str, Any]:
+    """Calendar payload of one normalized query (runs in the threadpool)"""
+    # Vectorized filter over the columnar history: status, overlap with the
+    # period and (when filtering by department) membership
+    cols = columns.view()
+    mask = columns.overlap_mask(
+        cols,
+        date.fromisoformat(start_date),
+        date.fromisoformat(end_date),
+        ("approved", "pending") if include_pending else ("approved",),
+        user_ids=member_ids
+    )
+    calendar_requests = [ORG.requests_by_id[int(request_id)] for request_id in cols["id"][mask]]
+    
+    # Format response
+    absences = []
+    for request in calendar_requests:
+        user = get_user_by_id(request["user_id"])
+        policy = get_policy_by_id(request["policy_id"])
+        
+        # Filter by department if specified
+        if department and user["department"] != department:
+            continue
+        
+        absences.append({
+            "user": {
+                "id": user["id"],
+                "name": user["name"],
+                "department": user["department"]
+            },
+            "request_id": request["id"],
+            "start_date": request["start_date"],
+            "end_date": request["end_date"],
+            "policy_type": policy["type"],
+            "status": request["status"],
+            "half_day": request["half_day"],
+            "duration_units": request_units(request)
+        })
+    
+    # Summary statistics
+    departments = {}
+    statuses = {}
+    units_by_department = {}
+    
+    for absence in absences:
+        dept = absence["user"]["department"]
+        status = absence["status"]
+        
+        departments[dept] = departments.get(dept, 0) + 1
+        statuses[status] = statuses.get(status, 0) + 1
+        # Integer units: exact totals, converted to days once at the end
+        units_by_department[dept] = units_by_department.get(dept, 0) + absence["duration_units"]
+    
+    return {
+        "period": {
+            "start_date": start_date,
+            "end_date": end_date
+        },
+        "absences": absences,
+        "summary": {
+            "total_absences": len(absences),
+            "by_department": departments,
+            "by_status": statuses,
+            "total_days": units_to_days(sum(units_by_department.values())),
+            "days_by_department": {dept: units_to_days(units) for dept, units in units_by_department.items()}
+        }
+    }
@@ -0,0 +1,62 @@
+"""
+Health check endpoints
+"""
+
+from fastapi import APIRouter
+from datetime import datetime
+import os
+
+from app.core.compression import COMPRESSION_CACHE
+from app.core.config import get_settings
+from app.core.idempotency import IDEMPOTENCY
+from app.core.singleflight import QUERIES
+from app.models import HealthResponse
+from app.store import FAKE_DB, ORG, DURABLE, BUS
+
+router = APIRouter(tags=["health"])
+
+@router.get("/healthz", response_model=HealthResponse)
+async def health_check():
+    """Health check endpoint"""
+    return HealthResponse(
+        status="healthy",
+        timestamp=datetime.utcnow(),
+        version="1.0.0",
+        environment=get_settings().ENVIRONMENT
+    )
+
+@router.get("/api/v1/health/detailed")
+async def detailed_health_check():
+    """Detailed health check with system metrics"""
+    return {
+        "status": "healthy",
+        "timestamp": datetime.utcnow().isoformat(),
+        "services": {
+            "database": {
+                "status": "healthy",
+                "response_time_ms": 12,
+                "connection_pool": {
+                    "active": 2,
+                    "idle": 8,
+                    "max": 20
+                }
+            },
+            "email": {
+                "status": "healthy",
+                "last_sent": datetime.utcnow().isoformat()
+            }
+        },
+        "metrics": {
+            "active_users": len([u for u in FAKE_DB["users"] if u["is_active"]]),
+            "pending_requests": len(ORG.pending_ids),
+            "requests_today": len(FAKE_DB["requests"]),
+            "idempotency": IDEMPOTENCY.stats(),
+            "single_flight": QUERIES.stats(),
+            "compression_cache": COMPRESSION_CACHE.stats()
+        },
+        "worker": {
+            "pid": os.getpid(),
+            "wal_seq": DURABLE.seq if DURABLE is not None else None,
+            "notifications_received": BUS.received if BUS is not None else None
+        }
+    }
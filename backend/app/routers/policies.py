@@ -0,0 +1,31 @@
+"""
+Policy endpoints
+"""
+
+from fastapi import APIRouter
+from typing import List
+
+from app.models import PolicyResponse, PolicyType
+from app.store import FAKE_DB
+
+router = APIRouter(tags=["policies"])
+
+# Policies Endpoints
+@router.get("/api/v1/policies", response_model=List[PolicyResponse])
+async def get_policies():
+    """Get all active policies"""
+    active_policies = [p for p in FAKE_DB["policies"] if p["is_active"]]
+    
+    return [
+        PolicyResponse(
+            id=policy["id"],
+            name=policy["name"],
+            type=PolicyType(policy["type"]),
+            days_allocated=policy["days_allocated"],
+            requires_approval=policy["requires_approval"],
+            advance_notice_days=policy["advance_notice_days"],
+            max_consecutive_days=policy.get("max_consecutive_days"),
+            is_active=policy["is_active"]
+        )
+        for policy in active_policies
+    ]
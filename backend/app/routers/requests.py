@@ -0,0 +1,401 @@
+"""
+Time-off request endpoints
+"""
+
+from fastapi import APIRouter, HTTPException
+from datetime import datetime, date
+from typing import Optional, List, Dict, Any
+
+from app.models import (
+    PolicyResponse,
+    PolicyType,
+    RequestCreate,
+    RequestResponse,
+    RequestStatus,
+    ApprovalAction,
+    RejectionAction,
+)
+from app.store import (
+    ORG,
+    VALIDATOR,
+    FAKE_DB,
+    get_user_by_id,
+    get_policy_by_id,
+    get_request_by_id,
+    calculate_leave_units,
+    insert_request,
+    update_request_status,
+    write_transaction,
+    get_current_user_mock,
+)
+from app.services.validation import request_units, units_to_days
+
+router = APIRouter(tags=["requests"])
+
+# Requests Endpoints
+@router.post("/api/v1/requests", status_code=201, response_model=RequestResponse)
+async def create_request(request_data: RequestCreate):
+    """Create a new time-off request"""
+    current_user = get_current_user_mock()
+    policy = get_policy_by_id(request_data.policy_id)
+    
+    if not policy:
+        raise HTTPException(
+            status_code=404,
+            detail="Policy not found"
+        )
+    
+    # Duration in half-day units; business_days is derived for display
+    units = calculate_leave_units(request_data.start_date, request_data.end_date, request_data.half_day)
+    business_days = units_to_days(units)
+    calendar_days = (request_data.end_date - request_data.start_date).days + 1
+    
+    # Checks and writes must see the same state across worker processes
+    with write_transaction():
+        # Run every policy rule in one pass and report all violations together
+        violations = VALIDATOR.validate(
+            current_user,
+            policy["id"],
+            request_data.start_date,
+            request_data.end_date,
+            units,
+            half_day=request_data.half_day
+        )
+        if violations:
+            raise HTTPException(
+                status_code=400,
+                detail=violations
+            )
+    
+        # Find approver (manager of the same department)
+        approver = ORG.department_manager(current_user)
+    
+        # Policies without approval are approved on creation
+        now = datetime.utcnow().isoformat()
+        auto_approve = VALIDATOR.compiled(policy["id"]).auto_approve
+    
+        # Create new request
+        new_request = {
+            "id": len(FAKE_DB["requests"]) + 1,
+            "user_id": current_user["id"],
+            "policy_id": request_data.policy_id,
+            "start_date": request_data.start_date.isoformat(),
+            "end_date": request_data.end_date.isoformat(),
+            "business_days": business_days,
+            "duration_units": units,
+            "calendar_days": calendar_days,
+            "reason": request_data.reason,
+            "notes": request_data.notes,
+            "status": "approved" if auto_approve else "pending",
+            "half_day": request_data.half_day,
+            "approver_id": approver["id"] if approver else None,
+            "created_at": now,
+            "updated_at": now
+        }
+        if auto_approve:
+            new_request["approved_at"] = now
+            new_request["approved_by"] = None
+    
+        insert_request(new_request, actor_id=current_user["id"])
+    
+    return RequestResponse(
+        id=new_request["id"],
+        user_id=new_request["user_id"],
+        policy=PolicyResponse(
+            id=policy["id"],
+            name=policy["name"],
+            type=PolicyType(policy["type"]),
+            days_allocated=policy["days_allocated"],
+            requires_approval=policy["requires_approval"],
+            advance_notice_days=policy["advance_notice_days"],
+            max_consecutive_days=policy.get("max_consecutive_days"),
+            is_active=policy["is_active"]
+        ),
+        start_date=date.fromisoformat(new_request["start_date"]),
+        end_date=date.fromisoformat(new_request["end_date"]),
+        business_days=new_request["business_days"],
+        duration_units=new_request["duration_units"],
+        calendar_days=new_request["calendar_days"],
+        reason=new_request["reason"],
+        notes=new_request["notes"],
+        status=RequestStatus(new_request["status"]),
+        half_day=new_request["half_day"],
+        created_at=datetime.fromisoformat(new_request["created_at"]),
+        updated_at=datetime.fromisoformat(new_request["updated_at"]),
+        approver={
+            "id": approver["id"],
+            "name": approver["name"]
+        } if approver else None
+    )
+
+@router.get("/api/v1/requests", response_model=Dict[str, Any])
+async def get_user_requests(
+    status: Optional[str] = None,
+    policy_type: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    page: int = 1,
+    limit: int = 20
+):
+    """Get user's requests with optional filters"""
+    current_user = get_current_user_mock()
+    
+    # Filter requests for current user
+    user_requests = [ORG.requests_by_id[rid] for rid in sorted(ORG.requests_by_user[current_user["id"]])]
+    
+    # Apply filters
+    if status:
+        user_requests = [r for r in user_requests if r["status"] == status]
+    
+    # Convert to response format
+    requests_response = []
+    for request in user_requests:
+        policy = get_policy_by_id(request["policy_id"])
+        approver = get_user_by_id(request.get("approver_id")) if request.get("approver_id") else None
+        
+        requests_response.append({
+            "id": request["id"],
+            "policy": {
+                "id": policy["id"],
+                "name": policy["name"],
+                "type": policy["type"]
+            },
+            "start_date": request["start_date"],
+            "end_date": request["end_date"],
+            "business_days": request["business_days"],
+            "duration_units": request_units(request),
+            "status": request["status"],
+            "created_at": request["created_at"],
+            "approver": {
+                "name": approver["name"]
+            } if approver else None
+        })
+    
+    # Pagination
+    total = len(requests_response)
+    start_idx = (page - 1) * limit
+    end_idx = start_idx + limit
+    paginated_requests = requests_response[start_idx:end_idx]
+    
+    return {
+        "items": paginated_requests,
+        "total": total,
+        "page": page,
+        "pages": (total + limit - 1) // limit,
+        "has_next": end_idx < total,
+        "has_prev": page > 1
+    }
+
+# Admin/Manager Endpoints (declared before /{request_id} so "pending" is not parsed as an id)
+@router.get("/api/v1/requests/pending", response_model=List[Dict[str, Any]])
+async def get_pending_requests():
+    """Get all pending requests for approval (managers/HR only)"""
+    current_user = get_current_user_mock()
+    
+    if current_user["role"] not in ["manager", "hr_admin"]:
+        raise HTTPException(
+            status_code=403,
+            detail="Access denied. Manager or HR role required."
+        )
+    
+    # Managers only see requests from their department, HR sees everything
+    pending_requests = ORG.pending_for(current_user)
+    
+    # Format response
+    response = []
+    for request in pending_requests:
+        user = get_user_by_id(request["user_id"])
+        policy = get_policy_by_id(request["policy_id"])
+        
+        response.append({
+            "id": request["id"],
+            "user": {
+                "id": user["id"],
+                "name": user["name"],
+                "employee_id": user["employee_id"],
+                "department": user["department"]
+            },
+            "policy": {
+                "name": policy["name"],
+                "type": policy["type"]
+            },
+            "start_date": request["start_date"],
+            "end_date": request["end_date"],
+            "business_days": request["business_days"],
+            "duration_units": request_units(request),
+            "reason": request["reason"],
+            "created_at": request["created_at"]
+        })
+    
+    return response
+
+@router.get("/api/v1/requests/{request_id}", response_model=RequestResponse)
+async def get_request_details(request_id: int):
+    """Get detailed information about a specific request"""
+    request = get_request_by_id(request_id)
+    
+    if not request:
+        raise HTTPException(
+            status_code=404,
+            detail="Request not found"
+        )
+    
+    current_user = get_current_user_mock()
+    
+    # Check if user can access this request
+    if not ORG.can_view_request(current_user, request):
+        raise HTTPException(
+            status_code=403,
+            detail="Access denied"
+        )
+    
+    policy = get_policy_by_id(request["policy_id"])
+    user = get_user_by_id(request["user_id"])
+    approver = get_user_by_id(request.get("approver_id")) if request.get("approver_id") else None
+    
+    return RequestResponse(
+        id=request["id"],
+        user_id=request["user_id"],
+        policy=PolicyResponse(
+            id=policy["id"],
+            name=policy["name"],
+            type=PolicyType(policy["type"]),
+            days_allocated=policy["days_allocated"],
+            requires_approval=policy["requires_approval"],
+            advance_notice_days=policy["advance_notice_days"],
+            max_consecutive_days=policy.get("max_consecutive_days"),
+            is_active=policy["is_active"]
+        ),
+        start_date=date.fromisoformat(request["start_date"]),
+        end_date=date.fromisoformat(request["end_date"]),
+        business_days=request["business_days"],
+        duration_units=request_units(request),
+        calendar_days=request["calendar_days"],
+        reason=request["reason"],
+        notes=request["notes"],
+        status=RequestStatus(request["status"]),
+        half_day=request["half_day"],
+        created_at=datetime.fromisoformat(request["created_at"]),
+        updated_at=datetime.fromisoformat(request["updated_at"]),
+        user={
+            "id": user["id"],
+            "name": user["name"],
+            "employee_id": user["employee_id"]
+        },
+        approver={
+            "id": approver["id"],
+            "name": approver["name"],
+            "email": approver["email"]
+        } if approver else None
+    )
+
+@router.post("/api/v1/requests/{request_id}/approve")
+async def approve_request(request_id: int, approval: ApprovalAction):
+    """Approve a pending request"""
+    current_user = get_current_user_mock()
+    
+    if current_user["role"] not in ["manager", "hr_admin"]:
+        raise HTTPException(
+            status_code=403,
+            detail="Access denied. Manager or HR role required."
+        )
+    
+    request = get_request_by_id(request_id)
+    
+    if not request:
+        raise HTTPException(
+            status_code=404,
+            detail="Request not found"
+        )
+    
+    if not ORG.can_decide_request(current_user, request):
+        raise HTTPException(
+            status_code=403,
+            detail="Access denied. Not an approver for this request."
+        )
+    
+    with write_transaction():
+        if request["status"] != "pending":
+            raise HTTPException(
+                status_code=400,
+                detail="Request is not pending approval"
+            )
+    
+        # Update request status
+        now = datetime.utcnow().isoformat()
+        update_request_status(
+            request,
+            "approved",
+            actor_id=current_user["id"],
+            approved_at=now,
+            approved_by=current_user["id"],
+            approval_notes=approval.notes,
+            updated_at=now
+        )
+    
+    return {
+        "message": "Solicitud aprobada exitosamente",
+        "id": request_id,
+        "status": "approved",
+        "approved_at": request["approved_at"],
+        "approved_by": {
+            "id": current_user["id"],
+            "name": current_user["name"]
+        }
+    }
+
+@router.post("/api/v1/requests/{request_id}/reject")
+async def reject_request(request_id: int, rejection: RejectionAction):
+    """Reject a pending request"""
+    current_user = get_current_user_mock()
+    
+    if current_user["role"] not in ["manager", "hr_admin"]:
+        raise HTTPException(
+            status_code=403,
+            detail="Access denied. Manager or HR role required."
+        )
+    
+    request = get_request_by_id(request_id)
+    
+    if not request:
+        raise HTTPException(
+            status_code=404,
+            detail="Request not found"
+        )
+    
+    if not ORG.can_decide_request(current_user, request):
+        raise HTTPException(
+            status_code=403,
+            detail="Access denied. Not an approver for this request."
+        )
+    
+    with write_transaction():
+        if request["status"] != "pending":
+            raise HTTPException(
+                status_code=400,
+                detail="Request is not pending approval"
+            )
+    
+        # Update request status
+        now = datetime.utcnow().isoformat()
+        update_request_status(
+            request,
+            "rejected",
+            actor_id=current_user["id"],
+            rejected_at=now,
+            rejected_by=current_user["id"],
+            rejection_reason=rejection.reason,
+            rejection_notes=rejection.notes,
+            updated_at=now
+        )
+    
+    return {
+        "message": "Solicitud rechazada",
+        "id": request_id,
+        "status": "rejected",
+        "rejected_at": request["rejected_at"],
+        "rejected_by": {
+            "id": current_user["id"],
+            "name": current_user["name"]
+        }
+    }
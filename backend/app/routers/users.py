@@ -0,0 +1,41 @@
+"""
+User endpoints
+"""
+
+from fastapi import APIRouter
+from datetime import datetime, date
+
+from app.models import UserResponse, UserRole
+from app.store import ORG, VACATION_POLICY_ID, leave_balance, get_current_user_mock
+
+router = APIRouter(tags=["users"])
+
+# User Endpoints
+@router.get("/api/v1/users/me", response_model=UserResponse)
+async def get_current_user():
+    """Get current user profile"""
+    user = get_current_user_mock()
+    
+    # Find manager
+    manager = ORG.department_manager(user)
+    
+    return UserResponse(
+        id=user["id"],
+        email=user["email"],
+        name=user["name"],
+        employee_id=user["employee_id"],
+        department=user["department"],
+        position=user["position"],
+        role=UserRole(user["role"]),
+        is_active=user["is_active"],
+        created_at=datetime.fromisoformat(user["created_at"]),
+        vacation_balance={
+            **leave_balance(user["id"], VACATION_POLICY_ID, date.today().year),
+            "accrual_rate": 1.25
+        },
+        manager={
+            "id": manager["id"],
+            "name": manager["name"],
+            "email": manager["email"]
+        } if manager else None
+    )
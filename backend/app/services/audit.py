@@ -0,0 +1,435 @@
+"""
+Append-only audit log for AndesMindHack Backend
+
+Every state change is appended to a write-ahead segment file as a compact
+binary record. A background writer group-commits buffered records with a
+single fsync, segments rotate by size, and each segment keeps a sparse
+time index (plus the set of actors it contains) so time-range queries
+only open the segments they need.
+
+With several worker processes each one appends to its own directory; the
+other workers' logs are opened read-only and merged at query time.
+
+Payloads that don't fit a record (64 KB) are stored out of line in
+``blobs/<sha256>.json``, written and fsynced before the record that
+references them; queries resolve the reference transparently.
+
+Segment layout:  MAGIC | record*
+Record layout:   crc32 u32 | ts_us i64 | actor u32 | entity_id u32 |
+                 action u8 | entity u8 | payload_len u16 | payload (JSON)
+"""
+
+import hashlib
+import heapq
+import json
+import logging
+import os
+import struct
+import threading
+import time
+import zlib
+from bisect import bisect_right
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Optional, List, Dict, Any, Iterator, Iterable, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"AMAL\x01"
+RECORD_HEADER = struct.Struct("<IqIIBBH")
+INDEX_HEADER = struct.Struct("<qqII")
+INDEX_ENTRY = struct.Struct("<qQ")
+ACTOR_ENTRY = struct.Struct("<I")
+
+SYSTEM_ACTOR = 0
+MAX_PAYLOAD = 0xFFFF
+BLOB_KEY = "$blob"
+BLOB_DIR = "blobs"
+
+ACTIONS = {
+    "user_registered": 1,
+    "user_updated": 2,
+    "request_created": 10,
+    "request_approved": 11,
+    "request_rejected": 12,
+    "request_cancelled": 13,
+    "request_updated": 14,
+}
+ACTION_NAMES = {code: name for name, code in ACTIONS.items()}
+
+ENTITIES = {"user": 1, "request": 2}
+ENTITY_NAMES = {code: name for name, code in ENTITIES.items()}
+
+
+def to_us(moment: datetime) -> int:
+    """Datetime to microseconds since the epoch (naive datetimes are UTC)"""
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp() * 1_000_000)
+
+
+class SegmentIndex:
+    """Sparse time index and actor set of one segment"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.min_ts: Optional[int] = None
+        self.max_ts: Optional[int] = None
+        self.timestamps: List[int] = []
+        self.offsets: List[int] = []
+        self.actors: Set[int] = set()
+        self.size = len(MAGIC)
+        self._since_entry = 0
+
+    def observe(self, ts: int, actor: int, offset: int, length: int, every: int) -> None:
+        """Account for a record appended at ``offset``"""
+        if self.min_ts is None:
+            self.min_ts = ts
+        self.max_ts = ts
+        self.actors.add(actor)
+        if self._since_entry == 0:
+            self.timestamps.append(ts)
+            self.offsets.append(offset)
+        self._since_entry = (self._since_entry + 1) % every
+        self.size = offset + length
+
+    def seek_offset(self, start_ts: int) -> int:
+        """Offset of the last indexed record at or before ``start_ts``"""
+        pos = bisect_right(self.timestamps, start_ts) - 1
+        return self.offsets[pos] if pos >= 0 else len(MAGIC)
+
+    def overlaps(self, start_ts: int, end_ts: int, actor: Optional[int]) -> bool:
+        if self.min_ts is None or self.max_ts < start_ts or self.min_ts > end_ts:
+            return False
+        return actor is None or actor in self.actors
+
+    def save(self) -> None:
+        """Persist the index next to its (sealed) segment"""
+        parts = [INDEX_HEADER.pack(self.min_ts or 0, self.max_ts or 0, len(self.timestamps), len(self.actors))]
+        parts.extend(INDEX_ENTRY.pack(ts, off) for ts, off in zip(self.timestamps, self.offsets))
+        parts.extend(ACTOR_ENTRY.pack(actor) for actor in sorted(self.actors))
+        tmp = self.path + ".idx.tmp"
+        with open(tmp, "wb") as f:
+            f.write(b"".join(parts))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path + ".idx")
+
+    @classmethod
+    def load(cls, path: str) -> Optional["SegmentIndex"]:
+        idx_path = path + ".idx"
+        if not os.path.exists(idx_path):
+            return None
+        with open(idx_path, "rb") as f:
+            data = f.read()
+        index = cls(path)
+        min_ts, max_ts, n_entries, n_actors = INDEX_HEADER.unpack_from(data, 0)
+        pos = INDEX_HEADER.size
+        for _ in range(n_entries):
+            ts, off = INDEX_ENTRY.unpack_from(data, pos)
+            index.timestamps.append(ts)
+            index.offsets.append(off)
+            pos += INDEX_ENTRY.size
+        for _ in range(n_actors):
+            index.actors.add(ACTOR_ENTRY.unpack_from(data, pos)[0])
+            pos += ACTOR_ENTRY.size
+        if n_entries:
+            index.min_ts, index.max_ts = min_ts, max_ts
+        index.size = os.path.getsize(path)
+        return index
+
+
+def _iter_records(path: str, offset: int) -> Iterator[Tuple[int, int, int, int, int, int, bytes]]:
+    """Yield (offset, ts, actor, entity_id, action, entity, payload) stopping at a torn tail"""
+    with open(path, "rb") as f:
+        f.seek(offset)
+        while True:
+            header = f.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                return
+            crc, ts, actor, entity_id, action, entity, length = RECORD_HEADER.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length or zlib.crc32(header[4:] + payload) != crc:
+                return
+            yield offset, ts, actor, entity_id, action, entity, payload
+            offset += RECORD_HEADER.size + length
+
+
+class AuditLog:
+    """Append-only, segment-rotated audit trail with group commit"""
+
+    def __init__(self, directory: str, max_segment_bytes: int = 64 * 1024 * 1024,
+                 commit_interval: float = 0.005, index_every: int = 256, read_only: bool = False):
+        self.directory = directory
+        # Read-only logs belong to another process and are rescanned per query
+        self.read_only = read_only
+        self.max_segment_bytes = max_segment_bytes
+        self.commit_interval = commit_interval
+        self.index_every = index_every
+
+        # _lock guards the in-memory buffer, _io_lock the files and indexes;
+        # fsync happens under _io_lock only so appends never wait on disk
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._durable = threading.Condition(self._lock)
+        # (ts, actor, record, out-of-line payload as (digest, bytes) or None)
+        self._buffer: List[Tuple[int, int, bytes, Optional[Tuple[str, bytes]]]] = []
+        self._appended_seq = 0
+        self._durable_seq = 0
+        self._last_ts = 0
+        self._closed = False
+        self._writer: Optional[threading.Thread] = None
+
+        self.sealed: List[SegmentIndex] = []
+        self.active: Optional[SegmentIndex] = None
+        self._file = None
+        self._opened = False
+
+    # Segments
+    def _segment_path(self, number: int) -> str:
+        return os.path.join(self.directory, f"audit-{number:08d}.log")
+
+    def _ensure_open(self) -> None:
+        with self._io_lock:
+            if not self._opened:
+                self._open()
+
+    def _open(self) -> None:
+        """Load sealed segment indexes and recover the active segment"""
+        os.makedirs(self.directory, exist_ok=True)
+        names = sorted(n for n in os.listdir(self.directory) if n.startswith("audit-") and n.endswith(".log"))
+        for name in names[:-1]:
+            path = os.path.join(self.directory, name)
+            self.sealed.append(SegmentIndex.load(path) or self._rebuild_index(path))
+
+        if names:
+            path = os.path.join(self.directory, names[-1])
+            self.active = self._rebuild_index(path)
+            if not self.read_only:
+                # Drop a torn tail left by a crash before the last fsync
+                with open(path, "r+b") as f:
+                    f.truncate(self.active.size)
+                self._file = open(path, "ab")
+            self._last_ts = self.active.max_ts or 0
+        elif self.read_only:
+            self.active = SegmentIndex(self._segment_path(1))
+        else:
+            self._start_segment(1)
+        self._opened = True
+
+    def _rebuild_index(self, path: str) -> SegmentIndex:
+        index = SegmentIndex(path)
+        for offset, ts, actor, _, _, _, payload in _iter_records(path, len(MAGIC)):
+            index.observe(ts, actor, offset, RECORD_HEADER.size + len(payload), self.index_every)
+        return index
+
+    def _start_segment(self, number: int) -> None:
+        path = self._segment_path(number)
+        self._file = open(path, "ab")
+        self._file.write(MAGIC)
+        self.active = SegmentIndex(path)
+
+    def _rotate(self) -> None:
+        self._file.close()
+        self.active.save()
+        self.sealed.append(self.active)
+        number = int(os.path.basename(self.active.path)[6:14]) + 1
+        self._start_segment(number)
+
+    # Writing
+    def append(self, action: str, entity: str, entity_id: int, actor_id: Optional[int] = None,
+               changes: Optional[Dict[str, Any]] = None) -> int:
+        """Queue a record for the next group commit and return its sequence number"""
+        if self.read_only:
+            raise RuntimeError("Audit log is read-only")
+        payload = json.dumps(changes or {}, separators=(",", ":"), default=str, ensure_ascii=False).encode()
+        blob = None
+        if len(payload) > MAX_PAYLOAD:
+            # Too big for a record: keep the full payload out of line
+            digest = hashlib.sha256(payload).hexdigest()
+            logger.warning("Audit payload of %s %s (%d bytes) stored out of line as %s",
+                           entity, entity_id, len(payload), digest)
+            blob = (digest, payload)
+            payload = json.dumps(
+                {BLOB_KEY: digest, "size": len(payload), "fields": sorted(changes or {})},
+                ensure_ascii=False
+            ).encode()
+
+        if not self._opened:
+            self._ensure_open()
+
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._run_writer, name="audit-writer", daemon=True)
+                self._writer.start()
+
+            # Monotonic timestamps keep the per-segment index sorted
+            ts = max(time.time_ns() // 1000, self._last_ts)
+            self._last_ts = ts
+            body = RECORD_HEADER.pack(0, ts, actor_id or SYSTEM_ACTOR, entity_id or 0,
+                                      ACTIONS[action], ENTITIES[entity], len(payload))[4:] + payload
+            record = struct.pack("<I", zlib.crc32(body)) + body
+            self._buffer.append((ts, actor_id or SYSTEM_ACTOR, record, blob))
+            self._appended_seq += 1
+            self._wakeup.notify()
+            return self._appended_seq
+
+    def _run_writer(self) -> None:
+        while True:
+            with self._lock:
+                while not self._buffer and not self._closed:
+                    self._wakeup.wait()
+                if not self._buffer and self._closed:
+                    return
+            # Let concurrent appends pile up so they share one fsync
+            time.sleep(self.commit_interval)
+            self._commit()
+
+    def _commit(self) -> None:
+        with self._lock:
+            batch, self._buffer = self._buffer, []
+            target_seq = self._appended_seq
+        if not batch:
+            return
+
+        with self._io_lock:
+            # Blobs are durable before any record that references them
+            for _, _, _, blob in batch:
+                if blob is not None:
+                    self._write_blob(*blob)
+            for ts, actor, record, _ in batch:
+                if self.active.size + len(record) > self.max_segment_bytes and self.active.min_ts is not None:
+                    self._file.flush()
+                    os.fsync(self._file.fileno())
+                    self._rotate()
+                offset = self.active.size
+                self._file.write(record)
+                self.active.observe(ts, actor, offset, len(record), self.index_every)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+        with self._lock:
+            self._durable_seq = target_seq
+            self._durable.notify_all()
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.directory, BLOB_DIR, digest + ".json")
+
+    def _write_blob(self, digest: str, payload: bytes) -> None:
+        path = self._blob_path(digest)
+        if os.path.exists(path):
+            return  # content addressed: already stored
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    def _load_changes(self, payload: bytes) -> Dict[str, Any]:
+        changes = json.loads(payload)
+        if BLOB_KEY not in changes:
+            return changes
+        try:
+            with open(self._blob_path(changes[BLOB_KEY]), "rb") as f:
+                return json.loads(f.read())
+        except (OSError, ValueError):
+            # Keep the reference (digest, size, fields) rather than failing the query
+            return dict(changes, blob_missing=True)
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Block until every record appended so far is durable"""
+        if self._writer is None:
+            return
+        with self._lock:
+            target = self._appended_seq
+            self._wakeup.notify()
+            self._durable.wait_for(lambda: self._durable_seq >= target, timeout)
+
+    def close(self) -> None:
+        """Flush pending records and stop the writer"""
+        if self._writer is None:
+            return
+        self.flush()
+        with self._lock:
+            self._closed = True
+            self._wakeup.notify()
+        self._writer.join()
+        self._writer = None
+        with self._io_lock:
+            self._file.close()
+            self.active.save()
+            self._opened = False
+            self.sealed = []
+        self._closed = False
+
+    # Reading
+    def query(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+              actor_id: Optional[int] = None, entity_id: Optional[int] = None,
+              action: Optional[str] = None, entity: Optional[str] = None,
+              limit: int = 1000) -> List[Dict[str, Any]]:
+        """Records in [start, end] matching the filters, oldest first
+
+        ``entity_id`` is only unique within an ``entity`` ("user" or
+        "request"); pass both to follow one row.
+        """
+        start_ts = to_us(start) if start else 0
+        end_ts = to_us(end) if end else 2 ** 63 - 1
+        action_code = ACTIONS[action] if action else None
+        entity_code = ENTITIES[entity] if entity else None
+
+        self.flush()
+        with self._io_lock:
+            if self.read_only:
+                self.sealed = []
+                self._opened = False
+            if not self._opened:
+                self._open()
+            segments = [s for s in self.sealed + [self.active] if s.overlaps(start_ts, end_ts, actor_id)]
+            # Snapshot sizes so a concurrent commit can't hand us half a record
+            bounds = [(s.path, s.seek_offset(start_ts), s.size) for s in segments]
+
+        results: List[Dict[str, Any]] = []
+        for path, offset, size in bounds:
+            for rec_offset, ts, actor, rec_entity_id, rec_action, rec_entity, payload in _iter_records(path, offset):
+                if rec_offset >= size or ts > end_ts:
+                    break
+                if ts < start_ts:
+                    continue
+                if actor_id is not None and actor != actor_id:
+                    continue
+                if entity_id is not None and rec_entity_id != entity_id:
+                    continue
+                if action_code is not None and rec_action != action_code:
+                    continue
+                if entity_code is not None and rec_entity != entity_code:
+                    continue
+                results.append({
+                    "timestamp": datetime.fromtimestamp(ts / 1_000_000, tz=timezone.utc).isoformat(),
+                    "actor_id": actor or None,
+                    "action": ACTION_NAMES.get(rec_action, str(rec_action)),
+                    "entity": ENTITY_NAMES.get(rec_entity, str(rec_entity)),
+                    "entity_id": rec_entity_id,
+                    "changes": self._load_changes(payload),
+                })
+                if len(results) >= limit:
+                    return results
+        return results
+
+
+def diff_fields(before: Dict[str, Any], after: Dict[str, Any]) -> Dict[str, List[Any]]:
+    """{field: [old, new]} for every field whose value changed"""
+    return {
+        key: [before.get(key), value]
+        for key, value in after.items()
+        if before.get(key) != value
+    }
+
+
+def query_logs(logs: Iterable[AuditLog], start: Optional[datetime] = None, end: Optional[datetime] = None,
+               limit: int = 1000, **filters) -> List[Dict[str, Any]]:
+    """Query several logs (one per worker process) and merge them by time"""
+    results = [log.query(start, end, limit=limit, **filters) for log in logs]
+    return list(islice(heapq.merge(*results, key=lambda record: record["timestamp"]), limit))
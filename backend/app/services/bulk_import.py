@@ -0,0 +1,478 @@
+"""
+Bulk import of users and historical requests for AndesMindHack Backend
+
+Large CSV/Excel files are stream-parsed in fixed-size chunks, every row is
+validated with the API's own Pydantic models, passwords are hashed in a
+process pool and valid rows are written in batches (``COPY`` for
+PostgreSQL, bulk inserts for the in-memory store). Invalid rows are
+reported individually without aborting the import.
+
+Usage:
+    python -m app.services.bulk_import users usuarios.csv --database-url postgresql://...
+    python -m app.services.bulk_import requests historico.xlsx --dry-run
+"""
+
+import argparse
+import asyncio
+import csv
+import io
+import sys
+import time
+from concurrent.futures import Future
+from datetime import date, datetime
+from itertools import islice
+from typing import Optional, List, Dict, Any, Iterator, Iterable, Set, Tuple, BinaryIO
+
+from pydantic import ValidationError
+
+from app.core.config import get_settings
+from app.core.workers import process_pool, pool_size
+from app.models import UserRegister, RequestCreate, UserRole, RequestStatus
+from app.store import calculate_leave_units
+from app.services.validation import RequestIntervalIndex, ACTIVE_STATUSES, units_to_days
+
+DEFAULT_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+USER_COPY_COLUMNS = (
+    "email", "hashed_password", "name", "employee_id", "department",
+    "position", "role", "manager_id", "is_active", "created_at",
+)
+REQUEST_COPY_COLUMNS = (
+    "user_id", "policy_id", "start_date", "end_date", "business_days",
+    "duration_units", "calendar_days", "reason", "notes", "status", "half_day", "created_at", "updated_at",
+)
+
+
+# Parsing
+def iter_rows(stream: BinaryIO, filename: str) -> Iterator[Dict[str, Any]]:
+    """Yield one dict per data row, streaming from a CSV or Excel file"""
+    if filename.lower().endswith((".xlsx", ".xlsm")):
+        yield from _iter_excel_rows(stream)
+    else:
+        yield from _iter_csv_rows(stream)
+
+
+def _iter_csv_rows(stream: BinaryIO) -> Iterator[Dict[str, Any]]:
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    for row in csv.DictReader(text):
+        yield {key.strip(): value for key, value in row.items() if key and value not in (None, "")}
+
+
+def _iter_excel_rows(stream: BinaryIO) -> Iterator[Dict[str, Any]]:
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError("Excel import requires openpyxl (pip install openpyxl)")
+
+    workbook = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(cell).strip() if cell is not None else "" for cell in next(rows, ())]
+        for values in rows:
+            yield {key: value for key, value in zip(header, values) if key and value not in (None, "")}
+    finally:
+        workbook.close()
+
+
+def chunked(rows: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Tuple[int, Dict[str, Any]]]]:
+    """Group rows into lists of (row_number, row); row 1 is the header"""
+    if size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    numbered = enumerate(rows, start=2)
+    while True:
+        chunk = list(islice(numbered, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _parse_created_at(value: Any, start_date: date) -> datetime:
+    """Creation time of a historical row (default: midnight of its start date)"""
+    if value is None:
+        return datetime.combine(start_date, datetime.min.time())
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime.combine(value, datetime.min.time())
+    if isinstance(value, str):
+        return datetime.fromisoformat(value.strip())
+    raise ValueError(f"Unsupported created_at value: {value!r}")
+
+
+def _format_errors(exc: ValidationError) -> List[str]:
+    return [f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in exc.errors()]
+
+
+# Reporting
+class ImportReport:
+    """Per-import counters, row errors and throughput"""
+
+    def __init__(self, kind: str, dry_run: bool):
+        self.kind = kind
+        self.dry_run = dry_run
+        self.total_rows = 0
+        self.imported = 0
+        self.failed = 0
+        self.errors: List[Dict[str, Any]] = []
+        self._started = time.perf_counter()
+        self.elapsed_seconds = 0.0
+
+    def error(self, row_number: int, messages: List[str]) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row_number, "errors": messages})
+
+    def finish(self) -> "ImportReport":
+        self.elapsed_seconds = time.perf_counter() - self._started
+        return self
+
+    @property
+    def rows_per_second(self) -> float:
+        if self.elapsed_seconds <= 0:
+            return 0.0
+        return self.total_rows / self.elapsed_seconds
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "dry_run": self.dry_run,
+            "total_rows": self.total_rows,
+            "imported": self.imported,
+            "failed": self.failed,
+            "errors": sorted(self.errors, key=lambda error: error["row"]),
+            "errors_truncated": self.failed > len(self.errors),
+            "elapsed_seconds": round(self.elapsed_seconds, 3),
+            "rows_per_second": round(self.rows_per_second, 1),
+        }
+
+
+# Sinks
+class MemorySink:
+    """Writes into the in-memory FAKE_DB through the app's insert helpers
+
+    The store is owned by the event loop. When the import runs in a worker
+    thread, pass that ``loop``: rows are still parsed and validated in the
+    thread, but each batch is applied on the loop so ids and indexes never
+    race with request handlers.
+    """
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        from app import store
+        self._store = store
+        self._loop = loop
+
+    def _on_loop(self, fn, *args):
+        if self._loop is None:
+            return fn(*args)
+        done: Future = Future()
+
+        def run():
+            try:
+                done.set_result(fn(*args))
+            except BaseException as exc:
+                done.set_exception(exc)
+
+        self._loop.call_soon_threadsafe(run)
+        return done.result()
+
+    def find_existing(self, emails: Set[str], employee_ids: Set[str]) -> Tuple[Set[str], Set[str]]:
+        org = self._store.ORG
+        return (
+            {email for email in emails if email in org.users_by_email},
+            {emp for emp in employee_ids if emp in org.users_by_employee_id},
+        )
+
+    def resolve_user_ids(self, employee_ids: Set[str]) -> Dict[str, int]:
+        org = self._store.ORG
+        return {emp: org.users_by_employee_id[emp]["id"] for emp in employee_ids if emp in org.users_by_employee_id}
+
+    def policy_ids(self) -> Set[int]:
+        return {policy["id"] for policy in self._store.FAKE_DB["policies"]}
+
+    def find_overlap(self, row: Dict[str, Any]) -> Optional[int]:
+        if row["status"] not in ACTIVE_STATUSES:
+            return None
+        return self._store.VALIDATOR.intervals.find_overlap(row["user_id"], row["start_date"], row["end_date"])
+
+    def write_users(self, users: List[Dict[str, Any]]) -> None:
+        self._on_loop(self._write_users, users)
+
+    def _write_users(self, users: List[Dict[str, Any]]) -> None:
+        with self._store.write_transaction():
+            for user in users:
+                user["id"] = len(self._store.FAKE_DB["users"]) + 1
+                user["created_at"] = user["created_at"].isoformat()
+                self._store.insert_user(user)
+
+    def write_requests(self, requests: List[Dict[str, Any]]) -> None:
+        self._on_loop(self._write_requests, requests)
+
+    def _write_requests(self, requests: List[Dict[str, Any]]) -> None:
+        with self._store.write_transaction():
+            for request in requests:
+                request["id"] = len(self._store.FAKE_DB["requests"]) + 1
+                request["start_date"] = request["start_date"].isoformat()
+                request["end_date"] = request["end_date"].isoformat()
+                request["created_at"] = request["created_at"].isoformat()
+                request["updated_at"] = request["updated_at"].isoformat()
+                request["approver_id"] = None
+                self._store.insert_request(request)
+
+    def commit(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class PostgresSink:
+    """Writes batches into PostgreSQL with COPY FROM STDIN"""
+
+    def __init__(self, database_url: str):
+        import psycopg
+        self.conn = psycopg.connect(database_url)
+
+    def find_existing(self, emails: Set[str], employee_ids: Set[str]) -> Tuple[Set[str], Set[str]]:
+        with self.conn.cursor() as cur:
+            cur.execute(
+                "SELECT email, employee_id FROM users WHERE email = ANY(%s) OR employee_id = ANY(%s)",
+                (list(emails), list(employee_ids)),
+            )
+            rows = cur.fetchall()
+        return {r[0] for r in rows} & emails, {r[1] for r in rows} & employee_ids
+
+    def resolve_user_ids(self, employee_ids: Set[str]) -> Dict[str, int]:
+        with self.conn.cursor() as cur:
+            cur.execute("SELECT employee_id, id FROM users WHERE employee_id = ANY(%s)", (list(employee_ids),))
+            return dict(cur.fetchall())
+
+    def policy_ids(self) -> Set[int]:
+        with self.conn.cursor() as cur:
+            cur.execute("SELECT id FROM policies")
+            return {row[0] for row in cur.fetchall()}
+
+    def find_overlap(self, row: Dict[str, Any]) -> Optional[int]:
+        # Overlaps are enforced by the database constraints, not per row here
+        return None
+
+    def _copy(self, table: str, columns: Tuple[str, ...], rows: List[Dict[str, Any]]) -> None:
+        with self.conn.cursor() as cur:
+            with cur.copy(f"COPY {table} ({', '.join(columns)}) FROM STDIN") as copy:
+                for row in rows:
+                    copy.write_row(tuple(row[column] for column in columns))
+
+    def write_users(self, users: List[Dict[str, Any]]) -> None:
+        self._copy("users", USER_COPY_COLUMNS, users)
+
+    def write_requests(self, requests: List[Dict[str, Any]]) -> None:
+        self._copy("requests", REQUEST_COPY_COLUMNS, requests)
+
+    def commit(self) -> None:
+        self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+# Importers
+def import_users(rows: Iterable[Dict[str, Any]], sink, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 workers: Optional[int] = None, dry_run: bool = False) -> ImportReport:
+    """Validate, hash and insert users chunk by chunk"""
+    report = ImportReport("users", dry_run)
+    seen_emails: Set[str] = set()
+    seen_employee_ids: Set[str] = set()
+
+    for chunk in chunked(rows, chunk_size):
+        report.total_rows += len(chunk)
+        valid: List[Tuple[int, UserRegister, UserRole]] = []
+
+        for row_number, row in chunk:
+            try:
+                user = UserRegister(**row)
+                role = UserRole(row.get("role", UserRole.EMPLOYEE.value))
+            except ValidationError as exc:
+                report.error(row_number, _format_errors(exc))
+                continue
+            except ValueError:
+                report.error(row_number, [f"role: invalid role {row.get('role')!r}"])
+                continue
+            valid.append((row_number, user, role))
+
+        existing_emails, existing_employee_ids = sink.find_existing(
+            {user.email for _, user, _ in valid},
+            {user.employee_id for _, user, _ in valid},
+        )
+
+        accepted: List[Tuple[UserRegister, UserRole]] = []
+        for row_number, user, role in valid:
+            if user.email in existing_emails or user.email in seen_emails:
+                report.error(row_number, ["email: Email already registered"])
+            elif user.employee_id in existing_employee_ids or user.employee_id in seen_employee_ids:
+                report.error(row_number, ["employee_id: Employee ID already exists"])
+            else:
+                seen_emails.add(user.email)
+                seen_employee_ids.add(user.employee_id)
+                accepted.append((user, role))
+
+        if dry_run or not accepted:
+            report.imported += len(accepted)
+            continue
+
+        # bcrypt is CPU bound: hash in the shared process pool
+        from app.core.security import get_password_hash
+        pool = process_pool(workers)
+        hashes = pool.map(get_password_hash, [user.password for user, _ in accepted],
+                          chunksize=max(1, len(accepted) // (4 * pool_size())))
+        now = datetime.utcnow()
+        sink.write_users([
+            {
+                "email": user.email,
+                "hashed_password": hashed,
+                "name": user.name,
+                "employee_id": user.employee_id,
+                "department": user.department,
+                "position": user.position,
+                "role": role.value,
+                "manager_id": None,
+                "is_active": True,
+                "created_at": now,
+            }
+            for (user, role), hashed in zip(accepted, hashes)
+        ])
+        sink.commit()
+        report.imported += len(accepted)
+
+    return report.finish()
+
+
+def import_requests(rows: Iterable[Dict[str, Any]], sink, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                    dry_run: bool = False) -> ImportReport:
+    """Validate and insert historical requests chunk by chunk
+
+    Rows reference their owner by ``employee_id``. Historical rows may be in
+    the past and carry their final ``status`` (default: approved).
+    """
+    report = ImportReport("requests", dry_run)
+    policy_ids = sink.policy_ids()
+    file_intervals = RequestIntervalIndex()
+
+    for chunk in chunked(rows, chunk_size):
+        report.total_rows += len(chunk)
+        user_ids = sink.resolve_user_ids({row["employee_id"] for _, row in chunk if "employee_id" in row})
+        accepted: List[Dict[str, Any]] = []
+
+        for row_number, row in chunk:
+            try:
+                data = RequestCreate(**row)
+                status = RequestStatus(row.get("status", RequestStatus.APPROVED.value))
+            except ValidationError as exc:
+                report.error(row_number, _format_errors(exc))
+                continue
+            except ValueError:
+                report.error(row_number, [f"status: invalid status {row.get('status')!r}"])
+                continue
+
+            user_id = user_ids.get(row.get("employee_id"))
+            if user_id is None:
+                report.error(row_number, ["employee_id: Unknown employee"])
+                continue
+            if data.policy_id not in policy_ids:
+                report.error(row_number, ["policy_id: Policy not found"])
+                continue
+
+            try:
+                created_at = _parse_created_at(row.get("created_at"), data.start_date)
+            except ValueError:
+                report.error(row_number, [f"created_at: invalid datetime {row.get('created_at')!r}"])
+                continue
+
+            units = calculate_leave_units(data.start_date, data.end_date, data.half_day)
+            request = {
+                "user_id": user_id,
+                "policy_id": data.policy_id,
+                "start_date": data.start_date,
+                "end_date": data.end_date,
+                "business_days": units_to_days(units),
+                "duration_units": units,
+                "calendar_days": (data.end_date - data.start_date).days + 1,
+                "reason": data.reason,
+                "notes": data.notes,
+                "status": status.value,
+                "half_day": data.half_day,
+                "created_at": created_at,
+                "updated_at": created_at,
+            }
+
+            # Check against stored history and against earlier rows of this file
+            overlapping = sink.find_overlap(request)
+            if overlapping is None and status.value in ACTIVE_STATUSES:
+                overlapping = file_intervals.find_overlap(user_id, data.start_date, data.end_date)
+                if overlapping is not None:
+                    overlapping = f"in row {overlapping}"
+            if overlapping is not None:
+                report.error(row_number, [f"start_date: Overlaps with request {overlapping}"])
+                continue
+
+            if status.value in ACTIVE_STATUSES:
+                file_intervals.add(user_id, data.start_date, data.end_date, row_number)
+            accepted.append(request)
+
+        if not dry_run and accepted:
+            sink.write_requests(accepted)
+            sink.commit()
+        report.imported += len(accepted)
+
+    return report.finish()
+
+
+def run_import(kind: str, stream: BinaryIO, filename: str, sink, chunk_size: int = DEFAULT_CHUNK_SIZE,
+               workers: Optional[int] = None, dry_run: bool = False) -> ImportReport:
+    """Entry point shared by the admin endpoint and the CLI"""
+    rows = iter_rows(stream, filename)
+    if kind == "users":
+        return import_users(rows, sink, chunk_size=chunk_size, workers=workers, dry_run=dry_run)
+    if kind == "requests":
+        return import_requests(rows, sink, chunk_size=chunk_size, dry_run=dry_run)
+    raise ValueError(f"Unknown import kind: {kind}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk import users or historical requests")
+    parser.add_argument("kind", choices=["users", "requests"])
+    parser.add_argument("file", help="CSV or Excel (.xlsx) file")
+    parser.add_argument("--database-url", default=get_settings().DATABASE_URL)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=None, help="Password hashing processes")
+    parser.add_argument("--dry-run", action="store_true", help="Validate only, write nothing")
+    args = parser.parse_args(argv)
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be at least 1")
+
+    if args.database_url and not args.dry_run:
+        sink = PostgresSink(args.database_url)
+    elif args.dry_run:
+        sink = MemorySink()
+    else:
+        parser.error("--database-url (or DATABASE_URL) is required unless --dry-run is given")
+
+    try:
+        with open(args.file, "rb") as stream:
+            report = run_import(args.kind, stream, args.file, sink, chunk_size=args.chunk_size,
+                                workers=args.workers, dry_run=args.dry_run)
+    finally:
+        sink.close()
+
+    summary = report.to_dict()
+    for error in summary["errors"]:
+        print(f"row {error['row']}: {'; '.join(error['errors'])}", file=sys.stderr)
+    print(
+        f"{summary['imported']}/{summary['total_rows']} {args.kind} imported, "
+        f"{summary['failed']} failed in {summary['elapsed_seconds']}s "
+        f"({summary['rows_per_second']} rows/s)"
+    )
+    return 0 if summary["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
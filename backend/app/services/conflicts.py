@@ -0,0 +1,226 @@
+"""
+Organization-wide staffing conflict detection for AndesMindHack Backend
+
+Every request overlapping the planning period becomes a start and an end
+event; one sorted sweep per department keeps the set of people absent and
+emits the stretches where the people left working fall below the staffing
+threshold, together with the requests responsible. The whole company is
+O(n log n) in the number of requests. Large periods are split by
+department across the shared process pool.
+"""
+
+import math
+import threading
+import time
+import uuid
+from datetime import date, datetime
+from typing import Optional, List, Dict, Any, Iterable, Tuple
+
+from app.core.workers import pool_size, process_pool
+from app.services.holidays import business_days_between
+
+# (request_id, user_id, start_ordinal, end_ordinal)
+Interval = Tuple[int, int, int, int]
+
+POOL_MIN_REQUESTS = 20000
+MAX_FINISHED_JOBS = 100
+
+
+def sweep_department(department: str, headcount: int, intervals: List[Interval],
+                     period_start: int, period_end: int, threshold: float) -> List[Dict[str, Any]]:
+    """Stretches of ``department`` where available staff < ceil(threshold * headcount)"""
+    required = math.ceil(threshold * headcount)
+    events = []
+    for request_id, user_id, start, end in intervals:
+        start, end = max(start, period_start), min(end, period_end)
+        if start <= end:
+            events.append((start, 1, request_id, user_id))
+            events.append((end + 1, -1, request_id, user_id))
+    # Ends sort before starts on the same day
+    events.sort()
+
+    conflicts: List[Dict[str, Any]] = []
+    active: Dict[int, int] = {}
+    absent_users: Dict[int, int] = {}
+    for i, (day, kind, request_id, user_id) in enumerate(events):
+        if kind > 0:
+            active[request_id] = user_id
+            absent_users[user_id] = absent_users.get(user_id, 0) + 1
+        else:
+            del active[request_id]
+            absent_users[user_id] -= 1
+            if not absent_users[user_id]:
+                del absent_users[user_id]
+
+        # Absences only change at event days: evaluate each stretch once
+        if i + 1 < len(events) and events[i + 1][0] == day:
+            continue
+        if not active:
+            continue
+        stretch_end = events[i + 1][0] - 1 if i + 1 < len(events) else period_end
+        available = headcount - len(absent_users)
+        business_days = business_days_between(day, stretch_end)
+        if available >= required or not business_days:
+            continue
+
+        previous = conflicts[-1] if conflicts else None
+        request_ids = sorted(active)
+        if (previous and previous["_end"] + 1 == day and previous["available"] == available
+                and previous["request_ids"] == request_ids):
+            previous["_end"] = stretch_end
+            previous["business_days"] += business_days
+            continue
+        conflicts.append({
+            "department": department,
+            "_start": day,
+            "_end": stretch_end,
+            "headcount": headcount,
+            "required": required,
+            "available": available,
+            "absent": len(absent_users),
+            "business_days": business_days,
+            "request_ids": request_ids,
+        })
+
+    for conflict in conflicts:
+        conflict["start_date"] = date.fromordinal(conflict.pop("_start")).isoformat()
+        conflict["end_date"] = date.fromordinal(conflict.pop("_end")).isoformat()
+    return conflicts
+
+
+def _sweep_job(args: Tuple) -> List[Dict[str, Any]]:
+    return sweep_department(*args)
+
+
+def department_headcounts(org, departments: Optional[Iterable[str]] = None) -> Dict[str, Tuple[int, List[int]]]:
+    """Per department: (active headcount, member ids), a snapshot of the org graph
+
+    Proportional to the number of users, so it is cheap enough to take on
+    the event loop where the graph is mutated.
+    """
+    selected = set(departments) if departments is not None else None
+    result: Dict[str, Tuple[int, List[int]]] = {}
+    for department, member_ids in org.department_members.items():
+        if not department or (selected is not None and department not in selected):
+            continue
+        members = list(member_ids)
+        headcount = sum(1 for uid in members if org.users_by_id[uid].get("is_active", True))
+        if headcount:
+            result[department] = (headcount, members)
+    return result
+
+
+def collect_intervals(cols, headcounts: Dict[str, Tuple[int, List[int]]], start_date: date, end_date: date,
+                      statuses: Iterable[str]) -> Dict[str, Tuple[int, List[Interval]]]:
+    """Per department: (active headcount, request intervals overlapping the period)
+
+    ``cols`` are ``RequestColumns`` views and ``headcounts`` comes from
+    ``department_headcounts``: the period filter is a vectorized comparison
+    of day numbers, so it runs off the event loop without parsing dates.
+    """
+    from app.services.columnar import RequestColumns
+
+    department_of = {uid: department for department, (_, members) in headcounts.items() for uid in members}
+    mask = RequestColumns.overlap_mask(cols, start_date, end_date, statuses, department_of)
+    result: Dict[str, Tuple[int, List[Interval]]] = {
+        department: (headcount, []) for department, (headcount, _) in headcounts.items()
+    }
+    rows = zip(*(cols[name][mask].tolist() for name in ("id", "user_id", "start", "end")))
+    for request_id, user_id, start, end in rows:
+        result[department_of[user_id]][1].append((request_id, user_id, start, end))
+    return result
+
+
+def detect_conflicts(by_department: Dict[str, Tuple[int, List[Interval]]], start_date: date,
+                     end_date: date, threshold: float, workers: Optional[int] = None,
+                     pool_min_requests: int = POOL_MIN_REQUESTS) -> Dict[str, Any]:
+    """Sweep every department for understaffed stretches in [start_date, end_date]
+
+    ``by_department`` comes from ``collect_intervals``. Large analyses are
+    split by department across the shared process pool.
+    """
+    started = time.perf_counter()
+    period_start, period_end = start_date.toordinal(), end_date.toordinal()
+    jobs = [
+        (department, headcount, intervals, period_start, period_end, threshold)
+        for department, (headcount, intervals) in sorted(by_department.items())
+    ]
+    total_requests = sum(len(job[2]) for job in jobs)
+
+    workers = workers or pool_size()
+    if total_requests >= pool_min_requests and len(jobs) > 1 and workers > 1:
+        # Largest departments first so one big team does not finish last
+        order = sorted(range(len(jobs)), key=lambda i: -len(jobs[i][2]))
+        results = dict(zip(order, process_pool(workers).map(_sweep_job, [jobs[i] for i in order])))
+        per_department = [results[i] for i in range(len(jobs))]
+        mode = "process_pool"
+    else:
+        per_department = [_sweep_job(job) for job in jobs]
+        mode = "inline"
+
+    conflicts = [conflict for found in per_department for conflict in found]
+    affected: Dict[str, int] = {}
+    for conflict in conflicts:
+        affected[conflict["department"]] = affected.get(conflict["department"], 0) + conflict["business_days"]
+
+    return {
+        "period": {
+            "start_date": start_date.isoformat(),
+            "end_date": end_date.isoformat()
+        },
+        "threshold": threshold,
+        "conflicts": conflicts,
+        "summary": {
+            "departments_analyzed": len(jobs),
+            "requests_analyzed": total_requests,
+            "conflicts": len(conflicts),
+            "business_days_by_department": affected,
+            "mode": mode,
+            "seconds": round(time.perf_counter() - started, 3)
+        }
+    }
+
+
+class ConflictJobs:
+    """Background conflict analyses, kept in memory until evicted"""
+
+    def __init__(self, max_finished: int = MAX_FINISHED_JOBS):
+        self.max_finished = max_finished
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, params: Dict[str, Any], owner_id: int) -> Dict[str, Any]:
+        job = {
+            "id": uuid.uuid4().hex,
+            "status": "pending",
+            "owner_id": owner_id,
+            "params": params,
+            "created_at": datetime.utcnow().isoformat(),
+            "finished_at": None,
+            "result": None,
+            "error": None
+        }
+        with self._lock:
+            self._evict()
+            self._jobs[job["id"]] = job
+        return job
+
+    def run(self, job_id: str, fn, *args, **kwargs) -> None:
+        """Execute a submitted job (call from a worker thread)"""
+        job = self._jobs[job_id]
+        job["status"] = "running"
+        try:
+            job["result"] = fn(*args, **kwargs)
+            job["status"] = "completed"
+        except Exception as exc:
+            job["error"] = str(exc)
+            job["status"] = "failed"
+        job["finished_at"] = datetime.utcnow().isoformat()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self._jobs.get(job_id)
+
+    def _evict(self) -> None:
+        finished = [job for job in self._jobs.values() if job["finished_at"]]
+        for job in sorted(finished, key=lambda j: j["finished_at"])[:max(0, len(finished) - self.max_finished + 1)]:
+            del self._jobs[job["id"]]
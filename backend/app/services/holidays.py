@@ -0,0 +1,70 @@
+"""
+Colombian public holidays and business-day counting
+
+Fixed-date holidays, holidays moved to the following Monday by Ley 51 de
+1983 ("Ley Emiliani") and the Easter-based religious holidays, computed
+for any year without external data. Leave is charged in business days:
+Monday to Friday, holidays excluded.
+"""
+
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import FrozenSet
+
+# Always observed on the calendar date
+FIXED = ((1, 1), (5, 1), (7, 20), (8, 7), (12, 8), (12, 25))
+
+# Moved to the next Monday when they do not fall on one
+EMILIANI = ((1, 6), (3, 19), (6, 29), (8, 15), (10, 12), (11, 1), (11, 11))
+
+# Offsets from Easter Sunday: Holy Thursday and Good Friday are observed
+# as is; Ascension, Corpus Christi and Sacred Heart land on Mondays
+EASTER_OFFSETS = (-3, -2, 43, 64, 71)
+
+
+def easter_sunday(year: int) -> date:
+    """Gregorian Easter (anonymous computus)"""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _next_monday(day: date) -> date:
+    return day + timedelta(days=(7 - day.weekday()) % 7)
+
+
+@lru_cache(maxsize=64)
+def colombian_holidays(year: int) -> FrozenSet[date]:
+    holidays = {date(year, month, day) for month, day in FIXED}
+    holidays.update(_next_monday(date(year, month, day)) for month, day in EMILIANI)
+    easter = easter_sunday(year)
+    holidays.update(easter + timedelta(days=offset) for offset in EASTER_OFFSETS)
+    return frozenset(holidays)
+
+
+def holidays_between(start: date, end: date) -> FrozenSet[date]:
+    """Holidays in [start, end]"""
+    found = set()
+    for year in range(start.year, end.year + 1):
+        found.update(d for d in colombian_holidays(year) if start <= d <= end)
+    return frozenset(found)
+
+
+def business_days_between(start: int, end: int) -> int:
+    """Business days in the ordinal range [start, end]"""
+    if end < start:
+        return 0
+    # date.toordinal(): day 1 is a Monday
+    full_weeks, rest = divmod(end - start + 1, 7)
+    first = (start - 1) % 7
+    weekdays = full_weeks * 5 + sum(1 for i in range(rest) if (first + i) % 7 < 5)
+    holidays = holidays_between(date.fromordinal(start), date.fromordinal(end))
+    return weekdays - sum(1 for d in holidays if d.weekday() < 5)
@@ -0,0 +1,205 @@
+"""
+Organizational graph for AndesMindHack Backend
+
+Precomputed role-scoped visibility: department -> member ids and
+request ids, employee -> approver chain, manager -> managed department.
+The graph is maintained incrementally on every user/request mutation so
+authorization and filter decisions never rescan the whole user table.
+"""
+
+from collections import defaultdict
+from typing import Optional, List, Dict, Set, Iterable, Tuple
+
+_UNMANAGED = object()
+
+class OrgGraph:
+    """Incrementally maintained indexes over users and requests"""
+
+    def __init__(self):
+        self.users_by_id: Dict[int, Dict] = {}
+        self.users_by_email: Dict[str, Dict] = {}
+        self.users_by_employee_id: Dict[str, Dict] = {}
+        self.department_members: Dict[Optional[str], Set[int]] = defaultdict(set)
+        self.department_managers: Dict[Optional[str], List[int]] = defaultdict(list)
+        self.hr_admins: List[int] = []
+        self.requests_by_id: Dict[int, Dict] = {}
+        self.requests_by_user: Dict[int, Set[int]] = defaultdict(set)
+        self.pending_ids: Set[int] = set()
+        # A manager sees the requests of their department: one request id
+        # set per department, shared by all of its managers
+        self.department_requests: Dict[Optional[str], Set[int]] = defaultdict(set)
+        self._managed_department: Dict[int, Optional[str]] = {}
+        self._direct_reports: Dict[int, Set[int]] = defaultdict(set)
+        self._chains: Dict[int, Tuple[int, ...]] = {}
+
+    @classmethod
+    def build(cls, users: Iterable[Dict], requests: Iterable[Dict]) -> "OrgGraph":
+        """Build the graph from the raw user and request rows"""
+        graph = cls()
+        for user in users:
+            graph.add_user(user)
+        for request in requests:
+            graph.add_request(request)
+        return graph
+
+    # Users
+    def add_user(self, user: Dict) -> None:
+        """Index a newly created user"""
+        self.users_by_id[user["id"]] = user
+        self.users_by_email[user["email"]] = user
+        self.users_by_employee_id[user["employee_id"]] = user
+        self._attach(user)
+
+    def update_user(self, user_id: int, **changes) -> Dict:
+        """Apply role/department/manager/activation changes and re-link the graph"""
+        user = self.users_by_id[user_id]
+        self._detach(user)
+        if "email" in changes:
+            self.users_by_email.pop(user["email"], None)
+        if "employee_id" in changes:
+            self.users_by_employee_id.pop(user["employee_id"], None)
+        user.update(changes)
+        self.users_by_email[user["email"]] = user
+        self.users_by_employee_id[user["employee_id"]] = user
+        self._attach(user)
+        return user
+
+    def _attach(self, user: Dict) -> None:
+        dept = user.get("department")
+        self.department_members[dept].add(user["id"])
+        # A moved user brings their requests into the new department's scope
+        self.department_requests[dept].update(self.requests_by_user[user["id"]])
+        if user.get("manager_id"):
+            self._direct_reports[user["manager_id"]].add(user["id"])
+
+        if user.get("is_active", True):
+            if user["role"] == "manager":
+                self._insert_sorted(self.department_managers[dept], user["id"])
+                self._managed_department[user["id"]] = dept
+            elif user["role"] == "hr_admin":
+                self._insert_sorted(self.hr_admins, user["id"])
+
+        self._invalidate_chains(dept, user)
+
+    def _detach(self, user: Dict) -> None:
+        dept = user.get("department")
+        self.department_members[dept].discard(user["id"])
+        self.department_requests[dept].difference_update(self.requests_by_user[user["id"]])
+        if user.get("manager_id"):
+            self._direct_reports[user["manager_id"]].discard(user["id"])
+
+        if self._managed_department.pop(user["id"], _UNMANAGED) is not _UNMANAGED:
+            self.department_managers[dept].remove(user["id"])
+        if user["id"] in self.hr_admins:
+            self.hr_admins.remove(user["id"])
+
+        self._invalidate_chains(dept, user)
+
+    def _invalidate_chains(self, dept: Optional[str], user: Dict) -> None:
+        if user["role"] == "hr_admin":
+            self._chains.clear()
+            return
+        self._chains.pop(user["id"], None)
+        if user["role"] == "manager":
+            for member_id in self.department_members[dept]:
+                self._chains.pop(member_id, None)
+            for subordinate_id in self._direct_reports.get(user["id"], ()):
+                self._chains.pop(subordinate_id, None)
+
+    @staticmethod
+    def _insert_sorted(ids: List[int], user_id: int) -> None:
+        if user_id not in ids:
+            ids.append(user_id)
+            ids.sort()
+
+    # Requests
+    def add_request(self, request: Dict) -> None:
+        """Index a newly created request and grant visibility to its approvers"""
+        request_id = request["id"]
+        self.requests_by_id[request_id] = request
+        self.requests_by_user[request["user_id"]].add(request_id)
+        if request["status"] == "pending":
+            self.pending_ids.add(request_id)
+
+        owner = self.users_by_id.get(request["user_id"])
+        if owner is not None:
+            self.department_requests[owner.get("department")].add(request_id)
+
+    def set_request_status(self, request: Dict, status: str) -> None:
+        """Update a request status keeping the pending index in sync"""
+        request["status"] = status
+        if status == "pending":
+            self.pending_ids.add(request["id"])
+        else:
+            self.pending_ids.discard(request["id"])
+
+    # Queries
+    def approver_chain(self, user_id: int) -> Tuple[int, ...]:
+        """Ordered approver ids: direct manager, department managers, HR"""
+        chain = self._chains.get(user_id)
+        if chain is not None:
+            return chain
+
+        user = self.users_by_id[user_id]
+        ordered: List[int] = []
+        direct = user.get("manager_id")
+        if direct and direct in self.users_by_id and direct != user_id:
+            ordered.append(direct)
+        if user["role"] == "employee":
+            ordered.extend(self.department_managers[user.get("department")])
+        if user["role"] != "hr_admin":
+            ordered.extend(self.hr_admins)
+
+        chain = tuple(dict.fromkeys(uid for uid in ordered if uid != user_id))
+        self._chains[user_id] = chain
+        return chain
+
+    def department_manager(self, user: Dict) -> Optional[Dict]:
+        """First manager of the user's department (the default approver)"""
+        if user["role"] != "employee":
+            return None
+        for approver_id in self.approver_chain(user["id"]):
+            approver = self.users_by_id[approver_id]
+            if approver["role"] == "manager":
+                return approver
+        return None
+
+    def _managed_request_ids(self, user: Dict) -> Set[int]:
+        if user["id"] not in self._managed_department:
+            return set()
+        return self.department_requests[self._managed_department[user["id"]]]
+
+    def visible_request_ids(self, user: Dict) -> Set[int]:
+        """Request ids the user is allowed to see"""
+        if user["role"] == "hr_admin":
+            return set(self.requests_by_id)
+        visible = self.requests_by_user[user["id"]]
+        if user["role"] == "manager":
+            return visible | self._managed_request_ids(user)
+        return set(visible)
+
+    def can_view_request(self, user: Dict, request: Dict) -> bool:
+        """Authorization check for reading a single request"""
+        if user["role"] == "hr_admin" or request["user_id"] == user["id"]:
+            return True
+        return request["id"] in self._managed_request_ids(user)
+
+    def can_decide_request(self, user: Dict, request: Dict) -> bool:
+        """Authorization check for approving or rejecting a request"""
+        if request["user_id"] == user["id"]:
+            return False
+        if user["role"] == "hr_admin":
+            return True
+        return user["id"] in self.approver_chain(request["user_id"])
+
+    def pending_for(self, user: Dict) -> List[Dict]:
+        """Pending requests visible to a manager or HR admin, in id order"""
+        if user["role"] == "hr_admin":
+            ids = self.pending_ids
+        else:
+            ids = self.pending_ids & self._managed_request_ids(user)
+        return [self.requests_by_id[rid] for rid in sorted(ids)]
+
+    def department_member_ids(self, department: Optional[str]) -> Set[int]:
+        """Member ids of a department"""
+        return self.department_members.get(department, set())
@@ -0,0 +1,496 @@
+"""
+Snapshot + WAL durability for the in-memory FAKE_DB store
+
+Every mutation is appended to a write-ahead log before the request
+returns. Periodically a full snapshot is written through a memory-mapped
+file: the WAL is rotated at the snapshot point, then a worker thread
+pickles the rows in short slices under the write lock, releasing the lock
+(and the GIL) between slices so neither request handlers nor the event
+loop wait for the whole table; older segments are dropped once the
+snapshot is durable. Rows written while the slices are taken may already
+show their newer values. That is harmless because replay is idempotent:
+inserts of rows already present are skipped and updates carry absolute
+values, so replaying the segment after the snapshot point ends in the
+same state. On startup the latest snapshot is mapped and unpickled, then
+the WAL tail is replayed. An optional columnar side table
+(``DurableStore.columns``) is saved next to each snapshot so it can be
+memory-mapped instead of rebuilt after a restart.
+
+In shared mode several worker processes use the same directory: writers
+serialize on an ``flock`` and catch up with the WAL before mutating, and
+every worker tails the WAL to apply the other workers' changes, so all of
+them converge on the same store.
+"""
+
+import asyncio
+import gc
+import logging
+import mmap
+import os
+import pickle
+import shutil
+import struct
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from typing import Optional, List, Dict, Any, Iterator, Tuple, Callable
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process mode only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+WAL_HEADER = struct.Struct("<II")
+SNAPSHOT_NAME = "fakedb.snapshot"
+WAL_LOCK_NAME = "wal.lock"
+SNAPSHOT_LOCK_NAME = "snapshot.lock"
+PICKLE_PROTOCOL = 5
+
+
+def _wal_name(first_seq: int) -> str:
+    return f"fakedb-{first_seq:012d}.wal"
+
+
+def _wal_first_seq(name: str) -> int:
+    return int(name[7:19])
+
+
+def _columns_name(seq: int) -> str:
+    return f"columns-{seq:012d}"
+
+
+def _write_snapshot(path: str, frames: List[bytes]) -> None:
+    """Write pickled ``frames`` back to back into ``path`` through a memory map, atomically"""
+    size = sum(len(frame) for frame in frames)
+    tmp = path + ".tmp"
+    with open(tmp, "wb+") as f:
+        f.truncate(size)
+        with mmap.mmap(f.fileno(), size) as mm:
+            offset = 0
+            for frame in frames:
+                mm[offset:offset + len(frame)] = frame
+                offset += len(frame)
+            mm.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _read_snapshot(mm: mmap.mmap) -> Tuple[int, Dict[str, List[Dict]]]:
+    """(seq, tables) from a snapshot: a header frame, then each table's row slices"""
+    header = pickle.load(mm)
+    if "db" in header:  # single-frame snapshots of earlier versions
+        return header["seq"], header["db"]
+    tables: Dict[str, List[Dict]] = {}
+    for table, frames in header["tables"]:
+        rows = tables[table] = []
+        for _ in range(frames):
+            rows.extend(pickle.load(mm))
+    return header["seq"], tables
+
+
+# Rows pickled per hold of the write lock while snapshotting (a few ms)
+SNAPSHOT_SLICE_ROWS = 5000
+
+
+def _iter_wal(path: str, offset: int = 0) -> Iterator[Tuple[int, Tuple]]:
+    """Yield (end_offset, record) for each intact WAL record after ``offset``"""
+    with open(path, "rb") as f:
+        f.seek(offset)
+        while True:
+            header = f.read(WAL_HEADER.size)
+            if len(header) < WAL_HEADER.size:
+                return
+            length, crc = WAL_HEADER.unpack(header)
+            body = f.read(length)
+            if len(body) < length or zlib.crc32(body) != crc:
+                return
+            offset += WAL_HEADER.size + length
+            yield offset, pickle.loads(body)
+
+
+class DurableStore:
+    """Write-ahead log plus periodic snapshots of a dict of row tables"""
+
+    def __init__(self, directory: str, fsync: str = "everysec", shared: bool = False,
+                 apply: Optional[Callable[[str, str, List[Any]], None]] = None):
+        if shared and fcntl is None:
+            raise RuntimeError("Shared persistence requires fcntl (POSIX)")
+        self.directory = directory
+        self.fsync = fsync
+        self.shared = shared
+        # Applies another process's record to the live store (shared mode)
+        self.apply = apply
+        self.seq = 0
+        self.snapshot_seq = 0
+        self.snapshot_in_progress = False
+        self.diverged = False
+        self._lock = threading.Lock()
+        self._wal = None
+        self._dirty = False
+        self._syncer: Optional[threading.Thread] = None
+        os.makedirs(directory, exist_ok=True)
+
+        # Shared mode: cross-process write lock and WAL tail position
+        self._tx_lock = threading.RLock()
+        self._tx_depth = 0
+        self._lock_file = open(os.path.join(directory, WAL_LOCK_NAME), "a+b") if shared else None
+        self._snapshot_lock_file = None
+        self._tail_name: Optional[str] = None
+        self._tail_offset = 0
+        self._tail_dir_mtime = 0
+        self.appended = 0
+
+        # Columnar copy of a table, saved with every snapshot: any object
+        # with ``copy()`` and ``save(directory)`` (``RequestColumns``)
+        self.columns = None
+        self.recovered_seq: Optional[int] = None
+
+    @property
+    def snapshot_path(self) -> str:
+        return os.path.join(self.directory, SNAPSHOT_NAME)
+
+    def _columns_dirs(self) -> List[str]:
+        return sorted(n for n in os.listdir(self.directory) if n.startswith("columns-"))
+
+    def saved_columns(self) -> Optional[str]:
+        """Directory of the columns saved with the recovered snapshot, if any"""
+        if self.recovered_seq is None:
+            return None
+        path = os.path.join(self.directory, _columns_name(self.recovered_seq))
+        return path if os.path.isdir(path) else None
+
+    def _wal_files(self) -> List[str]:
+        return sorted(n for n in os.listdir(self.directory) if n.startswith("fakedb-") and n.endswith(".wal"))
+
+    # Recovery
+    def recover(self, db: Dict[str, List[Dict]]) -> Dict[str, Any]:
+        """Load the snapshot and replay the WAL tail into ``db`` in place
+
+        ``db`` keeps its seed contents when nothing has been persisted yet.
+        """
+        started = time.perf_counter()
+        replayed = skipped = 0
+        if self.shared:
+            # No writer may be mid-append while a torn tail is truncated
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+
+        # Millions of freshly unpickled dicts would otherwise trigger
+        # repeated full GC passes that dominate load time
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            if os.path.exists(self.snapshot_path):
+                with open(self.snapshot_path, "rb") as f:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        seq, tables = _read_snapshot(mm)
+                db.clear()
+                db.update(tables)
+                self.seq = self.snapshot_seq = self.recovered_seq = seq
+
+            indexes: Dict[str, Dict[int, Dict]] = {}
+            for name in self._wal_files():
+                path = os.path.join(self.directory, name)
+                valid_size = 0
+                for valid_size, (seq, op, table, *args) in _iter_wal(path):
+                    if seq <= self.seq:
+                        continue
+                    if self._apply(db, indexes, op, table, args):
+                        replayed += 1
+                    else:
+                        skipped += 1
+                        logger.warning("WAL record %d in %s: %s of missing %s row %r skipped",
+                                       seq, name, op, table, args[0])
+                    self.seq = seq
+                # Drop a torn tail so new appends start on a record boundary
+                if os.path.getsize(path) != valid_size:
+                    with open(path, "r+b") as f:
+                        f.truncate(valid_size)
+                self._tail_name, self._tail_offset = name, valid_size
+                self.snapshot_seq = max(self.snapshot_seq, _wal_first_seq(name) - 1)
+        finally:
+            if self.shared:
+                fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+            if gc_was_enabled:
+                gc.enable()
+            gc.freeze()
+
+        return {
+            "snapshot_seq": self.snapshot_seq,
+            "replayed": replayed,
+            "skipped": skipped,
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+
+    @staticmethod
+    def _apply(db: Dict[str, List[Dict]], indexes: Dict[str, Dict[int, Dict]],
+               op: str, table: str, args: List[Any]) -> bool:
+        """Apply one record; False when it updates a row that doesn't exist"""
+        # Replay is idempotent: an insert already in the snapshot is ignored
+        if table not in indexes:
+            indexes[table] = {row["id"]: row for row in db.setdefault(table, [])}
+        if op == "insert":
+            row = args[0]
+            if row["id"] not in indexes[table]:
+                db[table].append(row)
+                indexes[table][row["id"]] = row
+        elif op == "update":
+            row_id, changes = args
+            row = indexes[table].get(row_id)
+            if row is None:
+                return False
+            row.update(changes)
+        return True
+
+    # Shared mode
+    def sync(self, force: bool = False) -> int:
+        """Apply records appended by other processes; returns how many were applied
+
+        Cheap when nothing changed: one ``stat`` of the tail segment and one
+        of the directory (a new segment appears after a snapshot).
+        """
+        if not self.shared or self.diverged:
+            return 0
+        with self._tx_lock:
+            if not force and self._tail_name is not None:
+                try:
+                    size = os.stat(os.path.join(self.directory, self._tail_name)).st_size
+                    dir_mtime = os.stat(self.directory).st_mtime_ns
+                except FileNotFoundError:
+                    size, dir_mtime = -1, -1
+                if size == self._tail_offset and dir_mtime == self._tail_dir_mtime:
+                    return 0
+            self._tail_dir_mtime = os.stat(self.directory).st_mtime_ns
+            applied = 0
+            files = self._wal_files()
+            if self._tail_name is None and files:
+                self._tail_name, self._tail_offset = files[0], 0
+            while self._tail_name is not None:
+                path = os.path.join(self.directory, self._tail_name)
+                if os.path.exists(path):
+                    for self._tail_offset, (seq, op, table, *args) in _iter_wal(path, self._tail_offset):
+                        if seq <= self.seq:
+                            continue
+                        if seq != self.seq + 1:
+                            self.diverged = True
+                            raise RuntimeError(f"WAL gap: expected record {self.seq + 1}, found {seq}")
+                        self.apply(op, table, args)
+                        self.seq = seq
+                        applied += 1
+                newer = [name for name in files if name > self._tail_name]
+                if not newer:
+                    break
+                # A newer segment starts where a snapshot was taken
+                self._tail_name, self._tail_offset = newer[0], 0
+                self.snapshot_seq = max(self.snapshot_seq, _wal_first_seq(newer[0]) - 1)
+            return applied
+
+    @contextmanager
+    def locked(self) -> Iterator[None]:
+        """Exclusive write section, across processes in shared mode
+
+        Re-entrant within a process. Snapshots pickle the store in slices
+        inside it, so a write never lands in the middle of a pickled row.
+        In shared mode it also starts from the latest replicated state.
+        """
+        if not self.shared:
+            with self._tx_lock:
+                self._tx_depth += 1
+                try:
+                    yield
+                finally:
+                    self._tx_depth -= 1
+            return
+        with self._tx_lock:
+            if self._tx_depth == 0:
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            self._tx_depth += 1
+            try:
+                if self._tx_depth == 1:
+                    self.sync(force=True)
+                yield
+            finally:
+                self._tx_depth -= 1
+                if self._tx_depth == 0:
+                    fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    @property
+    def in_transaction(self) -> bool:
+        return self._tx_depth > 0
+
+    def try_lead_snapshots(self) -> bool:
+        """Whether this process takes the periodic snapshots (one per directory)"""
+        if not self.shared:
+            return True
+        if self._snapshot_lock_file is None:
+            self._snapshot_lock_file = open(os.path.join(self.directory, SNAPSHOT_LOCK_NAME), "a+b")
+            try:
+                fcntl.flock(self._snapshot_lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                self._snapshot_lock_file.close()
+                self._snapshot_lock_file = None
+        return self._snapshot_lock_file is not None
+
+    # Logging
+    def _open_wal(self) -> None:
+        files = self._wal_files()
+        name = files[-1] if files else _wal_name(self.seq + 1)
+        self._wal = open(os.path.join(self.directory, name), "ab")
+
+    def _ensure_latest_wal(self) -> None:
+        """Shared mode: another process may have started a new segment"""
+        if self._wal is not None and self._tail_name is not None \
+                and os.path.basename(self._wal.name) != self._tail_name:
+            self._wal.close()
+            self._wal = None
+
+    def _append(self, record: Tuple) -> None:
+        if self.shared and self._tx_depth == 0:
+            raise RuntimeError("Shared WAL appends must happen inside DurableStore.locked()")
+        with self._lock:
+            if self.shared:
+                self._ensure_latest_wal()
+            if self._wal is None:
+                self._open_wal()
+            self.seq += 1
+            self.appended += 1
+            body = pickle.dumps((self.seq,) + record, protocol=PICKLE_PROTOCOL)
+            self._wal.write(WAL_HEADER.pack(len(body), zlib.crc32(body)) + body)
+            self._wal.flush()
+            if self.fsync == "always":
+                os.fsync(self._wal.fileno())
+            else:
+                self._dirty = True
+                if self._syncer is None:
+                    self._syncer = threading.Thread(target=self._run_syncer, name="wal-fsync", daemon=True)
+                    self._syncer.start()
+
+    def _run_syncer(self) -> None:
+        """fsync the WAL at most once per second (appendfsync everysec)"""
+        while True:
+            time.sleep(1.0)
+            with self._lock:
+                if self._wal is None:
+                    return
+                if self._dirty:
+                    os.fsync(self._wal.fileno())
+                    self._dirty = False
+
+    def log_insert(self, table: str, row: Dict) -> None:
+        self._append(("insert", table, row))
+
+    def log_update(self, table: str, row_id: int, changes: Dict[str, Any]) -> None:
+        self._append(("update", table, row_id, changes))
+
+    @property
+    def records_since_snapshot(self) -> int:
+        return self.seq - self.snapshot_seq
+
+    # Snapshots
+    def _rotate_wal(self) -> int:
+        """Start a new WAL segment and return the sequence the snapshot covers"""
+        with self._lock:
+            if self._wal is not None:
+                self._wal.flush()
+                os.fsync(self._wal.fileno())
+                self._wal.close()
+            seq = self.seq
+            self._wal = open(os.path.join(self.directory, _wal_name(seq + 1)), "ab")
+            self._dirty = False
+            if self.shared:
+                self._tail_name, self._tail_offset = _wal_name(seq + 1), 0
+            return seq
+
+    def _finish_snapshot(self, seq: int) -> None:
+        """Drop WAL segments fully covered by the new snapshot"""
+        previous, self.snapshot_seq = self.snapshot_seq, seq
+        # Shared mode keeps one extra generation for workers still tailing it
+        current = _wal_name((previous if self.shared else seq) + 1)
+        for name in self._wal_files():
+            if name < current:
+                os.remove(os.path.join(self.directory, name))
+        current = _columns_name(previous if self.shared else seq)
+        for name in self._columns_dirs():
+            if name < current:
+                shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+
+    def _capture(self, db: Dict[str, List[Dict]]) -> Dict[str, Any]:
+        """Rotate the WAL, then pickle ``db`` in short locked slices
+
+        Tables only grow by appending, so the rows present at the rotation
+        point are pickled; anything written later is in the new segment.
+        """
+        with self.locked():
+            seq = self._rotate_wal()
+            columns = self.columns.copy() if self.columns is not None else None
+            sizes = {table: len(rows) for table, rows in db.items()}
+        frames: List[bytes] = []
+        for table, size in sizes.items():
+            rows = db[table]
+            for start in range(0, size, SNAPSHOT_SLICE_ROWS):
+                with self.locked():
+                    frames.append(pickle.dumps(rows[start:start + SNAPSHOT_SLICE_ROWS], protocol=PICKLE_PROTOCOL))
+                # Let the event loop and waiting writers run before the next slice
+                time.sleep(0)
+        tables = [(table, -(-size // SNAPSHOT_SLICE_ROWS)) for table, size in sizes.items()]
+        header = pickle.dumps({"seq": seq, "tables": tables}, protocol=PICKLE_PROTOCOL)
+        return {"seq": seq, "frames": [header] + frames, "columns": columns}
+
+    def _write_capture(self, db: Dict[str, List[Dict]]) -> int:
+        payload = self._capture(db)
+        # Columns first: a snapshot only ever points at complete columns
+        if payload["columns"] is not None:
+            payload["columns"].save(os.path.join(self.directory, _columns_name(payload["seq"])))
+        _write_snapshot(self.snapshot_path, payload["frames"])
+        return payload["seq"]
+
+    def snapshot(self, db: Dict[str, List[Dict]]) -> None:
+        """Write a snapshot synchronously (used at shutdown)"""
+        self._finish_snapshot(self._write_capture(db))
+
+    async def snapshot_async(self, db: Dict[str, List[Dict]]) -> None:
+        """Write a snapshot without blocking the event loop
+
+        Pickling runs in a worker thread, one slice at a time: a write waits
+        for at most one slice, never for the whole table.
+        """
+        if self.snapshot_in_progress:
+            return
+        self.snapshot_in_progress = True
+        loop = asyncio.get_running_loop()
+        try:
+            seq = await loop.run_in_executor(None, self._write_capture, db)
+            self._finish_snapshot(seq)
+        finally:
+            self.snapshot_in_progress = False
+
+    async def run_snapshots(self, db: Dict[str, List[Dict]], interval: float, min_records: int) -> None:
+        """Background task: snapshot every ``interval`` seconds when enough changed"""
+        while True:
+            await asyncio.sleep(interval)
+            if self.try_lead_snapshots() and self.records_since_snapshot >= min_records:
+                await self.snapshot_async(db)
+
+    def close(self, db: Optional[Dict[str, List[Dict]]] = None) -> None:
+        """Optionally snapshot, then fsync and close the WAL
+
+        In shared mode only the snapshot leader writes the final snapshot,
+        and never from a process that lost track of the WAL.
+        """
+        if self.shared and db is not None:
+            # Another worker may have just written the final snapshot
+            self.sync()
+        if db is not None and self.records_since_snapshot and not self.diverged \
+                and self.try_lead_snapshots():
+            self.snapshot(db)
+        with self._lock:
+            if self._wal is not None:
+                self._wal.flush()
+                os.fsync(self._wal.fileno())
+                self._wal.close()
+                self._wal = None
+        if self._snapshot_lock_file is not None:
+            self._snapshot_lock_file.close()
+            self._snapshot_lock_file = None
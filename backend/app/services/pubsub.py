@@ -0,0 +1,99 @@
+"""
+Cross-worker notifications for AndesMindHack Backend
+
+Each worker process binds a Unix datagram socket in a shared run
+directory; publishing sends a small JSON message to every other socket in
+it. Delivery is best effort (a full or vanished peer is skipped), so
+subscribers must treat messages as hints to refresh, never as the data
+itself. Receiving is driven by the event loop, so callbacks run on the
+same thread as the request handlers.
+"""
+
+import asyncio
+import json
+import os
+import socket
+from collections import defaultdict
+from typing import Optional, List, Dict, Any, Callable
+
+SOCKET_SUFFIX = ".sock"
+MAX_MESSAGE_BYTES = 4096
+
+
+class InvalidationBus:
+    """Local pub/sub channel between the workers of one deployment"""
+
+    def __init__(self, directory: str, name: Optional[str] = None):
+        self.directory = directory
+        self.name = name or f"worker-{os.getpid()}"
+        self.path = os.path.join(directory, self.name + SOCKET_SUFFIX)
+        self._subscribers: Dict[str, List[Callable[[Any], None]]] = defaultdict(list)
+        self._sock: Optional[socket.socket] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.sent = 0
+        self.received = 0
+
+    def subscribe(self, topic: str, callback: Callable[[Any], None]) -> None:
+        self._subscribers[topic].append(callback)
+
+    def start(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+        """Bind this worker's socket and start dispatching on ``loop``"""
+        os.makedirs(self.directory, exist_ok=True)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sock.setblocking(False)
+        self._sock.bind(self.path)
+        self._loop = loop or asyncio.get_running_loop()
+        self._loop.add_reader(self._sock.fileno(), self._on_readable)
+
+    def _on_readable(self) -> None:
+        while True:
+            try:
+                data = self._sock.recv(MAX_MESSAGE_BYTES)
+            except (BlockingIOError, OSError):
+                return
+            try:
+                message = json.loads(data)
+            except ValueError:
+                continue
+            self.received += 1
+            for callback in self._subscribers.get(message.get("topic"), ()):
+                callback(message.get("payload"))
+
+    def publish(self, topic: str, payload: Any = None) -> int:
+        """Notify every other worker; returns how many peers were reached"""
+        if self._sock is None:
+            return 0
+        data = json.dumps({"topic": topic, "sender": self.name, "payload": payload}).encode()
+        reached = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith(SOCKET_SUFFIX) or name == self.name + SOCKET_SUFFIX:
+                continue
+            peer = os.path.join(self.directory, name)
+            try:
+                self._sock.sendto(data, peer)
+                reached += 1
+            except BlockingIOError:
+                # Peer is backlogged; it catches up on its next request anyway
+                continue
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Socket left behind by a worker that died
+                try:
+                    os.unlink(peer)
+                except FileNotFoundError:
+                    pass
+        self.sent += reached
+        return reached
+
+    def close(self) -> None:
+        if self._sock is None:
+            return
+        if self._loop is not None:
+            self._loop.remove_reader(self._sock.fileno())
+        self._sock.close()
+        self._sock = None
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,80 @@
+"""
+Leave usage reports for AndesMindHack Backend
+
+Reports run on the columnar request history (``app.services.columnar``).
+Durations are summed in integer half-day units (see
+``validation.UNITS_PER_DAY``) and converted to days only when the report
+is rendered, so totals over any amount of history are exact.
+"""
+
+from datetime import date
+from typing import Optional, List, Dict, Any, Tuple
+
+import numpy as np
+
+from app.services.columnar import Columns, STATUS_NAMES
+from app.services.validation import units_to_days
+
+
+def _department_codes(user_departments: List[Tuple[int, Optional[str]]], user_ids: np.ndarray):
+    """(department code per row, department names) via a user id lookup table"""
+    names = sorted({dept for _, dept in user_departments if dept})
+    code_of = {name: code for code, name in enumerate(names)}
+    size = max(max((user_id for user_id, _ in user_departments), default=0), int(user_ids.max(initial=0))) + 1
+    lookup = np.full(size, len(names), dtype=np.int32)
+    for user_id, dept in user_departments:
+        lookup[user_id] = code_of.get(dept, len(names))
+    return lookup[user_ids], names + [None]
+
+
+def leave_summary(cols: Columns, user_departments: List[Tuple[int, Optional[str]]], policies: List[Dict],
+                  year: int, department: Optional[str] = None) -> Dict[str, Any]:
+    """Requests and days taken per department, policy and status in ``year``
+
+    ``user_departments`` is a snapshot of (user id, department) pairs. A
+    request belongs to the year it starts in, like the balance ledger.
+    """
+    mask = (cols["start"] >= date(year, 1, 1).toordinal()) & (cols["start"] <= date(year, 12, 31).toordinal())
+    dept_codes, dept_names = _department_codes(user_departments, cols["user_id"])
+    if department:
+        mask &= dept_codes == (dept_names.index(department) if department in dept_names else -1)
+
+    # One integer key per (department, policy, status) group, then exact
+    # int64 sums over each run of the sorted keys
+    n_policies = int(cols["policy_id"].max(initial=0)) + 1
+    keys = (dept_codes[mask].astype(np.int64) * n_policies + cols["policy_id"][mask]) \
+        * len(STATUS_NAMES) + cols["status"][mask]
+    units = cols["units"][mask].astype(np.int64)
+    order = np.argsort(keys, kind="stable")
+    keys, units = keys[order], units[order]
+    groups, first, counts = np.unique(keys, return_index=True, return_counts=True)
+    totals = np.add.reduceat(units, first) if len(units) else units
+
+    policy_names = {policy["id"]: policy["name"] for policy in policies}
+    rows = []
+    by_status: Dict[str, int] = {}
+    by_department: Dict[Optional[str], int] = {}
+    for key, count, total in zip(groups.tolist(), counts.tolist(), totals.tolist()):
+        group, status_code = divmod(key, len(STATUS_NAMES))
+        dept_code, policy_id = divmod(group, n_policies)
+        dept, status = dept_names[dept_code], STATUS_NAMES[status_code]
+        by_status[status] = by_status.get(status, 0) + total
+        by_department[dept] = by_department.get(dept, 0) + total
+        rows.append({
+            "department": dept,
+            "policy_id": policy_id,
+            "policy_name": policy_names.get(policy_id),
+            "status": status,
+            "requests": count,
+            "days": units_to_days(total),
+            "units": total
+        })
+
+    return {
+        "year": year,
+        "department": department,
+        "rows": rows,
+        "days_by_status": {status: units_to_days(total) for status, total in by_status.items()},
+        "days_by_department": {dept: units_to_days(total) for dept, total in by_department.items()},
+        "total_days": units_to_days(sum(by_status.values()))
+    }
@@ -0,0 +1,268 @@
+"""
+Request validation pipeline for AndesMindHack Backend
+
+Each policy is compiled once into a list of check closures. Checks read
+precomputed per-user indexes (interval index for self-overlap, balance
+ledger for usage) so validating a request costs the same regardless of
+how long the user's history is.
+"""
+
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import date
+from typing import Optional, List, Dict, Any, Callable, Tuple
+
+ACTIVE_STATUSES = ("pending", "approved")
+
+# Leave durations are fixed-point: one unit is half a business day, so
+# balances and report totals are exact integer sums
+UNITS_PER_DAY = 2
+
+
+def units_to_days(units: int) -> float:
+    return units / UNITS_PER_DAY
+
+
+def request_units(request: Dict) -> int:
+    """Duration of a stored request in units (records written before
+    half-day accounting only carry whole business days)"""
+    units = request.get("duration_units")
+    if units is None:
+        units = int(request["business_days"]) * UNITS_PER_DAY
+    return units
+
+Violation = Dict[str, Any]
+Check = Callable[["ValidationContext"], Optional[Violation]]
+
+
+class RequestIntervalIndex:
+    """Per-user sorted index of active request date ranges"""
+
+    def __init__(self):
+        self._starts: Dict[int, List[int]] = defaultdict(list)
+        self._entries: Dict[int, List[Tuple[int, int, int]]] = defaultdict(list)
+        # Running maximum of the ends: _max_ends[u][i] = max end of entries[:i + 1]
+        self._max_ends: Dict[int, List[int]] = defaultdict(list)
+
+    def _update_max_ends(self, user_id: int, pos: int) -> None:
+        entries = self._entries[user_id]
+        max_ends = self._max_ends[user_id]
+        del max_ends[pos:]
+        running = max_ends[-1] if max_ends else -1
+        for _, end, _ in entries[pos:]:
+            running = max(running, end)
+            max_ends.append(running)
+
+    def add(self, user_id: int, start: date, end: date, request_id: int) -> None:
+        """Insert an active request keeping the user's list ordered by start"""
+        key = (start.toordinal(), end.toordinal(), request_id)
+        pos = bisect_right(self._entries[user_id], key)
+        self._entries[user_id].insert(pos, key)
+        self._starts[user_id].insert(pos, key[0])
+        self._update_max_ends(user_id, pos)
+
+    def remove(self, user_id: int, start: date, end: date, request_id: int) -> None:
+        """Drop a request that is no longer active"""
+        key = (start.toordinal(), end.toordinal(), request_id)
+        entries = self._entries[user_id]
+        pos = bisect_left(entries, key)
+        if pos < len(entries) and entries[pos] == key:
+            del entries[pos]
+            del self._starts[user_id][pos]
+            self._update_max_ends(user_id, pos)
+
+    def find_overlap(self, user_id: int, start: date, end: date) -> Optional[int]:
+        """Id of an active request overlapping [start, end], if any
+
+        Ranges created through the validator never overlap, but imported
+        or legacy history may contain a long range that starts before a
+        short one and outlasts it. The running maximum of the ends bounds
+        the scan back from the last range starting on or before ``end``:
+        it stops as soon as no earlier range reaches ``start``.
+        """
+        starts = self._starts.get(user_id)
+        if not starts:
+            return None
+        entries = self._entries[user_id]
+        max_ends = self._max_ends[user_id]
+        first = start.toordinal()
+        pos = bisect_right(starts, end.toordinal()) - 1
+        while pos >= 0 and max_ends[pos] >= first:
+            _, entry_end, request_id = entries[pos]
+            if entry_end >= first:
+                return request_id
+            pos -= 1
+        return None
+
+
+class BalanceLedger:
+    """Leave units consumed per (user, policy, year) by active requests"""
+
+    def __init__(self):
+        self._used: Dict[Tuple[int, int, int], int] = defaultdict(int)
+
+    def add(self, user_id: int, policy_id: int, year: int, units: int) -> None:
+        self._used[(user_id, policy_id, year)] += units
+
+    def remove(self, user_id: int, policy_id: int, year: int, units: int) -> None:
+        self._used[(user_id, policy_id, year)] -= units
+
+    def used(self, user_id: int, policy_id: int, year: int) -> int:
+        return self._used.get((user_id, policy_id, year), 0)
+
+
+class ValidationContext:
+    """Inputs shared by every check of a single validation pass"""
+
+    __slots__ = ("user", "start_date", "end_date", "units", "half_day", "today", "validator")
+
+    def __init__(self, user: Dict, start_date: date, end_date: date, units: int,
+                 half_day: bool, today: date, validator: "RequestValidator"):
+        self.user = user
+        self.start_date = start_date
+        self.end_date = end_date
+        self.units = units
+        self.half_day = half_day
+        self.today = today
+        self.validator = validator
+
+
+class CompiledPolicy:
+    """Precompiled checks for one policy"""
+
+    __slots__ = ("policy_id", "checks", "auto_approve")
+
+    def __init__(self, policy_id: int, checks: List[Check], auto_approve: bool):
+        self.policy_id = policy_id
+        self.checks = checks
+        self.auto_approve = auto_approve
+
+
+def _violation(rule: str, message: str, **extra) -> Violation:
+    return {"rule": rule, "message": message, **extra}
+
+
+def compile_policy(policy: Any) -> CompiledPolicy:
+    """Turn a PolicyResponse into its list of check closures"""
+    checks: List[Check] = []
+    policy_id = policy.id
+
+    if not policy.is_active:
+        def check_active(ctx: ValidationContext) -> Optional[Violation]:
+            return _violation("policy_inactive", "Policy is not active")
+        checks.append(check_active)
+
+    def check_not_past(ctx: ValidationContext) -> Optional[Violation]:
+        if ctx.start_date < ctx.today:
+            return _violation("start_in_past", "Start date cannot be in the past")
+        return None
+    checks.append(check_not_past)
+
+    def check_half_day(ctx: ValidationContext) -> Optional[Violation]:
+        if ctx.half_day and ctx.start_date != ctx.end_date:
+            return _violation("half_day_range", "Half-day requests must start and end on the same day")
+        return None
+    checks.append(check_half_day)
+
+    notice_days = policy.advance_notice_days
+    if notice_days > 0:
+        def check_notice(ctx: ValidationContext) -> Optional[Violation]:
+            if (ctx.start_date - ctx.today).days < notice_days:
+                return _violation(
+                    "advance_notice",
+                    f"Requests for this policy need {notice_days} days of advance notice",
+                    required_days=notice_days
+                )
+            return None
+        checks.append(check_notice)
+
+    max_days = policy.max_consecutive_days
+    if max_days is not None:
+        def check_max_consecutive(ctx: ValidationContext) -> Optional[Violation]:
+            if ctx.units > max_days * UNITS_PER_DAY:
+                return _violation(
+                    "max_consecutive_days",
+                    f"Requests for this policy cannot exceed {max_days} consecutive business days",
+                    max_days=max_days
+                )
+            return None
+        checks.append(check_max_consecutive)
+
+    allocated = policy.days_allocated
+
+    def check_balance(ctx: ValidationContext) -> Optional[Violation]:
+        used = ctx.validator.balances.used(ctx.user["id"], policy_id, ctx.start_date.year)
+        remaining = allocated * UNITS_PER_DAY - used
+        if ctx.units > remaining:
+            return _violation(
+                "insufficient_balance",
+                "Not enough remaining days for this policy",
+                remaining_days=units_to_days(remaining),
+                requested_days=units_to_days(ctx.units)
+            )
+        return None
+    checks.append(check_balance)
+
+    def check_overlap(ctx: ValidationContext) -> Optional[Violation]:
+        overlapping = ctx.validator.intervals.find_overlap(ctx.user["id"], ctx.start_date, ctx.end_date)
+        if overlapping is not None:
+            return _violation(
+                "overlap",
+                "Request overlaps with an existing request",
+                request_id=overlapping
+            )
+        return None
+    checks.append(check_overlap)
+
+    return CompiledPolicy(policy_id, checks, auto_approve=not policy.requires_approval)
+
+
+class RequestValidator:
+    """Compiled policy rules plus the per-user indexes they read"""
+
+    def __init__(self):
+        self.intervals = RequestIntervalIndex()
+        self.balances = BalanceLedger()
+        self._compiled: Dict[int, CompiledPolicy] = {}
+
+    def compile(self, policy: Any) -> CompiledPolicy:
+        """(Re)compile a policy, replacing any previous version"""
+        compiled = compile_policy(policy)
+        self._compiled[policy.id] = compiled
+        return compiled
+
+    def compiled(self, policy_id: int) -> Optional[CompiledPolicy]:
+        return self._compiled.get(policy_id)
+
+    def validate(self, user: Dict, policy_id: int, start_date: date, end_date: date,
+                 units: int, half_day: bool = False,
+                 today: Optional[date] = None) -> List[Violation]:
+        """Run every check of the policy and return all violations
+
+        ``units`` is the leave duration in half-day units (see
+        ``calculate_leave_units``).
+        """
+        ctx = ValidationContext(user, start_date, end_date, units, half_day,
+                                today or date.today(), self)
+        violations = []
+        for check in self._compiled[policy_id].checks:
+            violation = check(ctx)
+            if violation is not None:
+                violations.append(violation)
+        return violations
+
+    def track(self, request: Dict) -> None:
+        """Register an active request in the overlap index and balance ledger"""
+        if request["status"] not in ACTIVE_STATUSES:
+            return
+        start = date.fromisoformat(request["start_date"])
+        end = date.fromisoformat(request["end_date"])
+        self.intervals.add(request["user_id"], start, end, request["id"])
+        self.balances.add(request["user_id"], request["policy_id"], start.year, request_units(request))
+
+    def release(self, request: Dict) -> None:
+        """Remove a request that was rejected or cancelled"""
+        start = date.fromisoformat(request["start_date"])
+        end = date.fromisoformat(request["end_date"])
+        self.intervals.remove(request["user_id"], start, end, request["id"])
+        self.balances.remove(request["user_id"], request["policy_id"], start.year, request_units(request))
@@ -0,0 +1,374 @@
+"""
+In-memory store for AndesMindHack Backend
+
+Holds FAKE_DB plus the indexes, audit trail and durability layer built on
+top of it. Every mutation goes through the insert/update helpers below so
+all of them stay in sync.
+"""
+
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, date
+from typing import Optional, Dict, List, Callable, Iterator, Any
+
+from app.core.config import get_settings
+from app.core.tracing import traced
+from app.models import PolicyResponse
+from app.services.org_graph import OrgGraph
+from app.services.validation import RequestValidator, ACTIVE_STATUSES, UNITS_PER_DAY, units_to_days
+from app.services.audit import AuditLog, diff_fields, query_logs
+from app.services.holidays import business_days_between
+from app.services.persistence import DurableStore
+from app.services.pubsub import InvalidationBus
+
+logger = logging.getLogger(__name__)
+
+# Leave durations (also used to size the seed requests below)
+def calculate_business_days(start_date: date, end_date: date) -> int:
+    """Business days between two dates (excluding weekends and Colombian holidays)"""
+    return business_days_between(start_date.toordinal(), end_date.toordinal())
+
+def calculate_leave_units(start_date: date, end_date: date, half_day: bool = False) -> int:
+    """Leave duration in half-day units (UNITS_PER_DAY per business day)
+
+    A half-day request covers a single day and consumes half of it.
+    """
+    units = calculate_business_days(start_date, end_date) * UNITS_PER_DAY
+    if half_day and units:
+        units -= UNITS_PER_DAY // 2
+    return units
+
+# In-memory storage for demo (replace with actual database)
+FAKE_DB = {
+    "users": [
+        {
+            "id": 1,
+            "email": "admin@comfachoco.com",
+            "name": "Administrador Sistema",
+            "employee_id": "ADM001",
+            "department": "RRHH",
+            "position": "Administrador",
+            "role": "hr_admin",
+            "is_active": True,
+            "created_at": datetime.utcnow().isoformat(),
+            "hashed_password": "$2b$12$dummy_hash_for_demo"
+        },
+        {
+            "id": 2,
+            "email": "manager@comfachoco.com",
+            "name": "María García",
+            "employee_id": "MGR001",
+            "department": "Tecnología",
+            "position": "Gerente de TI",
+            "role": "manager",
+            "is_active": True,
+            "created_at": datetime.utcnow().isoformat(),
+            "hashed_password": "$2b$12$dummy_hash_for_demo"
+        },
+        {
+            "id": 3,
+            "email": "empleado@comfachoco.com",
+            "name": "Juan Pérez",
+            "employee_id": "EMP001",
+            "department": "Tecnología",
+            "position": "Desarrollador Senior",
+            "role": "employee",
+            "is_active": True,
+            "created_at": datetime.utcnow().isoformat(),
+            "hashed_password": "$2b$12$dummy_hash_for_demo"
+        }
+    ],
+    "policies": [
+        {
+            "id": 1,
+            "name": "Vacaciones Anuales",
+            "type": "vacation",
+            "days_allocated": 15,
+            "requires_approval": True,
+            "advance_notice_days": 7,
+            "max_consecutive_days": 30,
+            "is_active": True
+        },
+        {
+            "id": 2,
+            "name": "Licencia por Enfermedad",
+            "type": "sick_leave",
+            "days_allocated": 5,
+            "requires_approval": False,
+            "advance_notice_days": 0,
+            "max_consecutive_days": 3,
+            "is_active": True
+        },
+        {
+            "id": 3,
+            "name": "Permiso Personal",
+            "type": "personal_leave",
+            "days_allocated": 3,
+            "requires_approval": True,
+            "advance_notice_days": 1,
+            "max_consecutive_days": 2,
+            "is_active": True
+        }
+    ],
+    "requests": [
+        {
+            "id": 1,
+            "user_id": 3,
+            "policy_id": 1,
+            "start_date": "2024-12-15",
+            "end_date": "2024-12-20",
+            "business_days": units_to_days(calculate_leave_units(date(2024, 12, 15), date(2024, 12, 20))),
+            "duration_units": calculate_leave_units(date(2024, 12, 15), date(2024, 12, 20)),
+            "calendar_days": 6,
+            "reason": "Vacaciones familiares",
+            "notes": "Viaje programado con anticipación",
+            "status": "pending",
+            "half_day": False,
+            "approver_id": 2,
+            "created_at": datetime.utcnow().isoformat(),
+            "updated_at": datetime.utcnow().isoformat()
+        }
+    ]
+}
+
+# Policy reported as the user's vacation balance
+VACATION_POLICY_ID = 1
+
+# Optional durability for the in-memory store: snapshot + write-ahead log.
+# With SHARED_STATE every worker process replicates the same WAL.
+DURABLE = None
+BUS = None
+SHARED = bool(get_settings().SHARED_STATE and get_settings().PERSISTENCE_DIR)
+if get_settings().PERSISTENCE_DIR:
+    DURABLE = DurableStore(
+        get_settings().PERSISTENCE_DIR,
+        fsync=get_settings().PERSISTENCE_FSYNC,
+        shared=SHARED
+    )
+    DURABLE.recover(FAKE_DB)
+if SHARED:
+    BUS = InvalidationBus(get_settings().RUN_DIR or os.path.join(get_settings().PERSISTENCE_DIR, "run"))
+
+# Organizational graph (department members, approver chains, visibility)
+ORG = OrgGraph.build(FAKE_DB["users"], FAKE_DB["requests"])
+
+# Compiled policy rules with per-user overlap and balance indexes
+VALIDATOR = RequestValidator()
+for _policy in FAKE_DB["policies"]:
+    VALIDATOR.compile(PolicyResponse(**_policy))
+for _request in FAKE_DB["requests"]:
+    VALIDATOR.track(_request)
+
+# Append-only audit trail of every state change (one directory per worker
+# process in shared mode)
+AUDIT = AuditLog(
+    os.path.join(get_settings().AUDIT_LOG_DIR, BUS.name) if SHARED else get_settings().AUDIT_LOG_DIR,
+    max_segment_bytes=get_settings().AUDIT_SEGMENT_BYTES
+)
+
+# Change listeners for derived caches (AI forecasts, analytics, ...).
+# User listeners receive the user after it is created or updated. Request
+# listeners receive (request, previous_status); previous_status is None for
+# newly created requests.
+USER_LISTENERS: List[Callable[[Dict], None]] = []
+REQUEST_LISTENERS: List[Callable[[Dict, Optional[str]], None]] = []
+
+# Typed columns of the request history for vectorized analytics (calendar,
+# reports, AI). Built on first use, so importing the store doesn't load
+# NumPy, and then kept in sync through REQUEST_LISTENERS.
+_columns = None
+_columns_lock = threading.Lock()
+
+def request_columns():
+    """The columnar request history (``RequestColumns``), built on first call
+
+    Call it on the event loop, where requests are written, and hand its
+    views to worker threads; the first call reads FAKE_DB["requests"].
+    """
+    global _columns
+    with _columns_lock:
+        if _columns is None:
+            _columns = _load_request_columns()
+            REQUEST_LISTENERS.append(_columns.observe)
+            if DURABLE is not None:
+                DURABLE.columns = _columns
+        return _columns
+
+def _load_request_columns():
+    """Map the columns saved with the snapshot, else build them from FAKE_DB"""
+    from app.services.columnar import RequestColumns
+    path = DURABLE.saved_columns() if DURABLE is not None else None
+    if path is not None:
+        try:
+            columns = RequestColumns.load(path)
+            columns.catch_up(FAKE_DB["requests"])
+            return columns
+        except (OSError, ValueError) as exc:
+            logger.warning("Saved request columns in %s not used: %s", path, exc)
+    return RequestColumns.from_requests(FAKE_DB["requests"])
+
+# Utility functions
+@traced("store.get_user_by_email")
+def get_user_by_email(email: str) -> Optional[Dict]:
+    return ORG.users_by_email.get(email)
+
+@traced("store.get_user_by_id")
+def get_user_by_id(user_id: int) -> Optional[Dict]:
+    return ORG.users_by_id.get(user_id)
+
+@traced("store.get_request_by_id")
+def get_request_by_id(request_id: int) -> Optional[Dict]:
+    return ORG.requests_by_id.get(request_id)
+
+@traced("store.get_policy_by_id")
+def get_policy_by_id(policy_id: int) -> Optional[Dict]:
+    return next((policy for policy in FAKE_DB["policies"] if policy["id"] == policy_id), None)
+
+def leave_balance(user_id: int, policy_id: int, year: int) -> Dict[str, Any]:
+    """Allocated, used and remaining days of a policy for one user and year"""
+    policy = get_policy_by_id(policy_id)
+    allocated = policy["days_allocated"] * UNITS_PER_DAY
+    used = VALIDATOR.balances.used(user_id, policy_id, year)
+    return {
+        "annual_days": policy["days_allocated"],
+        "used_days": units_to_days(used),
+        "remaining_days": units_to_days(allocated - used),
+        "used_units": used,
+        "remaining_units": allocated - used
+    }
+
+# Mutations: the _apply_* helpers update FAKE_DB and every index; they are
+# shared by local writes and by records replicated from other workers
+def _apply_user_insert(user: Dict) -> None:
+    FAKE_DB["users"].append(user)
+    ORG.add_user(user)
+    for listener in USER_LISTENERS:
+        listener(user)
+
+def _apply_user_update(user: Dict, changes: Dict[str, Any]) -> None:
+    ORG.update_user(user["id"], **changes)
+    for listener in USER_LISTENERS:
+        listener(user)
+
+def _apply_request_insert(request: Dict) -> None:
+    FAKE_DB["requests"].append(request)
+    ORG.add_request(request)
+    VALIDATOR.track(request)
+    for listener in REQUEST_LISTENERS:
+        listener(request, None)
+
+def _apply_request_update(request: Dict, changes: Dict[str, Any]) -> None:
+    previous_status = request["status"]
+    status = changes.get("status", previous_status)
+    request.update({k: v for k, v in changes.items() if k != "status"})
+    ORG.set_request_status(request, status)
+    if previous_status in ACTIVE_STATUSES and status not in ACTIVE_STATUSES:
+        VALIDATOR.release(request)
+    for listener in REQUEST_LISTENERS:
+        listener(request, previous_status)
+
+def _apply_replicated(op: str, table: str, args: List[Any]) -> None:
+    """Apply a WAL record written by another worker process"""
+    if op == "insert" and table == "users":
+        _apply_user_insert(args[0])
+    elif op == "insert" and table == "requests":
+        _apply_request_insert(args[0])
+    elif op == "update":
+        rows = ORG.users_by_id if table == "users" else ORG.requests_by_id
+        row = rows.get(args[0])
+        if row is None:
+            logger.warning("Replicated update of missing %s row %r skipped", table, args[0])
+        elif table == "users":
+            _apply_user_update(row, args[1])
+        else:
+            _apply_request_update(row, args[1])
+
+if DURABLE is not None:
+    DURABLE.apply = _apply_replicated
+
+@contextmanager
+def write_transaction() -> Iterator[None]:
+    """Serialize a read-check-write sequence across worker processes
+
+    In shared mode the block starts from the latest replicated state and
+    holds the WAL lock, so ids and validation checks can't race with
+    another worker; peers are notified once the block commits. With
+    persistence it also keeps snapshots from copying the store mid-write.
+    Otherwise it is a no-op. Re-entrant.
+    """
+    if DURABLE is None:
+        yield
+        return
+    if not SHARED:
+        with DURABLE.locked():
+            yield
+        return
+    appended = DURABLE.appended
+    with DURABLE.locked():
+        yield
+    if DURABLE.appended != appended and not DURABLE.in_transaction:
+        BUS.publish("wal", DURABLE.seq)
+
+def sync_shared_state() -> int:
+    """Catch up with the writes of other workers (shared mode only)"""
+    if not SHARED:
+        return 0
+    return DURABLE.sync()
+
+def insert_user(user: Dict, actor_id: Optional[int] = None) -> None:
+    """Persist a new user and link it into the organizational graph"""
+    with write_transaction():
+        _apply_user_insert(user)
+        if DURABLE is not None:
+            DURABLE.log_insert("users", user)
+    AUDIT.append(
+        "user_registered", "user", user["id"], actor_id,
+        {k: v for k, v in user.items() if k != "hashed_password"}
+    )
+
+def update_user(user: Dict, actor_id: Optional[int] = None, **changes) -> None:
+    """Change a user's role, department, manager or activation and re-link the graph"""
+    changed = diff_fields(user, changes)
+    with write_transaction():
+        _apply_user_update(user, changes)
+        if DURABLE is not None:
+            DURABLE.log_update("users", user["id"], changes)
+    AUDIT.append("user_updated", "user", user["id"], actor_id, changed)
+
+def insert_request(request: Dict, actor_id: Optional[int] = None) -> None:
+    """Persist a new request and grant visibility to its approvers"""
+    with write_transaction():
+        _apply_request_insert(request)
+        if DURABLE is not None:
+            DURABLE.log_insert("requests", request)
+    AUDIT.append("request_created", "request", request["id"], actor_id, dict(request))
+
+def update_request_status(request: Dict, status: str, actor_id: Optional[int] = None, **changes) -> None:
+    """Change a request status and record the decision fields"""
+    changes = {"status": status, **changes}
+    changed = diff_fields(request, changes)
+    with write_transaction():
+        _apply_request_update(request, changes)
+        if DURABLE is not None:
+            DURABLE.log_update("requests", request["id"], changes)
+    action = f"request_{status}" if status != "pending" else "request_updated"
+    AUDIT.append(action, "request", request["id"], actor_id, changed)
+
+def query_audit(*args, **kwargs) -> List[Dict[str, Any]]:
+    """Query the audit trail, merging every worker's log in shared mode"""
+    if not SHARED:
+        return AUDIT.query(*args, **kwargs)
+    root = get_settings().AUDIT_LOG_DIR
+    peers = [
+        AuditLog(os.path.join(root, name), read_only=True)
+        for name in sorted(os.listdir(root))
+        if name != BUS.name and os.path.isdir(os.path.join(root, name))
+    ]
+    return query_logs([AUDIT] + peers, *args, **kwargs)
+
+@traced("auth.current_user")
+def get_current_user_mock() -> Dict:
+    """Mock function to get current user (replace with JWT validation)"""
+    return FAKE_DB["users"][2]  # Return employee user for demo
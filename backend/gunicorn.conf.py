@@ -0,0 +1,71 @@
+"""
+Gunicorn configuration for production serving
+
+    gunicorn -c gunicorn.conf.py app.main:app
+
+One uvicorn worker per available core (override with WEB_CONCURRENCY).
+With more than one worker the in-memory store runs in shared mode: all
+workers replicate the same write-ahead log in PERSISTENCE_DIR and notify
+each other of new writes through sockets in RUN_DIR.
+"""
+
+import os
+import shutil
+
+
+def _cores() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", _cores()))
+worker_class = "uvicorn.workers.UvicornWorker"
+# Each worker recovers the store and binds its notification socket itself
+preload_app = False
+backlog = 2048
+keepalive = 5
+timeout = 60
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+accesslog = os.getenv("ACCESS_LOG") or None
+errorlog = "-"
+loglevel = os.getenv("LOG_LEVEL", "info")
+
+
+def on_starting(server):
+    """Runs in the master before any worker is forked"""
+    if server.cfg.workers > 1:
+        os.environ.setdefault("PERSISTENCE_DIR", "data/fakedb")
+        os.environ["SHARED_STATE"] = "true"
+    persistence_dir = os.environ.get("PERSISTENCE_DIR")
+    if persistence_dir:
+        run_dir = os.environ.setdefault("RUN_DIR", os.path.join(persistence_dir, "run"))
+        # Sockets of a previous deployment are stale
+        shutil.rmtree(run_dir, ignore_errors=True)
+        os.makedirs(run_dir, exist_ok=True)
+    server.log.info(
+        "Starting %s workers (shared state: %s)", server.cfg.workers, os.environ.get("SHARED_STATE", "false")
+    )
+
+
+def post_worker_init(worker):
+    # The app is imported and the store recovered; its startup hooks (WAL
+    # catch-up, notification socket, warmup imports) run before the worker
+    # accepts connections
+    worker.log.info("Worker %s initialized", worker.pid)
+
+
+def worker_int(worker):
+    worker.log.info("Worker %s interrupted, finishing in-flight requests", worker.pid)
+
+
+def worker_abort(worker):
+    worker.log.warning("Worker %s aborted after exceeding the %ss timeout", worker.pid, timeout)
+
+
+def on_exit(server):
+    run_dir = os.environ.get("RUN_DIR")
+    if run_dir:
+        shutil.rmtree(run_dir, ignore_errors=True)
@@ -0,0 +1,140 @@
+"""
+Snapshot and recovery times of the persistent in-memory store
+
+Builds a store of --requests request rows shaped like FAKE_DB's, writes a
+snapshot while a writer keeps updating rows (as request handlers would),
+appends a WAL tail of --tail updates and then times recovery in a fresh
+process, which is what a restart pays. Reports the longest time the
+writer waited for the write lock and the longest the event loop went
+without running it (pickling holds the GIL), and exits with status 1
+when recovery exceeds --budget seconds.
+
+Usage (from backend/):
+    python scripts/bench_recovery.py [--requests 1000000] [--tail 10000] [--budget 2.5]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from typing import List, Dict, Any
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from app.services.persistence import DurableStore  # noqa: E402
+
+STATUSES = ("approved", "approved", "approved", "pending", "rejected", "cancelled")
+
+
+def build_requests(n: int) -> List[Dict[str, Any]]:
+    first = date(2022, 1, 3)
+    created = datetime(2022, 1, 1).isoformat()
+    requests = []
+    for i in range(1, n + 1):
+        start = first + timedelta(days=i % 1000)
+        end = start + timedelta(days=i % 5)
+        requests.append({
+            "id": i,
+            "user_id": i % 5000 + 1,
+            "policy_id": i % 4 + 1,
+            "start_date": start.isoformat(),
+            "end_date": end.isoformat(),
+            "business_days": i % 5 + 1,
+            "duration_units": 2 * (i % 5 + 1),
+            "calendar_days": i % 5 + 1,
+            "reason": "Vacaciones",
+            "notes": None,
+            "status": STATUSES[i % len(STATUSES)],
+            "half_day": False,
+            "approver_id": 2,
+            "created_at": created,
+            "updated_at": created,
+        })
+    return requests
+
+
+async def snapshot_under_writes(durable: DurableStore, db: Dict[str, List[Dict]]) -> Dict[str, float]:
+    """Snapshot while a writer updates a row every millisecond; returns the worst waits"""
+    waits: List[float] = []
+    gaps: List[float] = []
+    done = False
+
+    async def writer():
+        row = 0
+        last = time.perf_counter()
+        while not done:
+            t0 = time.perf_counter()
+            gaps.append(t0 - last)
+            with durable.locked():
+                waits.append(time.perf_counter() - t0)
+                request = db["requests"][row % len(db["requests"])]
+                request["notes"] = "touched"
+                durable.log_update("requests", request["id"], {"notes": "touched"})
+            row += 7919
+            last = time.perf_counter()
+            await asyncio.sleep(0.001)
+
+    task = asyncio.create_task(writer())
+    started = time.perf_counter()
+    await durable.snapshot_async(db)
+    seconds = time.perf_counter() - started
+    done = True
+    await task
+    return {"snapshot_seconds": round(seconds, 3), "max_write_wait_ms": round(max(waits) * 1000, 2),
+            "max_loop_stall_ms": round(max(gaps) * 1000, 2), "writes_during_snapshot": len(waits)}
+
+
+def recover(directory: str) -> Dict[str, Any]:
+    """Runs in the child process, like a restarted server"""
+    db: Dict[str, List[Dict]] = {}
+    stats = DurableStore(directory).recover(db)
+    stats["requests"] = len(db["requests"])
+    return stats
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Measure snapshot and recovery times of the persistent store")
+    parser.add_argument("--requests", type=int, default=1_000_000)
+    parser.add_argument("--tail", type=int, default=10_000, help="WAL records after the snapshot")
+    parser.add_argument("--budget", type=float, default=2.5, help="Maximum recovery seconds")
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        print(json.dumps(recover(args.child)))
+        return 0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = {"users": [], "policies": [], "requests": build_requests(args.requests)}
+        durable = DurableStore(tmp, fsync="everysec")
+        result = asyncio.run(snapshot_under_writes(durable, db))
+        for i in range(args.tail):
+            durable.log_update("requests", i % args.requests + 1, {"status": "cancelled"})
+        durable.close()
+        result["snapshot_mb"] = round(os.path.getsize(durable.snapshot_path) / (1024 * 1024), 1)
+        del db
+
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", tmp],
+                                capture_output=True, text=True, check=True).stdout
+        result["recovery"] = json.loads(output)
+
+    recovery = result["recovery"]
+    print(f"{args.requests} requests, snapshot {result['snapshot_mb']} MB in {result['snapshot_seconds']}s; "
+          f"longest write wait {result['max_write_wait_ms']} ms, longest loop stall "
+          f"{result['max_loop_stall_ms']} ms over {result['writes_during_snapshot']} writes")
+    print(f"recovery: {recovery['seconds']}s ({recovery['replayed']} WAL records replayed, "
+          f"budget {args.budget}s)")
+    if recovery["requests"] != args.requests:
+        print(f"recovered {recovery['requests']} requests, expected {args.requests}", file=sys.stderr)
+        return 1
+    return 0 if recovery["seconds"] <= args.budget else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,259 @@
+"""
+Endpoint latency and memory vs. amount of data
+
+For each size a fresh process generates a synthetic organization with that
+many requests (``app.services.synthetic``), loads it into the in-memory
+store and times each endpoint in-process through the ASGI app, so the
+numbers measure the code paths without network overhead. Resident memory
+is read after loading. An endpoint whose latency grows faster than the
+data between two sizes (log-log slope above --superlinear) is flagged.
+With matplotlib installed the curves are also plotted as PNG files.
+
+The mock user is promoted to HR admin so every endpoint sees the whole
+organization (the worst case for role-scoped queries).
+
+Usage (from backend/):
+    python scripts/bench_scaling.py [--sizes 1000,10000,100000,1000000] [--repeat 20] [--plot-dir data/scaling]
+"""
+
+import argparse
+import json
+import math
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from typing import List, Dict, Any, Optional
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _endpoints(today: date) -> List[Dict[str, Any]]:
+    month_start = today.replace(day=1)
+    month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    period = {"start_date": month_start.isoformat(), "end_date": month_end.isoformat()}
+    quarter = {"start_date": month_start.isoformat(), "end_date": (month_start + timedelta(days=90)).isoformat()}
+    return [
+        {"name": "calendar", "path": "/api/v1/calendar", "params": dict(period, include_pending="true")},
+        {"name": "calendar_department", "path": "/api/v1/calendar",
+         "params": dict(period, department="Tecnología")},
+        {"name": "requests_own", "path": "/api/v1/requests", "params": {}},
+        {"name": "requests_pending", "path": "/api/v1/requests/pending", "params": {}},
+        {"name": "reports_summary", "path": "/api/v1/admin/reports/summary", "params": {"year": today.year}},
+        {"name": "conflicts", "path": "/api/v1/analysis/conflicts", "params": quarter},
+        {"name": "suggest_dates", "path": "/api/v1/ai/suggest-dates",
+         "params": {"policy_id": 1, "days": 5, "use_forecast": "false"}},
+        {"name": "create_request", "method": "POST", "path": "/api/v1/requests"},
+    ]
+
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    # Peak rather than current RSS, but the best available (KB on Linux, bytes on macOS)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def measure(size: int, years: int, repeat: int, seed: int) -> Dict[str, Any]:
+    """Runs in the child process: load ``size`` requests and time every endpoint"""
+    from fastapi.testclient import TestClient
+
+    from app import store
+    from app.main import app
+    from app.services.bulk_import import MemorySink
+    from app.services.synthetic import generate_dataset, load_into
+
+    rss_empty = _rss_mb()
+    started = time.perf_counter()
+    users, requests = generate_dataset(size, years, seed)
+    generate_seconds = time.perf_counter() - started
+    summary = load_into(MemorySink(), users, requests)
+    del users, requests
+    store.update_user(store.get_user_by_id(3), role="hr_admin")
+    result = {
+        "size": size,
+        "users": summary["users"],
+        "generate_seconds": round(generate_seconds, 3),
+        "load_seconds": summary["elapsed_seconds"],
+        "rss_empty_mb": round(rss_empty, 1),
+        "rss_mb": round(_rss_mb(), 1),
+        "columns_mb": round(store.request_columns().nbytes / (1024 * 1024), 2),
+        "endpoints": {},
+    }
+
+    today = date.today()
+    with TestClient(app) as client:
+        for endpoint in _endpoints(today):
+            timings: List[float] = []
+            statuses = set()
+            for attempt in range(repeat + 2):
+                if endpoint.get("method") == "POST":
+                    # One single-day vacation per year far ahead: always valid
+                    day = date(today.year + 5 + attempt, 3, 2)
+                    while day.weekday() >= 5:
+                        day += timedelta(days=1)
+                    body = {"policy_id": 1, "start_date": day.isoformat(), "end_date": day.isoformat(),
+                            "reason": "bench"}
+                    t0 = time.perf_counter()
+                    response = client.post(endpoint["path"], json=body)
+                else:
+                    t0 = time.perf_counter()
+                    response = client.get(endpoint["path"], params=endpoint["params"])
+                elapsed = (time.perf_counter() - t0) * 1000
+                statuses.add(response.status_code)
+                if attempt >= 2:  # the first calls warm up caches and lazy imports
+                    timings.append(elapsed)
+            timings.sort()
+            result["endpoints"][endpoint["name"]] = {
+                "median_ms": round(statistics.median(timings), 3),
+                "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+                "statuses": sorted(statuses),
+            }
+    return result
+
+
+def run(size: int, years: int, repeat: int, seed: int) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(
+            os.environ,
+            AUDIT_LOG_DIR=os.path.join(tmp, "audit"),
+            PYTHONPATH=BACKEND_DIR,
+            LOG_LEVEL="warning",
+            # Measure the endpoints themselves, not response encoding or tracing
+            COMPRESSION_ENABLED="false",
+            TRACING_ENABLED="false",
+            PROFILING_ENABLED="false",
+        )
+        env.pop("PERSISTENCE_DIR", None)
+        env.pop("SHARED_STATE", None)
+        child = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", str(size), "--years", str(years),
+             "--repeat", str(repeat), "--seed", str(seed)],
+            cwd=BACKEND_DIR, env=env, stdout=subprocess.PIPE, check=True, text=True,
+        )
+    return json.loads(child.stdout.strip().splitlines()[-1])
+
+
+def slopes(sizes: List[int], values: List[float]) -> List[Optional[float]]:
+    """Log-log slope between consecutive sizes (1.0 = linear growth)"""
+    result: List[Optional[float]] = []
+    for (n1, v1), (n2, v2) in zip(zip(sizes, values), zip(sizes[1:], values[1:])):
+        result.append(math.log(v2 / v1) / math.log(n2 / n1) if v1 > 0 and v2 > 0 else None)
+    return result
+
+
+def plot(results: List[Dict[str, Any]], directory: str) -> List[str]:
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("matplotlib is not installed; skipping plots")
+        return []
+
+    os.makedirs(directory, exist_ok=True)
+    sizes = [r["size"] for r in results]
+    paths = []
+
+    fig, ax = plt.subplots(figsize=(8, 5))
+    for name in results[0]["endpoints"]:
+        ax.plot(sizes, [r["endpoints"][name]["median_ms"] for r in results], marker="o", label=name)
+    ax.plot(sizes, [results[0]["endpoints"]["calendar"]["median_ms"] * n / sizes[0] for n in sizes],
+            linestyle=":", color="grey", label="linear reference")
+    ax.set(xscale="log", yscale="log", xlabel="requests in store", ylabel="median latency (ms)",
+           title="Endpoint latency vs. data size")
+    ax.legend(fontsize="small")
+    paths.append(os.path.join(directory, "latency.png"))
+    fig.savefig(paths[-1], dpi=120, bbox_inches="tight")
+
+    fig, ax = plt.subplots(figsize=(8, 5))
+    ax.plot(sizes, [r["rss_mb"] for r in results], marker="o", label="process RSS")
+    ax.plot(sizes, [r["rss_mb"] - r["rss_empty_mb"] for r in results], marker="o", label="data (RSS delta)")
+    ax.plot(sizes, [r["columns_mb"] for r in results], marker="o", label="columnar history")
+    ax.set(xscale="log", yscale="log", xlabel="requests in store", ylabel="MB", title="Memory vs. data size")
+    ax.legend(fontsize="small")
+    paths.append(os.path.join(directory, "memory.png"))
+    fig.savefig(paths[-1], dpi=120, bbox_inches="tight")
+    return paths
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark endpoint latency and memory against data size")
+    parser.add_argument("--sizes", default="1000,10000,100000,1000000", help="Comma-separated request counts")
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=20, help="Timed calls per endpoint and size")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--superlinear", type=float, default=1.2, help="Log-log slope that flags an endpoint")
+    parser.add_argument("--plot-dir", default=None, help="Write latency.png and memory.png here")
+    parser.add_argument("--output", default=None, help="Write the raw results as JSON")
+    parser.add_argument("--child", type=int, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        print(json.dumps(measure(args.child, args.years, args.repeat, args.seed)))
+        return 0
+
+    sizes = sorted(int(n) for n in args.sizes.split(","))
+    results = []
+    print(f"{'requests':>9} {'users':>7} {'gen s':>7} {'load s':>7} {'RSS MB':>8} {'data MB':>8} {'cols MB':>8}")
+    for size in sizes:
+        try:
+            result = run(size, args.years, args.repeat, args.seed)
+        except subprocess.CalledProcessError as exc:
+            # Typically killed for running out of memory; larger sizes would fail too
+            print(f"{size:>9} failed (exit status {exc.returncode}); stopping the sweep")
+            break
+        results.append(result)
+        print(f"{size:>9} {result['users']:>7} {result['generate_seconds']:>7.1f} {result['load_seconds']:>7.1f} "
+              f"{result['rss_mb']:>8.1f} {result['rss_mb'] - result['rss_empty_mb']:>8.1f} "
+              f"{result['columns_mb']:>8.2f}")
+
+    if not results:
+        return 1
+    sizes = sizes[:len(results)]
+
+    print()
+    print(f"{'median ms (p95)':<20}" + "".join(f"{size:>18}" for size in sizes) + f"{'max slope':>11}")
+    flagged = []
+    for name in results[0]["endpoints"]:
+        timings = [r["endpoints"][name] for r in results]
+        steps = [s for s in slopes(sizes, [t["median_ms"] for t in timings]) if s is not None]
+        worst = max(steps) if steps else None
+        errors = sorted({status for t in timings for status in t["statuses"] if status >= 400})
+        line = f"{name:<20}" + "".join(f"{t['median_ms']:>9.2f} ({t['p95_ms']:>6.1f})" for t in timings)
+        line += f"{worst:>11.2f}" if worst is not None else f"{'-':>11}"
+        if errors:
+            line += f"  HTTP {','.join(map(str, errors))}"
+        if worst is not None and worst > args.superlinear:
+            flagged.append(name)
+            line += "  superlinear"
+        print(line)
+
+    data_mb = [r["rss_mb"] - r["rss_empty_mb"] for r in results]
+    memory_steps = [s for s in slopes(sizes, data_mb) if s is not None]
+    if memory_steps and max(memory_steps) > args.superlinear:
+        flagged.append("memory")
+    print()
+    print(f"Superlinear: {', '.join(flagged)}" if flagged else "No superlinear growth detected")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.plot_dir:
+        for path in plot(results, args.plot_dir):
+            print(f"Wrote {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""
+Throughput vs. number of gunicorn workers
+
+Starts the API under gunicorn with each requested worker count (shared
+state in a temporary directory), drives it with a pool of client
+processes using keep-alive connections, and reports requests/second and
+the speedup over the first configuration. On a machine with N cores
+throughput should scale close to linearly up to N workers, as long as
+the client processes themselves have cores to run on.
+
+Usage (from backend/):
+    python scripts/bench_workers.py [--workers 1,2,4] [--clients 8] [--duration 10] [--write-ratio 0.05]
+"""
+
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from typing import List, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+READ_PATHS = (
+    "/healthz",
+    "/api/v1/requests",
+    "/api/v1/policies",
+    "/api/v1/calendar",
+    "/api/v1/users/me",
+)
+
+
+def _client(port: int, duration: float, write_ratio: float, seed: int) -> Tuple[int, int, List[float]]:
+    """One load generator: (ok, errors, latencies in ms) over ``duration`` seconds"""
+    rng = random.Random(seed)
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    ok = errors = 0
+    latencies: List[float] = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        if rng.random() < write_ratio:
+            day = (date.today() + timedelta(days=rng.randrange(30, 3000))).isoformat()
+            body = json.dumps({"policy_id": 1, "start_date": day, "end_date": day, "reason": "bench"})
+            method, path, headers = "POST", "/api/v1/requests", {"Content-Type": "application/json"}
+        else:
+            body, method, path, headers = None, "GET", rng.choice(READ_PATHS), {}
+        started = time.perf_counter()
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            continue
+        latencies.append((time.perf_counter() - started) * 1000)
+        # Validation rejections (400) are a normal outcome for random writes
+        if response.status < 500:
+            ok += 1
+        else:
+            errors += 1
+    conn.close()
+    return ok, errors, latencies
+
+
+def _wait_ready(port: int, timeout: float = 60.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/healthz")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise SystemExit("Server did not become ready")
+
+
+def run(workers: int, clients: int, duration: float, write_ratio: float, port: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(
+            os.environ,
+            WEB_CONCURRENCY=str(workers),
+            BIND=f"127.0.0.1:{port}",
+            PERSISTENCE_DIR=os.path.join(tmp, "fakedb"),
+            AUDIT_LOG_DIR=os.path.join(tmp, "audit"),
+            LOG_LEVEL="warning",
+        )
+        server = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app.main:app"],
+            cwd=BACKEND_DIR, env=env,
+        )
+        try:
+            _wait_ready(port)
+            with multiprocessing.Pool(clients) as pool:
+                results = pool.starmap(_client, [(port, duration, write_ratio, seed) for seed in range(clients)])
+        finally:
+            server.send_signal(signal.SIGTERM)
+            server.wait(timeout=60)
+
+    ok = sum(r[0] for r in results)
+    errors = sum(r[1] for r in results)
+    latencies = sorted(lat for r in results for lat in r[2])
+    return {
+        "workers": workers,
+        "rps": ok / duration,
+        "errors": errors,
+        "p50_ms": latencies[len(latencies) // 2] if latencies else 0.0,
+        "p99_ms": latencies[int(len(latencies) * 0.99)] if latencies else 0.0,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark throughput against the number of workers")
+    parser.add_argument("--workers", default=None, help="Comma-separated worker counts (default: 1,2,...,cores)")
+    parser.add_argument("--clients", type=int, default=None, help="Client processes (default: 2 x max workers)")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--write-ratio", type=float, default=0.0, help="Share of requests that create a request")
+    parser.add_argument("--port", type=int, default=8099)
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    counts = [int(n) for n in args.workers.split(",")] if args.workers else \
+        sorted({1, 2, cores // 2, cores} - {0})
+    clients = args.clients or 2 * max(counts)
+    if clients + max(counts) > cores:
+        print(f"Note: {clients} clients + {max(counts)} workers on {cores} cores; "
+              f"client CPU will cap the measured scaling")
+
+    baseline = None
+    print(f"{'workers':>7} {'req/s':>10} {'speedup':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for workers in counts:
+        result = run(workers, clients, args.duration, args.write_ratio, args.port)
+        baseline = baseline or result["rps"]
+        print(f"{workers:>7} {result['rps']:>10.0f} {result['rps'] / baseline:>7.2f}x "
+              f"{result['p50_ms']:>8.2f} {result['p99_ms']:>8.2f} {result['errors']:>7}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""
+Import-time profile of the API
+
+Runs ``python -X importtime -c "import app.main"`` in a fresh interpreter
+and summarizes the slowest modules, so regressions in cold start (e.g. a
+heavy ML dependency imported at module level) show up immediately.
+
+The budget applies to the self time of the app's own modules (``app.*``):
+that is what this codebase controls. FastAPI, Starlette and Pydantic cost
+several hundred milliseconds on their own and are reported, not budgeted.
+
+Usage (from backend/):
+    python scripts/importtime_report.py [--module app.main] [--top 25] [--budget-ms 250]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from typing import List, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Self time of app.* modules; about 120-170 ms today, mostly FastAPI route
+# and Pydantic model construction in the routers, models and app.main
+APP_SELF_BUDGET_MS = 250.0
+
+
+def profile_imports(module: str) -> Tuple[float, List[Tuple[int, int, str]]]:
+    """Return (wall ms, [(self_us, cumulative_us, module)]) for importing ``module``"""
+    env = dict(os.environ, PYTHONPATH=BACKEND_DIR + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+    if result.returncode != 0:
+        sys.stderr.write(result.stderr)
+        raise SystemExit(f"Importing {module} failed")
+
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        # One separator space, then two spaces of indentation per nesting level
+        entries.append((int(self_us), int(cumulative_us), name[1:].rstrip()))
+    if not entries:
+        # Nothing to measure would otherwise pass as a 0 ms import
+        raise SystemExit(f"No -X importtime output for {module}")
+    return wall_ms, entries
+
+
+def summarize(entries: List[Tuple[int, int, str]]) -> Tuple[float, float]:
+    """(total import ms, self ms of the app's own modules)"""
+    # Top-level entries (no indentation) add up to the full import cost
+    total_us = sum(cum for _, cum, name in entries if not name.startswith(" "))
+    app_self_us = sum(self_us for self_us, _, name in entries if name.strip().startswith("app."))
+    return total_us / 1000, app_self_us / 1000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Summarize python -X importtime for the API")
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument("--budget-ms", type=float, default=APP_SELF_BUDGET_MS,
+                        help="Fail if the self time of app.* modules exceeds this")
+    args = parser.parse_args()
+
+    wall_ms, entries = profile_imports(args.module)
+    total_ms, app_self_ms = summarize(entries)
+
+    print(f"Import of {args.module}: {total_ms:.1f} ms imports, {wall_ms:.1f} ms wall (interpreter included)")
+    print(f"Own modules (app.*) self time: {app_self_ms:.1f} ms")
+    print(f"\nTop {args.top} by cumulative time:")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for self_us, cum_us, name in sorted(entries, key=lambda e: e[1], reverse=True)[:args.top]:
+        print(f"{cum_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {name}")
+
+    print(f"\nTop {args.top} by self time:")
+    for self_us, cum_us, name in sorted(entries, key=lambda e: e[0], reverse=True)[:args.top]:
+        print(f"{self_us / 1000:>9.1f} ms  {name.strip()}")
+
+    if app_self_ms > args.budget_ms:
+        print(f"\nOVER BUDGET: app.* self time {app_self_ms:.1f} ms > {args.budget_ms:.0f} ms", file=sys.stderr)
+        return 1
+    print(f"\nWithin budget: app.* self time {app_self_ms:.1f} ms <= {args.budget_ms:.0f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
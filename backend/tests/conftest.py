@@ -0,0 +1,13 @@
+"""
+Test configuration: the in-memory store runs volatile, with its audit log
+in a temporary directory, whatever the developer's .env says.
+"""
+
+import os
+import tempfile
+
+os.environ["AUDIT_LOG_DIR"] = tempfile.mkdtemp(prefix="andesmind-audit-")
+os.environ["PERSISTENCE_DIR"] = ""
+os.environ["SHARED_STATE"] = "false"
+os.environ["TRACING_ENABLED"] = "false"
+os.environ["PROFILING_ENABLED"] = "false"
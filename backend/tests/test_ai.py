@@ -0,0 +1,90 @@
+from datetime import date, timedelta
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.routers.ai import ensure_ai_importable
+from app.services.holidays import holidays_between
+from app.store import VALIDATOR, calculate_leave_units, get_current_user_mock
+
+ensure_ai_importable()
+
+from ai.services.absences import daily_absence_matrix  # noqa: E402
+from ai.services.forecasting import ForecastService  # noqa: E402
+from ai.services.holidays import workday_mask  # noqa: E402
+
+
+def test_suggested_dates_pass_the_validator():
+    with TestClient(app) as client:
+        response = client.get("/api/v1/ai/suggest-dates", params={"policy_id": 1, "days": 3, "use_forecast": "false"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["suggestions"]
+    user = get_current_user_mock()
+    for suggestion in body["suggestions"]:
+        start, end = date.fromisoformat(suggestion["start_date"]), date.fromisoformat(suggestion["end_date"])
+        assert VALIDATOR.validate(user, 1, start, end, calculate_leave_units(start, end)) == []
+
+
+def _approved(user_id, start, end):
+    return {"user_id": user_id, "status": "approved", "start_date": start.isoformat(), "end_date": end.isoformat()}
+
+
+def test_absence_matrix_counts_people_per_department_and_day():
+    origin = date(2024, 3, 1).toordinal()
+    starts = np.array([origin - 5, origin + 2, origin + 3, origin + 8])
+    ends = np.array([origin + 1, origin + 4, origin + 3, origin + 20])
+    matrix = daily_absence_matrix(starts, ends, np.array([0, 0, 1, 1]), 2, origin, 10)
+    assert matrix[0].tolist() == [1, 1, 1, 1, 1, 0, 0, 0, 0, 0]
+    assert matrix[1].tolist() == [0, 0, 0, 1, 0, 0, 0, 0, 1, 1]
+
+
+def test_workday_mask_uses_the_given_holidays():
+    start = date(2025, 1, 1)
+    mask = workday_mask(start.toordinal(), 14, holidays_between(start, start + timedelta(days=13)))
+    # New Year's Day and Epiphany (moved to Monday the 6th) are off, as are weekends
+    assert [date.fromordinal(start.toordinal() + int(i)) for i in np.flatnonzero(mask)][:3] == [
+        date(2025, 1, 2), date(2025, 1, 3), date(2025, 1, 7)
+    ]
+
+
+def _seasonal_history(today, peak_month):
+    """One person always absent, seven more during ``peak_month`` of past years"""
+    first = today - timedelta(days=3 * 365)
+    requests = [_approved(1, first, today + timedelta(days=400))]
+    for year in range(first.year, today.year + 1):
+        month_start = date(year, peak_month, 1)
+        month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+        if month_end < today:
+            requests += [_approved(user_id, month_start, month_end) for user_id in range(2, 9)]
+    return requests, {user_id: "Ventas" for user_id in range(1, 11)}
+
+
+def test_forecast_flags_a_seasonal_peak():
+    today = date.today()
+    peak_month = (today + timedelta(days=45)).month
+    service = ForecastService(lambda: _seasonal_history(today, peak_month), horizon_days=120)
+    service.load()
+
+    peaks = [date.fromisoformat(day) for day in service.forecast("Ventas")["peaks"]]
+    assert len(peaks) >= 20
+    assert {day.month for day in peaks} == {peak_month}
+
+
+def test_refit_after_retrain_after_new_requests():
+    today = date.today()
+    history = ([_approved(1, today - timedelta(days=30), today - timedelta(days=20))], {1: "Ventas", 2: "Ventas"})
+    service = ForecastService(lambda: history, history_days=200, horizon_days=30, retrain_after=3)
+    service.load()
+    model = service.model
+
+    for offset in (1, 2):
+        service.observe(_approved(2, today - timedelta(days=offset), today - timedelta(days=offset)))
+    service.forecast("Ventas")
+    assert service.model is model
+
+    service.observe(_approved(2, today - timedelta(days=5), today - timedelta(days=5)))
+    service.forecast("Ventas")
+    assert service.model is not model
+    assert service._new_since_fit == 0
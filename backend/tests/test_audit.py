@@ -0,0 +1,42 @@
+import os
+
+from app.core.config import BACKEND_DIR, Settings
+from app.services.audit import AuditLog
+
+
+def test_large_payload_is_stored_out_of_line(tmp_path):
+    log = AuditLog(str(tmp_path))
+    big = {"reason": "x" * 100_000, "status": "approved"}
+    log.append("request_created", "request", 7, actor_id=3, changes=big)
+    log.append("request_updated", "request", 7, actor_id=3, changes={"status": "rejected"})
+    log.flush()
+
+    records = log.query(entity_id=7)
+    assert [record["changes"] for record in records] == [big, {"status": "rejected"}]
+    assert len(os.listdir(tmp_path / "blobs")) == 1
+
+    # A missing blob degrades to the reference instead of failing the query
+    for name in os.listdir(tmp_path / "blobs"):
+        os.remove(tmp_path / "blobs" / name)
+    changes = log.query(entity_id=7)[0]["changes"]
+    assert changes["size"] > 100_000 and changes["fields"] == ["reason", "status"]
+    assert changes["blob_missing"] is True
+    log.close()
+
+
+def test_relative_data_dirs_resolve_against_backend():
+    settings = Settings(AUDIT_LOG_DIR="data/audit", PERSISTENCE_DIR="data/state")
+    assert settings.AUDIT_LOG_DIR == os.path.join(BACKEND_DIR, "data/audit")
+    assert settings.PERSISTENCE_DIR == os.path.join(BACKEND_DIR, "data/state")
+
+
+def test_entity_id_is_filtered_within_its_entity(tmp_path):
+    log = AuditLog(str(tmp_path))
+    log.append("user_updated", "user", 7, actor_id=1, changes={"role": ["employee", "manager"]})
+    log.append("request_created", "request", 7, actor_id=3, changes={"status": "pending"})
+    log.flush()
+
+    assert [record["entity"] for record in log.query(entity_id=7)] == ["user", "request"]
+    records = log.query(entity_id=7, entity="request")
+    assert [(record["entity"], record["action"]) for record in records] == [("request", "request_created")]
+    log.close()
@@ -0,0 +1,100 @@
+import asyncio
+import io
+import threading
+
+from app.core import workers
+from app.services.bulk_import import MemorySink, run_import
+from app import store
+
+REQUEST_HEADER = "employee_id,policy_id,start_date,end_date,reason,status,created_at\n"
+
+
+def _import(kind, text, **kwargs):
+    return run_import(kind, io.BytesIO(text.encode()), f"{kind}.csv", MemorySink(), **kwargs).to_dict()
+
+
+def test_request_rows_fail_individually():
+    report = _import("requests", REQUEST_HEADER + "\n".join([
+        "EMP001,1,2023-02-06,2023-02-07,ok,approved,2023-01-20T09:00:00",
+        "EMP001,1,2023-02-07,2023-02-08,overlaps previous row,approved,",
+        "EMP999,1,2023-03-06,2023-03-06,unknown employee,approved,",
+        "EMP001,9,2023-03-06,2023-03-06,unknown policy,approved,",
+        "EMP001,1,2023-03-10,2023-03-09,end before start,approved,",
+        "EMP001,1,2023-03-13,2023-03-13,bad status,archived,",
+        "EMP001,1,2023-03-14,2023-03-14,bad created_at,approved,notadate",
+        "EMP001,1,2023-03-15,2023-03-15,last row still imported,approved,2023-03-01",
+    ]), dry_run=True)
+
+    assert report["total_rows"] == 8
+    assert report["imported"] == 2
+    errors = {error["row"]: error["errors"][0] for error in report["errors"]}
+    assert sorted(errors) == [3, 4, 5, 6, 7, 8]
+    assert errors[3].startswith("start_date: Overlaps with request in row 2")
+    assert errors[4] == "employee_id: Unknown employee"
+    assert errors[5] == "policy_id: Policy not found"
+    assert errors[6].startswith("end_date")
+    assert errors[7].startswith("status: invalid status")
+    assert errors[8].startswith("created_at: invalid datetime")
+
+
+def test_bad_row_does_not_roll_back_or_abort_the_import():
+    before = len(store.FAKE_DB["requests"])
+    report = _import("requests", REQUEST_HEADER + "\n".join([
+        "EMP001,2,2022-05-02,2022-05-02,imported,approved,",
+        "EMP001,2,2022-05-03,2022-05-03,bad created_at,approved,yesterday",
+        "EMP001,2,2022-05-04,2022-05-04,imported,approved,",
+    ]), chunk_size=1)
+
+    assert (report["imported"], report["failed"]) == (2, 1)
+    assert len(store.FAKE_DB["requests"]) == before + 2
+
+
+def test_chunk_size_must_be_positive():
+    try:
+        _import("requests", REQUEST_HEADER, chunk_size=0)
+    except ValueError as exc:
+        assert "chunk_size" in str(exc)
+    else:
+        raise AssertionError("chunk_size=0 was accepted")
+
+
+def test_user_dry_run_validates_without_hashing():
+    report = _import("users", "\n".join([
+        "email,password,name,employee_id,department,position,role",
+        "new.user@example.com,Secreto123,Nuevo Usuario,EMP100,Ventas,Asesor,employee",
+        "empleado@comfachoco.com,Secreto123,Duplicado,EMP101,Ventas,Asesor,employee",
+        "other@example.com,weak,Clave Débil,EMP102,Ventas,Asesor,employee",
+        "another@example.com,Secreto123,Rol Inválido,EMP103,Ventas,Asesor,owner",
+    ]), dry_run=True)
+
+    assert (report["imported"], report["failed"]) == (1, 3)
+    assert [error["row"] for error in report["errors"]] == [3, 4, 5]
+    assert report["errors"][0]["errors"] == ["email: Email already registered"]
+    # Dry runs never start the password hashing pool
+    assert workers._pool is None
+
+
+def test_threaded_import_applies_batches_on_the_loop(monkeypatch):
+    write_threads = []
+    insert_request = store.insert_request
+
+    def recording_insert(request):
+        write_threads.append(threading.get_ident())
+        insert_request(request)
+
+    monkeypatch.setattr(store, "insert_request", recording_insert)
+    text = REQUEST_HEADER + "EMP001,2,2021-06-01,2021-06-02,threaded,approved,\n"
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        sink = MemorySink(loop)
+        report = await loop.run_in_executor(
+            None, lambda: run_import("requests", io.BytesIO(text.encode()), "requests.csv", sink)
+        )
+        return report.to_dict(), threading.get_ident()
+
+    report, loop_thread = asyncio.run(main())
+
+    assert report["imported"] == 1
+    assert write_threads == [loop_thread]
+    assert store.FAKE_DB["requests"][-1]["id"] == len(store.FAKE_DB["requests"])
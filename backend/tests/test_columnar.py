@@ -0,0 +1,61 @@
+import asyncio
+
+import numpy as np
+
+from app.services.columnar import RequestColumns
+from app.services.persistence import DurableStore
+
+
+def _requests(n, status="pending"):
+    return [
+        {"id": i, "user_id": i % 7 + 1, "policy_id": 1, "status": status,
+         "start_date": "2024-03-04", "end_date": "2024-03-05", "duration_units": 4}
+        for i in range(1, n + 1)
+    ]
+
+
+def test_saved_columns_load_memory_mapped(tmp_path):
+    columns = RequestColumns.from_requests(_requests(50))
+    columns.save(str(tmp_path))
+
+    loaded = RequestColumns.load(str(tmp_path))
+    assert isinstance(loaded._columns["id"], np.memmap)
+    for name, column in columns.view().items():
+        assert np.array_equal(loaded.view()[name], column)
+
+    # Copy-on-write: a status change doesn't reach the file
+    loaded.set_status(3, "approved")
+    assert RequestColumns.load(str(tmp_path)).view()["status"][2] == 0
+    # Appending past the saved rows moves the columns into memory
+    loaded.append(_requests(51)[-1])
+    assert loaded.size == 51 and not isinstance(loaded._columns["id"], np.memmap)
+
+
+def test_catch_up_applies_later_statuses_and_inserts(tmp_path):
+    requests = _requests(10)
+    RequestColumns.from_requests(requests).save(str(tmp_path))
+    requests[4]["status"] = "rejected"
+    requests += _requests(12)[10:]
+
+    loaded = RequestColumns.load(str(tmp_path))
+    loaded.catch_up(requests)
+    expected = RequestColumns.from_requests(requests).view()
+    for name, column in loaded.view().items():
+        assert np.array_equal(column, expected[name])
+
+
+def test_columns_are_saved_with_snapshots(tmp_path):
+    db = {"requests": _requests(5)}
+    durable = DurableStore(str(tmp_path), fsync="always")
+    durable.columns = RequestColumns.from_requests(db["requests"])
+    for row in db["requests"]:
+        durable.log_insert("requests", row)
+    asyncio.run(durable.snapshot_async(db))
+    durable.close()
+
+    restored = {"requests": []}
+    reopened = DurableStore(str(tmp_path))
+    reopened.recover(restored)
+    path = reopened.saved_columns()
+    assert path is not None
+    assert np.array_equal(RequestColumns.load(path).view()["id"], np.arange(1, 6))
@@ -0,0 +1,59 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.compression import CompressionMiddleware, _accepted_encodings, negotiate
+
+BOTH = ("br", "gzip")
+
+
+@pytest.mark.parametrize("header, supported, expected", [
+    ("gzip, br", BOTH, ("br", True)),                        # equal weights: Brotli
+    ("br;q=0.5, gzip", BOTH, ("gzip", True)),                # highest q wins
+    ("br", ("gzip",), (None, True)),                         # nothing supported
+    ("*", BOTH, ("br", True)),
+    ("*;q=0.3, gzip;q=0.8", BOTH, ("gzip", True)),
+    ("gzip;q=0, *", BOTH, ("br", True)),
+    ("gzip;q=0.5, identity", BOTH, (None, True)),            # identity preferred
+    ("gzip;q=0.5, identity;q=0", BOTH, ("gzip", False)),
+    ("identity;q=0", BOTH, (None, False)),
+    ("*;q=0", BOTH, (None, False)),
+    ("x-gzip", ("gzip",), ("gzip", True)),
+    ("gzip;level=1;q=0.2, br;q=0.1", BOTH, ("gzip", True)),  # other params ignored
+    ("gzip;q=bogus", BOTH, (None, True)),
+    ("", BOTH, (None, True)),
+])
+def test_negotiation(header, supported, expected):
+    assert negotiate(_accepted_encodings(header.encode()), supported) == expected
+
+
+def _client(body, content_type=b"application/json", headers=()):
+    async def endpoint(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", content_type), *headers]})
+        await send({"type": "http.response.body", "body": body})
+
+    return TestClient(CompressionMiddleware(endpoint, minimum_size=100, cache=None))
+
+
+def test_vary_on_every_compressible_response():
+    big, small = b"[" + b"1," * 500 + b"1]", b"[1]"
+    response = _client(big).get("/", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip" and response.headers["vary"] == "Accept-Encoding"
+    assert response.content == big  # decoded by the client
+
+    for client, accept in ((_client(small), "gzip"), (_client(big), "identity")):
+        response = client.get("/", headers={"Accept-Encoding": accept})
+        assert "content-encoding" not in response.headers
+        assert response.headers["vary"] == "Accept-Encoding"
+
+    # Merged into an existing Vary; binary types are left alone
+    response = _client(small, headers=[(b"vary", b"Origin")]).get("/", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["vary"] == "Origin, Accept-Encoding"
+    response = _client(big, content_type=b"image/png").get("/", headers={"Accept-Encoding": "gzip"})
+    assert "vary" not in response.headers and "content-encoding" not in response.headers
+
+
+def test_identity_refused_compresses_small_bodies():
+    response = _client(b"[1]").get("/", headers={"Accept-Encoding": "gzip, identity;q=0"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.content == b"[1]"
@@ -0,0 +1,98 @@
+import math
+import random
+from datetime import date, timedelta
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.routers import analysis
+from app.services.columnar import RequestColumns
+from app.services.conflicts import collect_intervals, detect_conflicts, sweep_department
+from app.services.holidays import business_days_between
+from app.store import get_user_by_id
+
+D = date(2027, 3, 1).toordinal()  # a Monday
+
+
+def test_sweep_reports_understaffed_business_days():
+    intervals = [
+        (1, 1, D, D + 4),           # Mon-Fri
+        (2, 2, D + 2, D + 8),       # Wed-Tue
+        (3, 1, D + 12, D + 13),     # both away on a weekend only
+        (4, 2, D + 12, D + 13),
+    ]
+    conflicts = sweep_department("Tecnología", 4, intervals, D, D + 30, 0.75)
+    assert conflicts == [{
+        "department": "Tecnología", "headcount": 4, "required": 3, "available": 2, "absent": 2,
+        "business_days": 3, "request_ids": [1, 2],
+        "start_date": "2027-03-03", "end_date": "2027-03-05",
+    }]
+
+
+def test_sweep_matches_a_day_by_day_count():
+    rng = random.Random(7)
+    headcount, threshold = 6, 0.7
+    intervals = []
+    for request_id in range(1, 80):
+        start = D + rng.randrange(120)
+        intervals.append((request_id, rng.randrange(1, headcount + 1), start, start + rng.randrange(10)))
+    period_start, period_end = D + 10, D + 100
+    conflicts = sweep_department("Ventas", headcount, intervals, period_start, period_end, threshold)
+
+    flagged = set()
+    for conflict in conflicts:
+        start = date.fromisoformat(conflict["start_date"]).toordinal()
+        end = date.fromisoformat(conflict["end_date"]).toordinal()
+        assert conflict["business_days"] == business_days_between(start, end)
+        flagged.update(day for day in range(start, end + 1) if business_days_between(day, day))
+    expected = {
+        day for day in range(period_start, period_end + 1)
+        if business_days_between(day, day)
+        and headcount - len({user for _, user, s, e in intervals if s <= day <= e}) < math.ceil(threshold * headcount)
+    }
+    assert flagged == expected
+
+
+def test_columnar_collection_and_pool_match_inline():
+    rng = random.Random(3)
+    requests, headcounts = [], {}
+    for dept in range(4):
+        members = list(range(dept * 10 + 1, dept * 10 + 11))
+        headcounts[f"D{dept}"] = (len(members), members)
+        for _ in range(60):
+            start = date.fromordinal(D + rng.randrange(-30, 120))
+            requests.append({
+                "id": len(requests) + 1, "user_id": rng.choice(members), "policy_id": 1,
+                "status": rng.choice(["approved", "pending", "rejected"]),
+                "start_date": start.isoformat(), "end_date": (start + timedelta(days=rng.randrange(8))).isoformat(),
+                "duration_units": 2,
+            })
+    start_date, end_date = date.fromordinal(D), date.fromordinal(D + 90)
+    by_department = collect_intervals(RequestColumns.from_requests(requests).view(), headcounts,
+                                      start_date, end_date, ("approved", "pending"))
+
+    expected_ids = sorted(
+        r["id"] for r in requests
+        if r["status"] != "rejected" and r["start_date"] <= end_date.isoformat()
+        and r["end_date"] >= start_date.isoformat()
+    )
+    assert sorted(i[0] for _, intervals in by_department.values() for i in intervals) == expected_ids
+
+    inline = detect_conflicts(by_department, start_date, end_date, 0.8)
+    pooled = detect_conflicts(by_department, start_date, end_date, 0.8, workers=2, pool_min_requests=0)
+    assert inline["summary"]["mode"] == "inline" and pooled["summary"]["mode"] == "process_pool"
+    assert pooled["conflicts"] == inline["conflicts"] and inline["conflicts"]
+
+
+def test_jobs_are_only_visible_to_their_owner_and_hr(monkeypatch):
+    hr, manager = get_user_by_id(1), get_user_by_id(2)
+    with TestClient(app) as client:
+        monkeypatch.setattr(analysis, "get_current_user_mock", lambda: hr)
+        job = client.post("/api/v1/analysis/conflicts/jobs").json()
+        assert client.get(f"/api/v1/analysis/conflicts/jobs/{job['id']}").json()["status"] == "completed"
+
+        monkeypatch.setattr(analysis, "get_current_user_mock", lambda: manager)
+        assert client.get(f"/api/v1/analysis/conflicts/jobs/{job['id']}").status_code == 404
+        own = client.post("/api/v1/analysis/conflicts/jobs").json()
+        assert own["params"]["department"] == manager["department"]
+        assert client.get(f"/api/v1/analysis/conflicts/jobs/{own['id']}").status_code == 200
@@ -0,0 +1,42 @@
+from datetime import date, timedelta
+
+import numpy as np
+
+from app.routers.ai import ensure_ai_importable
+from app.services.holidays import business_days_between, colombian_holidays, holidays_between
+from app.store import calculate_business_days, calculate_leave_units
+from app.services.validation import UNITS_PER_DAY
+
+
+def test_holidays_are_not_charged():
+    # San José (19 March 2027, a Friday) moves to Monday 22 March
+    assert date(2027, 3, 22) in colombian_holidays(2027)
+    assert calculate_business_days(date(2027, 3, 17), date(2027, 3, 24)) == 5
+    assert calculate_leave_units(date(2027, 3, 22), date(2027, 3, 22), half_day=True) == 0
+    assert calculate_leave_units(date(2027, 3, 23), date(2027, 3, 23), half_day=True) == UNITS_PER_DAY // 2
+
+
+def test_business_days_match_a_day_by_day_count():
+    start = date(2026, 12, 1)
+    for length in range(0, 60, 7):
+        end = start + timedelta(days=length)
+        expected = sum(
+            1 for i in range(length + 1)
+            if (start + timedelta(days=i)).weekday() < 5
+            and start + timedelta(days=i) not in colombian_holidays((start + timedelta(days=i)).year)
+        )
+        assert business_days_between(start.toordinal(), end.toordinal()) == expected
+
+
+def test_suggested_windows_cost_their_working_days():
+    ensure_ai_importable()
+    from ai.services.suggestions import search_days, suggest_dates
+
+    today, latest = date(2027, 3, 1), date(2027, 4, 30)
+    holidays = holidays_between(today, today + timedelta(days=search_days(today, latest, 5)))
+    suggestions = suggest_dates(today, 5, today, latest, np.zeros(120), np.zeros(120, dtype=bool), 4,
+                                limit=10, holidays=holidays)
+    assert suggestions
+    for suggestion in suggestions:
+        start, end = date.fromisoformat(suggestion["start_date"]), date.fromisoformat(suggestion["end_date"])
+        assert calculate_business_days(start, end) == suggestion["working_days"] == 5
@@ -0,0 +1,57 @@
+from fastapi.testclient import TestClient
+
+from app.core.idempotency import IdempotencyMiddleware, IdempotencyStore
+
+
+def _client(**kwargs):
+    calls = []
+
+    async def endpoint(scope, receive, send):
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+        calls.append((scope["query_string"], body))
+        payload = f"call {len(calls)}".encode()
+        await send({"type": "http.response.start", "status": 201,
+                    "headers": [(b"content-type", b"text/plain"), (b"content-length", str(len(payload)).encode())]})
+        await send({"type": "http.response.body", "body": payload})
+
+    return TestClient(IdempotencyMiddleware(endpoint, store=IdempotencyStore(), **kwargs)), calls
+
+
+def test_retry_is_replayed_without_running_again():
+    client, calls = _client()
+    first = client.post("/api/v1/requests", content=b'{"days": 2}', headers={"Idempotency-Key": "abc"})
+    retry = client.post("/api/v1/requests", content=b'{"days": 2}', headers={"Idempotency-Key": "abc"})
+    assert first.status_code == retry.status_code == 201
+    assert retry.text == first.text == "call 1"
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert len(calls) == 1
+
+    # Another key, or another caller, executes again
+    client.post("/api/v1/requests", content=b'{"days": 2}', headers={"Idempotency-Key": "def"})
+    client.post("/api/v1/requests", content=b'{"days": 2}',
+                headers={"Idempotency-Key": "abc", "Authorization": "Bearer other"})
+    assert len(calls) == 3
+
+
+def test_reusing_a_key_for_a_different_request_is_rejected():
+    client, calls = _client()
+    client.post("/api/v1/requests?notify=true", content=b"{}", headers={"Idempotency-Key": "abc"})
+    assert client.post("/api/v1/requests?notify=true", content=b'{"x": 1}',
+                       headers={"Idempotency-Key": "abc"}).status_code == 422
+    assert client.post("/api/v1/requests?notify=false", content=b"{}",
+                       headers={"Idempotency-Key": "abc"}).status_code == 422
+    assert len(calls) == 1
+
+
+def test_oversized_keyed_body_is_refused():
+    client, calls = _client(max_request_bytes=16)
+    response = client.post("/api/v1/requests", content=b"x" * 17, headers={"Idempotency-Key": "abc"})
+    assert response.status_code == 413
+    # Without a key the body is not buffered and the cap doesn't apply
+    assert client.post("/api/v1/requests", content=b"x" * 17).status_code == 201
+    assert len(calls) == 1
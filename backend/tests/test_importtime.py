@@ -0,0 +1,25 @@
+import importlib.util
+import os
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _report():
+    path = os.path.join(BACKEND_DIR, "scripts", "importtime_report.py")
+    spec = importlib.util.spec_from_file_location("importtime_report", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_summary_splits_total_and_app_self_time():
+    entries = [(100, 500, "fastapi"), (50, 300, "  fastapi.routing"), (2000, 2600, "app.main"),
+               (300, 300, "  app.models"), (100, 100, "    pydantic.main")]
+    assert _report().summarize(entries) == (3.1, 2.3)
+
+
+def test_app_modules_stay_within_the_import_budget():
+    report = _report()
+    _, entries = report.profile_imports("app.main")
+    _, app_self_ms = report.summarize(entries)
+    assert app_self_ms <= report.APP_SELF_BUDGET_MS
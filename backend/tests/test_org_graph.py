@@ -0,0 +1,87 @@
+from app.services.org_graph import OrgGraph
+
+
+def _user(user_id, role="employee", department="Tecnología", **extra):
+    return {
+        "id": user_id,
+        "email": f"user{user_id}@example.com",
+        "employee_id": f"EMP{user_id:03d}",
+        "role": role,
+        "department": department,
+        **extra,
+    }
+
+
+def _request(request_id, user_id, status="pending"):
+    return {"id": request_id, "user_id": user_id, "status": status}
+
+
+def _graph():
+    users = [
+        _user(1, "hr_admin", "RRHH"),
+        _user(2, "manager"),
+        _user(3),
+        _user(4, department="Ventas"),
+        _user(5, "manager", "Ventas"),
+        _user(6, manager_id=2, department="Ventas"),
+    ]
+    requests = [_request(1, 3), _request(2, 4), _request(3, 6, "approved"), _request(4, 2)]
+    return OrgGraph.build(users, requests)
+
+
+def test_manager_sees_own_department_only():
+    graph = _graph()
+    manager = graph.users_by_id[2]
+    assert graph.visible_request_ids(manager) == {1, 4}
+    assert graph.can_view_request(manager, graph.requests_by_id[1])
+    assert not graph.can_view_request(manager, graph.requests_by_id[2])
+    assert [r["id"] for r in graph.pending_for(manager)] == [1, 4]
+
+
+def test_employee_sees_own_requests():
+    graph = _graph()
+    employee = graph.users_by_id[3]
+    assert graph.visible_request_ids(employee) == {1}
+    assert not graph.can_view_request(employee, graph.requests_by_id[4])
+
+
+def test_hr_sees_everything_as_a_set():
+    graph = _graph()
+    visible = graph.visible_request_ids(graph.users_by_id[1])
+    assert isinstance(visible, set)
+    assert visible == {1, 2, 3, 4}
+    assert [r["id"] for r in graph.pending_for(graph.users_by_id[1])] == [1, 2, 4]
+
+
+def test_new_request_is_visible_to_department_managers():
+    graph = _graph()
+    graph.add_request(_request(5, 3))
+    assert 5 in graph.visible_request_ids(graph.users_by_id[2])
+    assert 5 not in graph.visible_request_ids(graph.users_by_id[5])
+
+
+def test_moving_a_user_moves_their_requests():
+    graph = _graph()
+    graph.update_user(3, department="Ventas")
+    assert graph.visible_request_ids(graph.users_by_id[2]) == {4}
+    assert graph.visible_request_ids(graph.users_by_id[5]) == {1, 2, 3}
+
+
+def test_demoted_manager_loses_department_scope():
+    graph = _graph()
+    graph.update_user(2, role="employee")
+    assert graph.visible_request_ids(graph.users_by_id[2]) == {4}
+    assert graph.pending_for(graph.users_by_id[1])
+    assert graph.department_managers["Tecnología"] == []
+
+
+def test_approver_chain_follows_direct_manager_changes():
+    graph = _graph()
+    assert graph.approver_chain(6) == (2, 5, 1)
+    graph.update_user(6, manager_id=None)
+    assert graph.approver_chain(6) == (5, 1)
+    graph.update_user(2, role="employee")
+    graph.update_user(6, manager_id=2)
+    assert graph.approver_chain(6) == (2, 5, 1)
+    assert graph.can_decide_request(graph.users_by_id[5], graph.requests_by_id[3])
+    assert not graph.can_decide_request(graph.users_by_id[6], graph.requests_by_id[3])
@@ -0,0 +1,101 @@
+import asyncio
+import os
+
+from app.services import persistence
+from app.services.persistence import DurableStore
+
+
+def _rows(n):
+    return [{"id": i, "status": "pending"} for i in range(1, n + 1)]
+
+
+def test_wal_replay_restores_inserts_and_updates(tmp_path):
+    durable = DurableStore(str(tmp_path), fsync="always")
+    for row in _rows(3):
+        durable.log_insert("requests", row)
+    durable.log_update("requests", 2, {"status": "approved"})
+    durable.close()
+
+    db = {"requests": []}
+    stats = DurableStore(str(tmp_path)).recover(db)
+    assert stats["replayed"] == 4 and stats["skipped"] == 0
+    assert db["requests"] == [{"id": 1, "status": "pending"}, {"id": 2, "status": "approved"},
+                              {"id": 3, "status": "pending"}]
+
+
+def test_update_of_missing_row_is_skipped(tmp_path):
+    durable = DurableStore(str(tmp_path), fsync="always")
+    durable.log_insert("requests", {"id": 1, "status": "pending"})
+    durable.log_update("requests", 99, {"status": "approved"})
+    durable.log_update("requests", 1, {"status": "rejected"})
+    durable.close()
+
+    db = {"requests": []}
+    stats = DurableStore(str(tmp_path)).recover(db)
+    assert stats["replayed"] == 2 and stats["skipped"] == 1
+    assert db["requests"] == [{"id": 1, "status": "rejected"}]
+
+
+def test_torn_tail_is_truncated(tmp_path):
+    durable = DurableStore(str(tmp_path), fsync="always")
+    durable.log_insert("requests", {"id": 1, "status": "pending"})
+    durable.close()
+    wal = os.path.join(tmp_path, durable._wal_files()[-1])
+    intact = os.path.getsize(wal)
+    with open(wal, "ab") as f:
+        f.write(b"\x40\x00\x00\x00partial")
+
+    db = {"requests": []}
+    assert DurableStore(str(tmp_path)).recover(db)["replayed"] == 1
+    assert db["requests"] == [{"id": 1, "status": "pending"}]
+    assert os.path.getsize(wal) == intact
+
+
+def test_snapshot_is_a_copy_at_the_rotation_point(tmp_path):
+    db = {"requests": _rows(2)}
+    durable = DurableStore(str(tmp_path), fsync="always")
+    for row in db["requests"]:
+        durable.log_insert("requests", row)
+    asyncio.run(durable.snapshot_async(db))
+    # Later writes land in the new WAL segment, not in the snapshot
+    db["requests"][0]["status"] = "approved"
+    durable.log_update("requests", 1, {"status": "approved"})
+    durable.close()
+
+    restored = {"requests": []}
+    stats = DurableStore(str(tmp_path)).recover(restored)
+    assert stats["snapshot_seq"] == 2 and stats["replayed"] == 1
+    assert restored == db
+
+
+def test_writes_between_snapshot_slices_recover_to_the_final_state(tmp_path, monkeypatch):
+    db = {"requests": _rows(10)}
+    durable = DurableStore(str(tmp_path), fsync="always")
+    for row in db["requests"]:
+        durable.log_insert("requests", row)
+    monkeypatch.setattr(persistence, "SNAPSHOT_SLICE_ROWS", 3)
+    slices = []
+
+    def write_between_slices(seconds):
+        # A handler runs between two slices: it changes a row on both sides
+        # of the slice boundary and inserts a new one
+        slices.append(seconds)
+        if len(slices) == 1:
+            with durable.locked():
+                for row_id in (2, 8):
+                    db["requests"][row_id - 1]["status"] = "approved"
+                    durable.log_update("requests", row_id, {"status": "approved"})
+                row = {"id": 11, "status": "pending"}
+                db["requests"].append(row)
+                durable.log_insert("requests", row)
+
+    monkeypatch.setattr(persistence.time, "sleep", write_between_slices)
+    asyncio.run(durable.snapshot_async(db))
+    monkeypatch.undo()
+    durable.close()
+
+    assert len(slices) == 4
+    restored = {"requests": []}
+    stats = DurableStore(str(tmp_path)).recover(restored)
+    assert stats["snapshot_seq"] == 10 and stats["replayed"] == 3
+    assert restored == db
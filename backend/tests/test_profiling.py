@@ -0,0 +1,101 @@
+import asyncio
+import threading
+import time
+from collections import Counter
+
+from fastapi.testclient import TestClient
+
+from app.core.profiling import PROFILES, Profile, ProfileStore, ProfilingMiddleware
+from app.main import app
+from app.routers import admin
+from app.store import get_user_by_id
+
+
+def _request(middleware, headers=()):
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/work", "headers": list(headers)}
+    asyncio.run(middleware(scope, receive, send))
+    return dict(sent[0]["headers"])
+
+
+async def _ok(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+def test_only_requests_with_the_token_are_profiled():
+    store = ProfileStore()
+    middleware = ProfilingMiddleware(_ok, store=store, token="s3cret")
+    assert b"x-profile-id" not in _request(middleware)
+    assert b"x-profile-id" not in _request(middleware, [(b"x-profile", b"guess")])
+    headers = _request(middleware, [(b"x-profile", b"s3cret")])
+    assert [p["id"] for p in store.list()] == [headers[b"x-profile-id"].decode()]
+
+    # Debug mode without a token accepts any value; no token at all, nothing
+    assert b"x-profile-id" in _request(ProfilingMiddleware(_ok, store=store, allow_any_token=True),
+                                       [(b"x-profile", b"1")])
+    assert b"x-profile-id" not in _request(ProfilingMiddleware(_ok, store=store), [(b"x-profile", b"1")])
+
+
+def test_ring_buffer_keeps_the_newest_profiles():
+    store = ProfileStore(max_profiles=3)
+    profiles = [Profile("GET", f"/{i}", 0.001) for i in range(5)]
+    for profile in profiles:
+        store.add(profile)
+    assert [p["path"] for p in store.list()] == ["/4", "/3", "/2"]
+    assert store.get(profiles[0].id) is None
+
+
+def test_threads_started_mid_profile_are_named():
+    def busy():
+        deadline = time.perf_counter() + 0.1
+        while time.perf_counter() < deadline:
+            pass
+
+    async def spawns_a_worker(scope, receive, send):
+        worker = threading.Thread(target=busy, name="late-worker")
+        worker.start()
+        await asyncio.sleep(0.15)
+        worker.join()
+        await _ok(scope, receive, send)
+
+    store = ProfileStore()
+    _request(ProfilingMiddleware(spawns_a_worker, store=store, allow_any_token=True), [(b"x-profile", b"1")])
+    profile = store.get(store.list()[0]["id"])
+    assert profile.samples == sum(profile.stacks.values()) > 0
+    assert any(stack.startswith("late-worker;") for stack in profile.stacks)
+
+
+def test_profile_endpoints_render_collapsed_and_html(monkeypatch):
+    profile = Profile("GET", "/api/v1/calendar", 0.001)
+    profile.stacks = Counter({
+        "MainThread;handler (calendar.py:10);<loop> (x.py:1)": 3,
+        "MainThread;handler (calendar.py:10)": 1,
+    })
+    profile.samples = 4
+    PROFILES.add(profile)
+
+    with TestClient(app) as client:
+        assert client.get(f"/api/v1/admin/profiles/{profile.id}").status_code == 403
+        monkeypatch.setattr(admin, "get_current_user_mock", lambda: get_user_by_id(1))
+        collapsed = client.get(f"/api/v1/admin/profiles/{profile.id}").text
+        page = client.get(f"/api/v1/admin/profiles/{profile.id}", params={"format": "html"})
+        unknown = client.get(f"/api/v1/admin/profiles/{profile.id}", params={"format": "svg"})
+        listed = client.get("/api/v1/admin/profiles").json()
+
+    assert collapsed.splitlines() == [
+        "MainThread;handler (calendar.py:10);<loop> (x.py:1) 3",
+        "MainThread;handler (calendar.py:10) 1",
+    ]
+    assert page.headers["content-type"].startswith("text/html")
+    assert "100.0% (4) handler (calendar.py:10)" in page.text
+    assert "&lt;loop&gt;" in page.text
+    assert unknown.status_code == 400
+    assert listed[0]["id"] == profile.id
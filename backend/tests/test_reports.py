@@ -0,0 +1,28 @@
+import os
+import subprocess
+import sys
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.routers import admin
+from app.store import get_user_by_id
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_importing_the_api_does_not_load_numpy():
+    code = "import sys, app.main; print('numpy' in sys.modules, 'app.services.columnar' in sys.modules)"
+    result = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, env=dict(os.environ, PYTHONPATH=BACKEND_DIR),
+                            capture_output=True, text=True, check=True)
+    assert result.stdout.split() == ["False", "False"]
+
+
+def test_leave_summary_counts_units_per_department(monkeypatch):
+    monkeypatch.setattr(admin, "get_current_user_mock", lambda: get_user_by_id(1))
+    with TestClient(app) as client:
+        summary = client.get("/api/v1/admin/reports/summary", params={"year": 2024}).json()
+    # The seed request: five business days for EMP001 in Tecnología
+    assert summary["days_by_department"]["Tecnología"] >= 5.0
+    assert summary["total_days"] == sum(row["days"] for row in summary["rows"])
+    assert sum(summary["days_by_department"].values()) == summary["total_days"]
@@ -0,0 +1,100 @@
+import asyncio
+import threading
+
+from app.services.persistence import DurableStore
+from app.services.pubsub import InvalidationBus
+
+
+class Worker:
+    """One worker process's view of the shared store: its own db and DurableStore"""
+
+    def __init__(self, directory):
+        self.db = {"requests": []}
+        self.durable = DurableStore(directory, fsync="always", shared=True, apply=self.apply)
+        self.durable.recover(self.db)
+
+    def apply(self, op, table, args):
+        if op == "insert":
+            self.db[table].append(args[0])
+        else:
+            row_id, changes = args
+            next(row for row in self.db[table] if row["id"] == row_id).update(changes)
+
+    def insert(self, status="pending"):
+        with self.durable.locked():
+            row = {"id": len(self.db["requests"]) + 1, "status": status}
+            self.db["requests"].append(row)
+            self.durable.log_insert("requests", row)
+        return row
+
+
+def test_a_write_in_one_worker_reaches_the_other_on_sync(tmp_path):
+    first, second = Worker(str(tmp_path)), Worker(str(tmp_path))
+    first.insert()
+    with first.durable.locked():
+        first.db["requests"][0]["status"] = "approved"
+        first.durable.log_update("requests", 1, {"status": "approved"})
+
+    assert second.db["requests"] == []
+    assert second.durable.sync() == 2
+    assert second.db["requests"] == [{"id": 1, "status": "approved"}]
+    # Nothing new: the tail check is a couple of stats
+    assert second.durable.sync() == 0
+
+
+def test_pubsub_nudge_triggers_the_tail(tmp_path):
+    first, second = Worker(str(tmp_path / "db")), Worker(str(tmp_path / "db"))
+    first_bus = InvalidationBus(str(tmp_path / "run"), name="first")
+    second_bus = InvalidationBus(str(tmp_path / "run"), name="second")
+    nudged = []
+    second_bus.subscribe("wal", lambda seq: nudged.append((seq, second.durable.sync())))
+
+    async def main():
+        first_bus.start()
+        second_bus.start()
+        try:
+            first.insert()
+            assert first_bus.publish("wal", first.durable.seq) == 1
+            for _ in range(100):
+                if nudged:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            first_bus.close()
+            second_bus.close()
+
+    asyncio.run(main())
+    assert nudged == [(1, 1)]
+    assert second.db["requests"] == [{"id": 1, "status": "pending"}]
+
+
+def test_flock_serialises_writers(tmp_path):
+    first, second = Worker(str(tmp_path)), Worker(str(tmp_path))
+    entered = threading.Event()
+
+    def write_in_second():
+        with second.durable.locked():
+            entered.set()
+
+    with first.durable.locked():
+        waiting = threading.Thread(target=write_in_second)
+        waiting.start()
+        assert not entered.wait(0.2)
+    waiting.join(5)
+    assert entered.is_set()
+
+    # Concurrent writers: each starts from the other's latest state, so
+    # ids never collide and the WAL has no gaps
+    def write_many(worker):
+        for _ in range(50):
+            worker.insert()
+
+    threads = [threading.Thread(target=write_many, args=(worker,)) for worker in (first, second)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    restored = {"requests": []}
+    DurableStore(str(tmp_path), shared=True).recover(restored)
+    assert [row["id"] for row in restored["requests"]] == list(range(1, 101))
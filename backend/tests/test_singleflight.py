@@ -0,0 +1,71 @@
+import asyncio
+import threading
+
+from app.core.singleflight import SingleFlight
+
+
+def _gated(calls, release, result=None, error=None):
+    def compute():
+        calls.append(threading.get_ident())
+        release.wait(5)
+        if error is not None:
+            raise error
+        return result
+    return compute
+
+
+def test_concurrent_identical_queries_run_once_and_share_the_result():
+    flights = SingleFlight()
+    calls = []
+    release = threading.Event()
+    compute = _gated(calls, release, result={"rows": [1, 2, 3]})
+
+    async def main():
+        waiters = [asyncio.ensure_future(flights.run(("summary", 2024), compute)) for _ in range(5)]
+        await asyncio.sleep(0.05)
+        assert flights.stats() == {"executed": 1, "coalesced": 4, "in_flight": 1}
+        release.set()
+        return await asyncio.gather(*waiters)
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert flights.stats()["in_flight"] == 0
+
+
+def test_an_error_reaches_every_waiter_and_clears_the_key():
+    flights = SingleFlight()
+    calls = []
+    release = threading.Event()
+    failing = _gated(calls, release, error=ValueError("boom"))
+
+    async def main():
+        waiters = [asyncio.ensure_future(flights.run("key", failing)) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        release.set()
+        outcomes = await asyncio.gather(*waiters, return_exceptions=True)
+        assert flights.stats()["in_flight"] == 0
+        # The next call computes again instead of reusing the failure
+        retried = await flights.run("key", lambda: "ok")
+        return outcomes, retried
+
+    outcomes, retried = asyncio.run(main())
+    assert len(calls) == 1
+    assert [type(outcome) for outcome in outcomes] == [ValueError] * 3
+    assert retried == "ok"
+
+
+def test_a_cancelled_waiter_does_not_cancel_the_others():
+    flights = SingleFlight()
+    release = threading.Event()
+    compute = _gated([], release, result=42)
+
+    async def main():
+        first = asyncio.ensure_future(flights.run("key", compute))
+        second = asyncio.ensure_future(flights.run("key", compute))
+        await asyncio.sleep(0.05)
+        first.cancel()
+        release.set()
+        return await second, first.cancelled()
+
+    assert asyncio.run(main()) == (42, True)
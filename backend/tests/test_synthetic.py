@@ -0,0 +1,83 @@
+import importlib.util
+import os
+from datetime import date
+
+import pytest
+
+from app import store
+from app.models import PolicyResponse
+from app.services.bulk_import import MemorySink
+from app.services.synthetic import generate_dataset, load_into
+from app.services.validation import ACTIVE_STATUSES, RequestValidator
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TODAY = date(2019, 6, 1)
+# Rules about when a request is filed, not about the data itself
+FILING_RULES = {"start_in_past", "advance_notice"}
+
+
+def test_same_seed_same_dataset():
+    assert generate_dataset(400, years=2, seed=3, today=TODAY) == generate_dataset(400, years=2, seed=3, today=TODAY)
+    assert generate_dataset(400, years=2, seed=3, today=TODAY) != generate_dataset(400, years=2, seed=4, today=TODAY)
+
+
+def test_generated_requests_pass_the_validator():
+    users, requests = generate_dataset(2000, years=3, seed=1, today=TODAY)
+    assert len(requests) == 2000
+    validator = RequestValidator()
+    for policy in store.FAKE_DB["policies"]:
+        validator.compile(PolicyResponse(**policy))
+    user_of = {user["employee_id"]: {"id": index, **user} for index, user in enumerate(users, start=1)}
+
+    for request_id, request in enumerate(requests, start=1):
+        if request["status"] not in ACTIVE_STATUSES:
+            continue
+        user = user_of[request["employee_id"]]
+        start, end = request["start_date"], request["end_date"]
+        units = store.calculate_leave_units(start, end, request["half_day"])
+        violations = validator.validate(user, request["policy_id"], start, end, units,
+                                        half_day=request["half_day"], today=start)
+        assert [v for v in violations if v["rule"] not in FILING_RULES] == [], request
+        validator.track({"id": request_id, "user_id": user["id"], "policy_id": request["policy_id"],
+                         "status": request["status"], "start_date": start.isoformat(),
+                         "end_date": end.isoformat(), "duration_units": units})
+
+
+def test_load_into_memory_sink_round_trip():
+    users, requests = generate_dataset(150, years=2, seed=9, today=date(2016, 6, 1))
+    n_users, n_requests = len(store.FAKE_DB["users"]), len(store.FAKE_DB["requests"])
+
+    summary = load_into(MemorySink(), users, requests, validate=True)
+
+    assert (summary["users"], summary["requests"], summary["failed"]) == (len(users), len(requests), 0)
+    assert len(store.FAKE_DB["users"]) == n_users + len(users)
+    assert len(store.FAKE_DB["requests"]) == n_requests + len(requests)
+    for user in users:
+        loaded = store.ORG.users_by_employee_id[user["employee_id"]]
+        if user["manager_employee_id"]:
+            assert store.get_user_by_id(loaded["manager_id"])["employee_id"] == user["manager_employee_id"]
+    last = store.FAKE_DB["requests"][-1]
+    assert last["user_id"] == store.ORG.users_by_employee_id[requests[-1]["employee_id"]]["id"]
+    assert last["start_date"] == requests[-1]["start_date"].isoformat()
+
+
+def _bench_scaling():
+    path = os.path.join(BACKEND_DIR, "scripts", "bench_scaling.py")
+    spec = importlib.util.spec_from_file_location("bench_scaling", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_bench_slopes_flag_superlinear_growth():
+    bench = _bench_scaling()
+    assert bench.slopes([1000, 10000, 100000], [2.0, 20.0, 2000.0]) == pytest.approx([1.0, 2.0])
+    assert bench.slopes([1000, 10000], [0.0, 5.0]) == [None]
+
+
+def test_bench_measures_every_endpoint_on_a_small_dataset():
+    result = _bench_scaling().run(300, years=1, repeat=1, seed=0)
+    assert result["size"] == 300 and result["columns_mb"] > 0
+    for name, timing in result["endpoints"].items():
+        assert all(status < 400 for status in timing["statuses"]), name
+        assert timing["median_ms"] > 0
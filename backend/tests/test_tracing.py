@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+from app.core.tracing import UNMATCHED_ROUTE, SlowestTraces, TracingMiddleware, _parse_traceparent
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+SPAN_ID = "00f067aa0ba902b7"
+
+
+def test_valid_traceparent():
+    assert _parse_traceparent(f"00-{TRACE_ID}-{SPAN_ID}-01".encode()) == (TRACE_ID, SPAN_ID, True)
+    assert _parse_traceparent(f"00-{TRACE_ID}-{SPAN_ID}-00".encode()) == (TRACE_ID, SPAN_ID, False)
+    # Undefined flag bits are ignored, only "sampled" matters
+    assert _parse_traceparent(f"00-{TRACE_ID}-{SPAN_ID}-03".encode()) == (TRACE_ID, SPAN_ID, True)
+
+
+@pytest.mark.parametrize("header", [
+    f"01-{TRACE_ID}-{SPAN_ID}-01",            # unknown version
+    f"ff-{TRACE_ID}-{SPAN_ID}-01",
+    f"00-{TRACE_ID.upper()}-{SPAN_ID}-01",    # uppercase hex
+    f"00-{TRACE_ID[:-1]}-{SPAN_ID}-01",       # short trace id
+    f"00-{TRACE_ID}-{SPAN_ID}0-01",           # long span id
+    f"00-{'0' * 32}-{SPAN_ID}-01",            # all-zero trace id
+    f"00-{TRACE_ID}-{'0' * 16}-01",           # all-zero span id
+    f"00-{TRACE_ID}-{SPAN_ID}-1",             # one-digit flags
+    f"00-{TRACE_ID}-{SPAN_ID}-zz",
+    f"00-{TRACE_ID}-{SPAN_ID}-01-extra",
+    "00-xyz",
+    "",
+])
+def test_malformed_traceparent_is_ignored(header):
+    assert _parse_traceparent(header.encode()) is None
+
+
+def _request(middleware, path, headers=()):
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": path, "headers": list(headers)}
+    asyncio.run(middleware(scope, receive, send))
+    return dict(sent[0]["headers"])
+
+
+async def _not_found(scope, receive, send):
+    await send({"type": "http.response.start", "status": 404, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+def test_unmatched_routes_share_one_bucket():
+    slowest = SlowestTraces(per_route=5)
+    middleware = TracingMiddleware(_not_found, sample_rate=1.0, slowest=slowest)
+    for i in range(10):
+        _request(middleware, f"/wp-admin/{i}.php")
+    assert list(slowest.routes()) == [UNMATCHED_ROUTE]
+    assert len(slowest.routes()[UNMATCHED_ROUTE]) == 5
+
+
+def test_invalid_header_starts_a_new_trace():
+    middleware = TracingMiddleware(_not_found, sample_rate=1.0, slowest=None)
+    headers = _request(middleware, "/", [(b"traceparent", f"00-{'0' * 32}-{SPAN_ID}-01".encode())])
+    version, trace_id, _, flags = headers[b"traceparent"].decode().split("-")
+    assert trace_id != "0" * 32 and len(trace_id) == 32
+    headers = _request(middleware, "/", [(b"traceparent", f"00-{TRACE_ID}-{SPAN_ID}-01".encode())])
+    assert headers[b"traceparent"].decode().split("-")[1] == TRACE_ID
@@ -0,0 +1,134 @@
+from datetime import date
+
+from app.models import PolicyResponse
+from app.services.validation import RequestIntervalIndex, RequestValidator, request_units, units_to_days
+from app.store import calculate_leave_units
+
+
+def _request(request_id, start, end, status="approved", user_id=7, policy_id=1, units=None):
+    request = {
+        "id": request_id,
+        "user_id": user_id,
+        "policy_id": policy_id,
+        "start_date": start,
+        "end_date": end,
+        "status": status,
+    }
+    if units is not None:
+        request["duration_units"] = units
+    return request
+
+
+def test_interval_index_finds_overlaps_at_the_edges():
+    index = RequestIntervalIndex()
+    index.add(7, date(2025, 3, 3), date(2025, 3, 7), 1)
+    index.add(7, date(2025, 3, 17), date(2025, 3, 17), 2)
+
+    assert index.find_overlap(7, date(2025, 3, 7), date(2025, 3, 10)) == 1
+    assert index.find_overlap(7, date(2025, 2, 24), date(2025, 3, 3)) == 1
+    assert index.find_overlap(7, date(2025, 3, 1), date(2025, 3, 20)) == 2
+    assert index.find_overlap(7, date(2025, 3, 8), date(2025, 3, 16)) is None
+    assert index.find_overlap(7, date(2025, 3, 18), date(2025, 3, 31)) is None
+    assert index.find_overlap(8, date(2025, 3, 3), date(2025, 3, 7)) is None
+
+
+def test_interval_index_insertion_order_does_not_matter():
+    index = RequestIntervalIndex()
+    index.add(7, date(2025, 6, 2), date(2025, 6, 6), 3)
+    index.add(7, date(2025, 1, 6), date(2025, 1, 10), 1)
+    index.add(7, date(2025, 3, 3), date(2025, 3, 7), 2)
+
+    assert index.find_overlap(7, date(2025, 1, 10), date(2025, 1, 10)) == 1
+    assert index.find_overlap(7, date(2025, 3, 5), date(2025, 3, 5)) == 2
+    assert index.find_overlap(7, date(2025, 6, 6), date(2025, 7, 1)) == 3
+    assert index.find_overlap(7, date(2025, 4, 1), date(2025, 5, 30)) is None
+
+
+def test_interval_index_remove_frees_the_range():
+    index = RequestIntervalIndex()
+    index.add(7, date(2025, 3, 3), date(2025, 3, 7), 1)
+    index.remove(7, date(2025, 3, 3), date(2025, 3, 7), 1)
+    assert index.find_overlap(7, date(2025, 3, 3), date(2025, 3, 7)) is None
+    # Removing something that isn't there is a no-op
+    index.remove(7, date(2025, 3, 3), date(2025, 3, 7), 1)
+
+
+def test_interval_index_finds_a_long_range_hidden_behind_a_short_one():
+    # Legacy or imported history may already overlap: a long leave with a
+    # short request inside it
+    index = RequestIntervalIndex()
+    index.add(7, date(2025, 3, 3), date(2025, 3, 31), 1)
+    index.add(7, date(2025, 3, 10), date(2025, 3, 11), 2)
+    index.add(7, date(2025, 3, 14), date(2025, 3, 14), 3)
+
+    assert index.find_overlap(7, date(2025, 3, 20), date(2025, 3, 21)) == 1
+    assert index.find_overlap(7, date(2025, 3, 14), date(2025, 3, 20)) == 3
+    index.remove(7, date(2025, 3, 3), date(2025, 3, 31), 1)
+    assert index.find_overlap(7, date(2025, 3, 20), date(2025, 3, 21)) is None
+
+
+def test_validator_tracks_only_active_requests():
+    validator = RequestValidator()
+    validator.track(_request(1, "2025-03-03", "2025-03-07", units=10))
+    validator.track(_request(2, "2025-04-07", "2025-04-08", status="rejected", units=4))
+
+    assert validator.intervals.find_overlap(7, date(2025, 3, 5), date(2025, 3, 5)) == 1
+    assert validator.intervals.find_overlap(7, date(2025, 4, 7), date(2025, 4, 8)) is None
+    assert validator.balances.used(7, 1, 2025) == 10
+
+    validator.release(_request(1, "2025-03-03", "2025-03-07", units=10))
+    assert validator.intervals.find_overlap(7, date(2025, 3, 5), date(2025, 3, 5)) is None
+    assert validator.balances.used(7, 1, 2025) == 0
+
+
+def _validator(days_allocated=15):
+    validator = RequestValidator()
+    validator.compile(PolicyResponse(
+        id=1, name="Vacaciones", type="vacation", days_allocated=days_allocated, requires_approval=True,
+        advance_notice_days=0, max_consecutive_days=30, is_active=True
+    ))
+    return validator
+
+
+def test_validator_reports_overlap_rule():
+    validator = _validator()
+    validator.track(_request(1, "2025-03-03", "2025-03-07", units=10))
+
+    violations = validator.validate({"id": 7}, 1, date(2025, 3, 7), date(2025, 3, 10), 4,
+                                    today=date(2025, 1, 1))
+    assert [v["rule"] for v in violations] == ["overlap"]
+    assert violations[0]["request_id"] == 1
+
+
+def test_half_day_units():
+    assert calculate_leave_units(date(2025, 3, 4), date(2025, 3, 4)) == 2
+    assert calculate_leave_units(date(2025, 3, 4), date(2025, 3, 4), half_day=True) == 1
+    assert calculate_leave_units(date(2025, 3, 3), date(2025, 3, 7)) == 10
+    # A half day on a weekend costs nothing, it doesn't go negative
+    assert calculate_leave_units(date(2025, 3, 8), date(2025, 3, 8), half_day=True) == 0
+    assert units_to_days(1) == 0.5
+
+
+def test_records_without_units_count_whole_days():
+    assert request_units({"business_days": 3}) == 6
+    assert request_units({"business_days": 3.0, "duration_units": 5}) == 5
+
+
+def test_half_days_are_charged_against_the_balance():
+    validator = _validator(days_allocated=1)
+    validator.track(_request(1, "2025-03-03", "2025-03-03", units=1))
+    assert validator.validate({"id": 7}, 1, date(2025, 3, 4), date(2025, 3, 4), 1, half_day=True,
+                              today=date(2025, 1, 1)) == []
+
+    validator.track(_request(2, "2025-03-04", "2025-03-04", units=1))
+    assert validator.balances.used(7, 1, 2025) == 2
+    violations = validator.validate({"id": 7}, 1, date(2025, 3, 5), date(2025, 3, 5), 1, half_day=True,
+                                    today=date(2025, 1, 1))
+    assert [v["rule"] for v in violations] == ["insufficient_balance"]
+    assert violations[0]["remaining_days"] == 0.0 and violations[0]["requested_days"] == 0.5
+
+
+def test_half_day_requests_cover_a_single_day():
+    violations = _validator().validate({"id": 7}, 1, date(2025, 3, 4), date(2025, 3, 5), 3, half_day=True,
+                                       today=date(2025, 1, 1))
+    assert [v["rule"] for v in violations] == ["half_day_range"]